@@ -1,23 +1,34 @@
 from flask import Flask, jsonify, request
 from flask_cors import CORS
-from blog import send_email_notification_blog
-from blog_source import extract_urls_from_source_url
-from dbOperations import get_categories_data, get_password, get_source_url, get_source_url_data, get_source_url_fetched_url_and_my_blog_url, insert_category, insert_source_url, soft_delete_category, soft_delete_source_url, update_password
-from scraper import scrap_db_urls_and_write_blogs, scraper_main
+from blog import get_category_index_stats, get_publish_stats, send_email_notification_blog, warm_category_index
+from blog_source import extract_urls_from_source_url, last_crawl_summary
+from db_pool import get_pool_stats
+from http_client import get_http_stats
+from image_cache import get_image_cache_stats
+from llm_cache import get_llm_cache_stats
+from llm_usage import get_llm_usage_stats
+from tech_classifier import get_prefilter_stats
+from rate_limiter import QuotaExhausted, get_rate_limit_stats, get_rate_limiter
+from dbOperations import get_categories_data, get_next_parked_resume_at, get_password, get_source_url, get_source_url_data, get_source_url_fetched_url_and_my_blog_url, insert_category, insert_source_url, park_urls, soft_delete_category, soft_delete_source_url, update_password
+from scraper import request_pipeline_stop, scrap_db_urls_and_write_blogs, scraper_main
 import threading
 import time
 import uuid
-from datetime import datetime
+from datetime import datetime, timedelta
 import random
 import string
 import os
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 import smtplib
+import atexit
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
 
+# Let in-flight articles finish publishing when the process shuts down
+atexit.register(request_pipeline_stop)
+
 # Global dictionary to store scraping tasks and their status
 scraping_tasks = {}
 
@@ -45,6 +56,12 @@ def scrape_in_background(task_id, url, category):
             scraping_tasks[task_id]['status'] = 'failed'
             scraping_tasks[task_id]['error'] = 'Failed to scrape article'
             
+    except QuotaExhausted as e:
+        # Out of Gemini quota: park the URL for the scheduler instead of blocking this thread
+        park_urls([url], e.resume_at, 'quota')
+        scraping_tasks[task_id]['status'] = 'parked'
+        scraping_tasks[task_id]['resume_at'] = e.resume_at.isoformat()
+        scraping_tasks[task_id]['error'] = str(e)
     except Exception as e:
         scraping_tasks[task_id]['status'] = 'failed'
         scraping_tasks[task_id]['error'] = str(e)
@@ -409,47 +426,78 @@ def get_all_blogs_handler():
         print(f"Error in get_all_blogs_handler: {str(e)}")
         return jsonify({'error': 'Internal server error occurred while retrieving blogs'}), 500
 
+def run_scheduled_cycle(extract_urls=True):
+    """One scheduler run: write blogs for pending URLs, then (optionally) crawl the sources"""
+    global scheduler_running
+    with scheduler_lock:
+        if scheduler_running:
+            print(f"[Scheduler] Another instance is already running, skipping this cycle")
+            return
+        scheduler_running = True
+        print(f"[Scheduler] Starting scheduled task at {datetime.now()}")
+
+    try:
+        # One category fetch per cycle; posts in the cycle use the index
+        warm_category_index()
+
+        # Run the scraping task
+        print("[Scheduler] Running scrap_db_urls_and_write_blogs...")
+        uploaded_data = scrap_db_urls_and_write_blogs()
+        print(f"[Scheduler] Uploaded URLs: {uploaded_data}")
+        
+        if uploaded_data:
+            print("[Scheduler] Sending email notification...")
+            send_email_notification_blog(uploaded_data)
+        else:
+            print("[Scheduler] No posts were uploaded, skipping email notification.")
+
+        if extract_urls:
+            # Run URL extraction
+            print("[Scheduler] Running extract_urls_from_source_url...")
+            extract_urls_from_source_url()
+        
+        print(f"[Scheduler] Completed scheduled task at {datetime.now()}")
+        
+    except Exception as e:
+        print(f"[Scheduler] Error in scheduled task: {e}")
+    finally:
+        with scheduler_lock:
+            scheduler_running = False
+
+
+def wait_for_next_cycle(interval_hours):
+    """Sleep until the next full cycle, waking early to resume URLs parked for quota"""
+    next_cycle = datetime.now() + timedelta(hours=interval_hours)
+    checked_until = datetime.now()
+    while True:
+        remaining = (next_cycle - datetime.now()).total_seconds()
+        if remaining <= 0:
+            return
+        try:
+            resume_at = get_next_parked_resume_at(checked_until)
+        except Exception as e:
+            print(f"[Scheduler] Could not read parked URLs: {e}")
+            resume_at = None
+        if resume_at is None or resume_at >= next_cycle:
+            time.sleep(remaining)
+            return
+
+        print(f"[Scheduler] Parked URLs resume at {resume_at}, waking up early for them")
+        time.sleep(max(0, (resume_at - datetime.now()).total_seconds()) + 1)
+        # Each resume time only triggers one early run; leftovers wait for the full cycle
+        checked_until = resume_at
+        run_scheduled_cycle(extract_urls=False)
+
+
 # create a function that runs with frequency of 8 hours after the server start
 def schedule_task(interval_hours):
     def loop():
-        global scheduler_running
         while True:
-            try:
-                with scheduler_lock:
-                    if scheduler_running:
-                        print(f"[Scheduler] Another instance is already running, skipping this cycle")
-                        time.sleep(interval_hours * 3600)
-                        continue
-                    
-                    scheduler_running = True
-                    print(f"[Scheduler] Starting scheduled task at {datetime.now()}")
-                
-                # Run the scraping task
-                print("[Scheduler] Running scrap_db_urls_and_write_blogs...")
-                uploaded_data = scrap_db_urls_and_write_blogs()
-                print(f"[Scheduler] Uploaded URLs: {uploaded_data}")
-                
-                if uploaded_data:
-                    print("[Scheduler] Sending email notification...")
-                    send_email_notification_blog(uploaded_data)
-                else:
-                    print("[Scheduler] No posts were uploaded, skipping email notification.")
-
-                # Run URL extraction
-                print("[Scheduler] Running extract_urls_from_source_url...")
-                extract_urls_from_source_url()
-                
-                print(f"[Scheduler] Completed scheduled task at {datetime.now()}")
-                
-            except Exception as e:
-                print(f"[Scheduler] Error in scheduled task: {e}")
-            finally:
-                with scheduler_lock:
-                    scheduler_running = False
+            run_scheduled_cycle()
             
             # Wait for next cycle
             print(f"[Scheduler] Waiting {interval_hours} hours until next run...")
-            time.sleep(interval_hours * 3600)  # Convert hours to seconds
+            wait_for_next_cycle(interval_hours)
     
     thread = threading.Thread(target=loop, daemon=True)
     thread.start()
@@ -480,10 +528,13 @@ def trigger_scheduler():
         
         extract_urls_from_source_url()
         
+        resume_at = get_rate_limiter().get_quota_resume_at()
         return jsonify({
             'message': 'Scheduler triggered successfully',
             'uploaded_data': uploaded_data,
-            'status': 'completed'
+            'status': 'completed',
+            # Set when quota ran out and the remaining URLs were parked
+            'quota_resume_at': resume_at.isoformat() if resume_at else None
         })
     except Exception as e:
         return jsonify({'error': str(e), 'status': 'failed'}), 500
@@ -499,6 +550,23 @@ def scheduler_status():
         'current_time': datetime.now().isoformat()
     })
 
+@app.route('/stats', methods=['GET'])
+def stats():
+    """Get runtime statistics for sizing connection pools and caches"""
+    return jsonify({
+        'db_pool': get_pool_stats(),
+        'last_crawl': last_crawl_summary,
+        'llm_usage': get_llm_usage_stats(),
+        'rate_limits': get_rate_limit_stats(),
+        'llm_cache': get_llm_cache_stats(),
+        'tech_prefilter': get_prefilter_stats(),
+        'category_index': get_category_index_stats(),
+        'http': get_http_stats(),
+        'image_cache': get_image_cache_stats(),
+        'publish': get_publish_stats(),
+        'current_time': datetime.now().isoformat()
+    })
+
 if __name__ == "__main__":
     print("[App] Starting Flask application...")
     start_scheduler()
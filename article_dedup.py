@@ -0,0 +1,108 @@
+import os
+import random
+import re
+import threading
+import zlib
+from datetime import datetime, timedelta
+
+from dotenv import load_dotenv
+
+from dbOperations import find_lsh_candidates, save_article_fingerprint
+
+# Load environment variables
+load_dotenv()
+
+# Near-duplicate detection across sources: the same press release shows up on several
+# sites within hours. Each article's text gets a MinHash signature stored in tbl_urls,
+# and its LSH band keys go into tbl_url_lsh so candidates are found with an index lookup.
+DEDUP_ENABLED = os.getenv('DEDUP_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+DEDUP_THRESHOLD = float(os.getenv('DEDUP_THRESHOLD', '0.7'))  # estimated Jaccard similarity
+DEDUP_WINDOW_DAYS = float(os.getenv('DEDUP_WINDOW_DAYS', '3'))
+
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS  # 16 bands x 4 rows: pairs above ~0.5 similarity almost always share a band
+SHINGLE_SIZE = 4  # words per shingle
+MIN_WORDS = 40  # shorter texts are too small to fingerprint reliably
+
+_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_rng = random.Random(20240601)  # fixed seed: signatures must stay comparable across runs
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+
+WORD_PATTERN = re.compile(r'\w+', re.UNICODE)
+
+# Check-then-index must not interleave between pipeline workers
+_lock = threading.Lock()
+
+
+def shingle_hashes(text):
+    words = WORD_PATTERN.findall((text or '').lower())
+    if len(words) < MIN_WORDS:
+        return set()
+    return {
+        zlib.crc32(' '.join(words[i:i + SHINGLE_SIZE]).encode('utf-8'))
+        for i in range(len(words) - SHINGLE_SIZE + 1)
+    }
+
+
+def minhash(text):
+    """MinHash signature of the article text, or None if the text is too short"""
+    hashes = shingle_hashes(text)
+    if not hashes:
+        return None
+    return [
+        min(((a * h + b) % _PRIME) & _MAX_HASH for h in hashes)
+        for a, b in _PERMUTATIONS
+    ]
+
+
+def signature_to_hex(signature):
+    return ''.join(f'{value:08x}' for value in signature)
+
+
+def signature_from_hex(value):
+    return [int(value[i:i + 8], 16) for i in range(0, len(value), 8)]
+
+
+def band_keys(signature):
+    """(band, bucket) pairs for the LSH index"""
+    return [
+        (band, signature_to_hex(signature[band * ROWS:(band + 1) * ROWS]))
+        for band in range(BANDS)
+    ]
+
+
+def similarity(a, b):
+    """Estimated Jaccard similarity of two signatures"""
+    if not a or not b or len(a) != len(b):
+        return 0.0
+    return sum(1 for x, y in zip(a, b) if x == y) / len(a)
+
+
+def find_duplicate(url, text):
+    """
+    Return (original_url, similarity) if the article is a near-duplicate of one indexed
+    in the last DEDUP_WINDOW_DAYS that is published or still in flight (not yet written,
+    parked or rejected), else (None, best similarity). A new article is indexed so copies
+    fetched later, including in the same cycle, are caught.
+    """
+    if not DEDUP_ENABLED:
+        return None, 0.0
+    signature = minhash(text)
+    if signature is None:
+        return None, 0.0
+    keys = band_keys(signature)
+
+    with _lock:
+        since = datetime.now() - timedelta(days=DEDUP_WINDOW_DAYS)
+        best_url, best_similarity = None, 0.0
+        for candidate_url, candidate_hex in find_lsh_candidates(keys, since, url):
+            score = similarity(signature, signature_from_hex(candidate_hex))
+            if score > best_similarity:
+                best_url, best_similarity = candidate_url, score
+        if best_url is not None and best_similarity >= DEDUP_THRESHOLD:
+            return best_url, best_similarity
+
+        save_article_fingerprint(url, signature_to_hex(signature), keys, datetime.now())
+        return None, best_similarity
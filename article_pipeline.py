@@ -0,0 +1,110 @@
+import queue
+import threading
+import time
+import traceback
+
+# Marks the end of the input for one worker
+_SENTINEL = object()
+
+
+class Stage:
+    """One pipeline step: func(item) returns the item for the next stage, or None to drop it"""
+
+    def __init__(self, name, func, workers=1):
+        self.name = name
+        self.func = func
+        self.workers = max(1, int(workers))
+
+
+class StagedPipeline:
+    """Runs items through stages connected by bounded queues, each stage with its own workers"""
+
+    def __init__(self, stages, queue_size=8):
+        if not stages:
+            raise ValueError("A pipeline needs at least one stage")
+        self.stages = stages
+        self.queues = [queue.Queue(maxsize=max(1, queue_size)) for _ in stages]
+        self._stop = threading.Event()
+        self._threads = []
+        self._remaining = [stage.workers for stage in stages]
+        self._lock = threading.Lock()
+        self.stats = {stage.name: {'processed': 0, 'dropped': 0, 'errors': 0, 'busy_seconds': 0.0} for stage in stages}
+
+    def stop(self):
+        """Stop feeding new items; items already queued are still drained"""
+        self._stop.set()
+
+    def wait(self, timeout=None):
+        """Wait for the workers to finish; returns True if the pipeline fully drained"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for thread in list(self._threads):
+            remaining = None if deadline is None else max(0, deadline - time.monotonic())
+            thread.join(remaining)
+        return not any(thread.is_alive() for thread in self._threads)
+
+    @property
+    def stopping(self):
+        return self._stop.is_set()
+
+    def _worker(self, index):
+        stage = self.stages[index]
+        inbox = self.queues[index]
+        outbox = self.queues[index + 1] if index + 1 < len(self.stages) else None
+        stats = self.stats[stage.name]
+
+        while True:
+            item = inbox.get()
+            if item is _SENTINEL:
+                break
+
+            started = time.monotonic()
+            try:
+                result = stage.func(item)
+            except Exception as e:
+                print(f"[Pipeline] {stage.name} failed: {e}")
+                traceback.print_exc()
+                result = None
+                with self._lock:
+                    stats['errors'] += 1
+            with self._lock:
+                stats['busy_seconds'] += time.monotonic() - started
+                if result is None:
+                    stats['dropped'] += 1
+                else:
+                    stats['processed'] += 1
+
+            if result is not None and outbox is not None:
+                outbox.put(result)
+
+        # The last worker of a stage closes the next stage
+        with self._lock:
+            self._remaining[index] -= 1
+            last = self._remaining[index] == 0
+        if last and outbox is not None:
+            for _ in range(self.stages[index + 1].workers):
+                outbox.put(_SENTINEL)
+
+    def run(self, items):
+        """Feed items through every stage and block until the pipeline has drained"""
+        for index, stage in enumerate(self.stages):
+            for n in range(stage.workers):
+                thread = threading.Thread(target=self._worker, args=(index,),
+                                          name=f"pipeline-{stage.name}-{n}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+        fed = 0
+        try:
+            for item in items:
+                if self._stop.is_set():
+                    print(f"[Pipeline] Stop requested, not feeding remaining items after {fed}")
+                    break
+                self.queues[0].put(item)
+                fed += 1
+        finally:
+            for _ in range(self.stages[0].workers):
+                self.queues[0].put(_SENTINEL)
+
+        for thread in self._threads:
+            thread.join()
+        return fed
@@ -0,0 +1,107 @@
+"""Micro-benchmark: n-gram-screened remove_near_duplicates vs. the SequenceMatcher-only loop.
+
+Also a regression check: on every generated corpus both methods must keep exactly the
+same paragraphs at the 0.85 threshold.
+
+Run from the repository root:
+    python benchmarks/bench_near_duplicates.py
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from text_processing import remove_near_duplicates  # noqa: E402
+
+FUNCTION_WORDS = (
+    "the a of to in and with for on by as that this which from has have will its their over more than"
+).split()
+SYLLABLES = "ka li mo ne ra su ti ve bo da fi gu ha jo ku la mi no pe ri sa to vu we ya zo".split()
+
+
+def make_vocabulary(rng, size=3000):
+    """Pseudo-words so distinct paragraphs share about as many trigrams as real prose does"""
+    words = set()
+    while len(words) < size:
+        words.add(''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+
+def make_corpus(n_paragraphs, seed):
+    """Generated article paragraphs: mostly distinct, some exact and some edited repeats"""
+    rng = random.Random(seed)
+    vocabulary = make_vocabulary(rng)
+
+    def word():
+        return rng.choice(FUNCTION_WORDS) if rng.random() < 0.4 else rng.choice(vocabulary)
+
+    def sentence():
+        return ' '.join(word() for _ in range(rng.randint(8, 22))).capitalize() + '.'
+
+    def paragraph():
+        return ' '.join(sentence() for _ in range(rng.randint(1, 5)))
+
+    def edit(text, edits):
+        words = text.split()
+        for _ in range(edits):
+            i = rng.randrange(len(words))
+            op = rng.random()
+            if op < 0.4:
+                words[i] = word()
+            elif op < 0.7 and len(words) > 1:
+                del words[i]
+            else:
+                words.insert(i, word())
+        return ' '.join(words)
+
+    paragraphs = []
+    for _ in range(n_paragraphs):
+        if paragraphs and rng.random() < 0.25:
+            source = rng.choice(paragraphs)
+            # From exact repeats to heavy rewrites that straddle the threshold
+            paragraphs.append(edit(source, rng.randint(0, max(1, len(source.split()) // 3))))
+        else:
+            paragraphs.append(paragraph())
+    return paragraphs
+
+
+# Pairs the screen once got wrong: the legacy loop drops the second paragraph
+EDGE_CASES = [
+    ['a' * 100 + 'bcdefgh', 'a' * 100 + 'ijklmno'],  # repeated trigrams, ratio 0.93
+    ['', ''],
+]
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def main():
+    # Regression corpus: identical output on many small inputs
+    for seed in range(40):
+        corpus = make_corpus(60, seed)
+        legacy = remove_near_duplicates(corpus, threshold=0.85, method='legacy')
+        ngram = remove_near_duplicates(corpus, threshold=0.85, method='ngram')
+        assert legacy == ngram, f"methods disagree on corpus seed {seed}"
+    for case in EDGE_CASES:
+        legacy = remove_near_duplicates(case, threshold=0.85, method='legacy')
+        ngram = remove_near_duplicates(case, threshold=0.85, method='ngram')
+        assert legacy == ngram, f"methods disagree on edge case {case!r}"
+    print(f"regression corpus: 40 corpora x 60 paragraphs and {len(EDGE_CASES)} edge case(s), identical output")
+
+    for n_paragraphs in (50, 500):
+        corpus = make_corpus(n_paragraphs, seed=1000 + n_paragraphs)
+        legacy, legacy_time = timed(remove_near_duplicates, corpus, threshold=0.85, method='legacy')
+        ngram, ngram_time = timed(remove_near_duplicates, corpus, threshold=0.85, method='ngram')
+        assert legacy == ngram, f"methods disagree on the {n_paragraphs}-paragraph input"
+        print(f"{n_paragraphs:>4} paragraphs ({len(ngram)} kept): "
+              f"legacy {legacy_time * 1000:9.1f} ms, ngram {ngram_time * 1000:8.1f} ms, "
+              f"speedup {legacy_time / ngram_time:6.1f}x")
+
+
+if __name__ == '__main__':
+    main()
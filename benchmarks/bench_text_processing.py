@@ -0,0 +1,314 @@
+"""Micro-benchmark: text_processing's compiled patterns vs. the old per-call re loops.
+
+is_english_content is compared with language_id.is_english, which replaced it: the
+answers may differ, so the agreement rate is printed instead.
+
+The corpus is the Gemini responses stored in the LLM cache (LLM_CACHE_PATH, or the
+path given on the command line): titles, bodies and structured JSON packages. Without
+a cache it falls back to generated samples shaped like those responses. Every text
+is also a regression check: old and new functions must return the same value.
+
+Run from the repository root:
+    python benchmarks/bench_text_processing.py [path/to/llm_cache.sqlite3]
+"""
+import contextlib
+import io
+import json
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import language_id  # noqa: E402
+import text_processing  # noqa: E402
+from llm_cache import LLM_CACHE_PATH, LLMCache  # noqa: E402
+from text_processing import MAX_TITLE_LENGTH, remove_near_duplicates  # noqa: E402
+
+
+# --- The implementations from blog.py before text_processing -------------------------
+
+def legacy_is_english_content(text):
+    english_patterns = [
+        r'\b(the|and|or|but|in|on|at|to|for|of|with|by|from|up|about|into|through|during|before|after|above|below|between|among|within|without|against|toward|towards|upon|across|behind|beneath|beside|beyond|inside|outside|under|over|throughout|underneath|along|around|down|off|out|past|since|until|upon|via|per|except|like|unlike|as|than|despite|according|regarding|concerning|including|excluding|following|preceding|during|while|when|where|why|how|what|which|who|whom|whose|this|that|these|those|i|you|he|she|it|we|they|me|him|her|us|them|my|your|his|her|its|our|their|mine|yours|his|hers|ours|theirs|myself|yourself|himself|herself|itself|ourselves|yourselves|themselves|am|is|are|was|were|be|been|being|have|has|had|do|does|did|will|would|could|should|may|might|must|can|shall|ought|need|dare|used|going|gonna|wanna|gotta|lemme|gimme|wanna|gotta|lemme|gimme|wanna|gotta|lemme|gimme)\b',
+        r'\b(a|an|and|are|as|at|be|by|for|from|has|he|in|is|it|its|may|not|of|on|or|that|the|to|was|will|with|the|and|for|are|but|not|you|all|any|can|had|her|was|one|our|out|day|get|has|him|his|how|man|new|now|old|see|two|way|who|boy|did|its|let|put|say|she|too|use)\b'
+    ]
+    english_word_count = 0
+    words = re.findall(r'\b\w+\b', text.lower())
+    total_word_count = len(words)
+    if total_word_count == 0:
+        return True
+    for pattern in english_patterns:
+        english_word_count += len(re.findall(pattern, text.lower()))
+    english_percentage = english_word_count / total_word_count if total_word_count > 0 else 0
+    non_english_chars = re.findall(r'[àáâãäåæçèéêëìíîïðñòóôõöøùúûüýþÿāăąćĉċčďđēĕėęěĝğġģĥħĩīĭįıĳĵķĸĺļľŀłńņňŉŋōŏőœŕŗřśŝşšſţťŧũūŭůűųŵŷźżž]', text.lower())
+    if len(non_english_chars) > len(text) * 0.1:
+        return False
+    return english_percentage > 0.6
+
+
+def legacy_is_bad_title(title):
+    non_english_chars = re.findall(r'[^\x00-\x7F\u00A0-\u00FF\u0100-\u017F\u0180-\u024F\u1E00-\u1EFF\u2C60-\u2C7F\uA720-\uA7FF]', title)
+    if non_english_chars:
+        print(f"[⚠️] Title contains non-English characters: {non_english_chars}")
+        return True
+    bad_patterns = [
+        r"here are a few options", r"prioritizing seo", r"engagement",
+        r"keeping (in mind|the african tech context)", r"character[s]?", r"option[s]?", r"context",
+        r"limit[s]?", r"list", r"seo", r"african tech context", r"\d+ character[s]?", r"\d+ option[s]?",
+        r"\d+ character[s]?", r"\d+ word[s]?", r"\d+ headline[s]?", r"headline[s]?", r"title[s]?",
+        r"meta", r"instruction[s]?", r"suggestion[s]?", r"example[s]?", r"catchy title[s]?",
+        r"engaging title[s]?", r"seo[- ]?friendly", r"african tech context", r"keeping.*context",
+        r"option[s]?", r"option[s]?:", r"option[s]? -", r"option[s]?:", r"option[s]? ",
+        r"option[s]?\d*", r"\d+ option[s]?", r"\d+ character[s]?", r"\d+ headline[s]?",
+        r"\d+ title[s]?", r"\d+ suggestion[s]?", r"\d+ example[s]?", r"\d+ list[s]?", r"list of",
+        r"list:"
+    ]
+    title_lower = title.lower()
+    for pat in bad_patterns:
+        if re.search(pat, title_lower):
+            return True
+    if any(sep in title_lower for sep in [":", "-", "|", ","]):
+        if len(title_lower.split()) < 8 and (":" in title_lower or "," in title_lower):
+            return True
+    if len(title_lower) < 10:
+        return True
+    if len(title) > MAX_TITLE_LENGTH:
+        return True
+    return False
+
+
+def legacy_ensure_complete_sentence(title):
+    title = re.sub(r'[,\s]+$', '', title)
+    common_incomplete_endings = {
+        'tech': 'technology', 'dev': 'development', 'innov': 'innovation', 'start': 'startup',
+        'fin': 'finance', 'crypt': 'cryptocurrency', 'block': 'blockchain', 'artif': 'artificial',
+        'intell': 'intelligence', 'mach': 'machine', 'learn': 'learning', 'data': 'data',
+        'cloud': 'cloud', 'cyber': 'cybersecurity', 'digit': 'digital', 'mob': 'mobile', 'web': 'web',
+        'app': 'application', 'soft': 'software', 'hard': 'hardware'
+    }
+    words = title.split()
+    if words:
+        last_word = words[-1].lower()
+        for incomplete, complete in common_incomplete_endings.items():
+            if last_word.startswith(incomplete) and len(last_word) <= len(incomplete) + 2:
+                words[-1] = complete
+                title = ' '.join(words)
+                break
+    return title
+
+
+def legacy_clean_generated_title(new_title):
+    new_title = re.sub(r'[#*`]', '', new_title)
+    new_title = re.sub(r'\s+', ' ', new_title)
+    new_title = new_title.strip()
+    meta_patterns = [
+        r"^title:\s*", r"^new title:\s*", r"^here's.*:", r"^here is.*:",
+        r"^rewritten.*:", r"^seo.*:", r"^engaging.*:", r"^catchy.*:"
+    ]
+    for pattern in meta_patterns:
+        new_title = re.sub(pattern, '', new_title, flags=re.IGNORECASE)
+    new_title = new_title.strip()
+    new_title = legacy_ensure_complete_sentence(new_title)
+    if len(new_title) > MAX_TITLE_LENGTH:
+        cut = new_title[:MAX_TITLE_LENGTH].rstrip()
+        if ' ' in cut:
+            cut = cut[:cut.rfind(' ')].rstrip()
+        new_title = cut
+        new_title = legacy_ensure_complete_sentence(new_title)
+    return new_title
+
+
+def legacy_clean_content(content, topic):
+    content = re.sub(r'<[^>]+>', '', content)
+    content = re.sub(r'```[a-zA-Z]*\n', '', content)
+    content = re.sub(r'```\n', '', content)
+    content = re.sub(r'```', '', content)
+    content = re.sub(r'\*\*(.*?)\*\*', r'\1', content)
+    content = re.sub(r'\*(.*?)\*', r'\1', content)
+    content = re.sub(r'`(.*?)`', r'\1', content)
+    content = re.sub(r'~~(.*?)~~', r'\1', content)
+    content = re.sub(r'\[(.*?)\]\(.*?\)', r'\1', content)
+    content = re.sub(r'\[(.*?)\]', r'\1', content)
+    content = re.sub(r'\[.*?\]', '', content)
+    content = re.sub(r'\.{2,}', '.', content)
+    paragraphs = [p.strip() for p in content.split('\n') if p.strip()]
+    cleaned = []
+    for para in paragraphs:
+        if para.lower().startswith('introduction') and not (para.startswith('##') or para.startswith('<h2>')):
+            continue
+        if para.strip().lower() == 'introduction':
+            continue
+        meta_patterns = [
+            r"here's a rewritten", r"here is a rewritten", r"seo-optimized version",
+            r"tailored for.*context", r"adhering to.*specifications", r"comprehensive blog post about",
+            r"original content:", r"structure:", r"requirements:", r"content:", r"meta-instructions",
+            r"meta-commentary"
+        ]
+        para_lower = para.lower()
+        if any(re.search(pattern, para_lower) for pattern in meta_patterns):
+            continue
+        if '[...]' in para or para.endswith('...') or para.endswith('..'):
+            continue
+        if re.match(r'^\.+$', para):
+            continue
+        if re.match(r'^[*`\s]+$', para) and not para.startswith('##'):
+            continue
+        cleaned.append(para)
+    # Same de-duplication on both sides: this benchmark is about the regex work
+    unique_paragraphs = remove_near_duplicates(cleaned, threshold=0.85)
+    return '\n'.join(unique_paragraphs)
+
+
+def legacy_convert_to_html(content):
+    lines = content.split('\n')
+    html_lines = []
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith('##'):
+            heading = line[2:].strip()
+            html_lines.append(f'<h2>{heading}</h2>')
+            continue
+        line = re.sub(r'#{1,6}\s*', '', line)
+        line = re.sub(r'\*\*(.*?)\*\*', r'\1', line)
+        line = re.sub(r'\*(.*?)\*', r'\1', line)
+        line = re.sub(r'`(.*?)`', r'\1', line)
+        if line and len(line) > 20:
+            html_lines.append(f'<p>{line}</p>')
+    return '\n'.join(html_lines)
+
+
+# --- Corpus --------------------------------------------------------------------------
+
+def corpus_from_cache(path):
+    """(titles, bodies, source texts) from cached Gemini responses and their prompts"""
+    titles, bodies, sources = [], [], []
+    for kind, prompt, response in LLMCache(path=path).entries():
+        if kind == 'title':
+            titles.append(response)
+        elif kind in ('body', 'content'):
+            bodies.append(response)
+        elif kind == 'structured':
+            try:
+                data = json.loads(re.sub(r'^```(?:json)?\s*|\s*```$', '', response.strip()))
+            except ValueError:
+                continue
+            if not isinstance(data, dict):
+                continue
+            if isinstance(data.get('title'), str):
+                titles.append(data['title'])
+            lines = []
+            for section in data.get('body_sections') or []:
+                if isinstance(section, dict):
+                    if section.get('heading'):
+                        lines.append(f"## {section['heading']}")
+                    lines.extend(str(p) for p in section.get('paragraphs') or [])
+            if lines:
+                bodies.append('\n'.join(lines))
+        # The scraped article sits in the prompt; that is what the language check sees
+        marker = prompt.find('Original content:')
+        if marker != -1:
+            sources.append(prompt[marker + len('Original content:'):])
+    return titles, bodies, sources
+
+
+TITLE_SAMPLES = [
+    "Title: Nigerian Fintech Raises $20M to Expand Mobile Payments Across West Africa",
+    "**Kenya's M-Pesa Hits 50 Million Users as Safaricom Bets on AI**",
+    "Here are a few options:\n1. Egypt's Startups Attract Record Funding\n2. Cairo Tech Boom",
+    "Here's a catchy title: South Africa Launches National 5G Spectrum Auction",
+    "Ghana Opens Its First Hyperscale Data Centre in Accra",
+    "SEO-friendly headline (under 80 characters): Rwanda Drone Deliveries Reach Rural Clinics",
+    "Новый стартап в Лагосе привлек инвестиции",
+    "إطلاق منصة جديدة للتجارة الإلكترونية في المغرب",
+    "Startups africaines : la levée de fonds record de Wave au Sénégal",
+    "Africa's Largest Solar-Powered Cloud Region Goes Live in Johannesburg Today as Demand for Tech",
+]
+
+BODY_LINES = [
+    "Here's a rewritten version of the article, tailored for the African tech context:",
+    "## The Rise of Mobile Money",
+    "**Lagos, Nigeria** - The fintech startup announced a *$20 million* Series A round led by `Partech`.",
+    "The company says the funding will help it expand into [Ghana](https://example.com) and Kenya...",
+    "Introduction",
+    "Its platform processes more than 2 million transactions a month for small merchants across the region.",
+    "~~Previously~~ The firm focused on agent networks before moving into card issuing and lending.",
+    "```markdown",
+    "Regulators in the region have tightened licensing rules for payment service providers this year.",
+    "...",
+    "Analysts expect consolidation as smaller players struggle to raise follow-on rounds [citation needed].",
+    "## Conclusion",
+    "The raise signals renewed investor appetite for African fintech after a slower 2023.",
+]
+
+SOURCE_SAMPLES = [
+    "Les startups africaines ont levé près de 3 milliards de dollars l'année dernière, selon un nouveau rapport. ",
+    "A operadora anunciou o lançamento de uma nova rede de fibra ótica em Luanda e Benguela. ",
+    "Serikali imezindua mpango mpya wa kuwasaidia vijana kupata ujuzi wa teknolojia ya kidijitali. ",
+    "أعلنت الحكومة عن إطلاق منصة رقمية جديدة لدعم الشركات الناشئة في المنطقة. ",
+]
+
+
+def generated_corpus(seed=7, n=200):
+    rng = random.Random(seed)
+    titles = [rng.choice(TITLE_SAMPLES) for _ in range(n)]
+    bodies = []
+    for _ in range(n):
+        lines = [rng.choice(BODY_LINES) for _ in range(rng.randint(8, 30))]
+        bodies.append('\n'.join(lines))
+    sources = [body.replace('**', '') for body in bodies]
+    sources += [sample * 4 for sample in SOURCE_SAMPLES for _ in range(5)]
+    return titles, bodies, sources
+
+
+# --- Benchmark -----------------------------------------------------------------------
+
+def run(name, legacy, current, inputs, repeat=5, same_output=True):
+    with contextlib.redirect_stdout(io.StringIO()):  # is_bad_title logs rejected scripts
+        agree = 0
+        for args in inputs:
+            matches = legacy(*args) == current(*args)
+            assert matches or not same_output, f"{name} differs on {args!r:.200}"
+            agree += matches
+        timings = []
+        for func in (legacy, current):
+            start = time.perf_counter()
+            for _ in range(repeat):
+                for args in inputs:
+                    func(*args)
+            timings.append((time.perf_counter() - start) / repeat)
+    legacy_time, current_time = timings
+    print(f"{name:<24} {len(inputs):>5} inputs: legacy {legacy_time * 1000:8.2f} ms, "
+          f"new {current_time * 1000:8.2f} ms, speedup {legacy_time / current_time:5.1f}x"
+          + ('' if same_output else f", agreement {agree / len(inputs):.0%}"))
+
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else LLM_CACHE_PATH
+    titles = bodies = sources = []
+    if os.path.exists(path):
+        titles, bodies, sources = corpus_from_cache(path)
+        print(f"corpus: {path} ({len(titles)} titles, {len(bodies)} bodies, {len(sources)} source texts)")
+    if not (titles and bodies and sources):
+        titles, bodies, sources = generated_corpus()
+        print(f"corpus: generated samples ({len(titles)} titles, {len(bodies)} bodies), no usable LLM cache")
+
+    cleaned_titles = [text_processing.clean_generated_title(t) for t in titles]
+    cleaned_bodies = [text_processing.clean_content(b, '') for b in bodies]
+
+    run('clean_generated_title', legacy_clean_generated_title, text_processing.clean_generated_title,
+        [(t,) for t in titles])
+    run('is_bad_title', legacy_is_bad_title, text_processing.is_bad_title, [(t,) for t in cleaned_titles])
+    run('is_english_content', legacy_is_english_content, language_id.is_english,
+        [(s,) for s in sources], same_output=False)
+    run('clean_content', legacy_clean_content, text_processing.clean_content, [(b, '') for b in bodies])
+    run('convert_to_html', legacy_convert_to_html, text_processing.convert_to_html,
+        [(b,) for b in cleaned_bodies])
+
+
+if __name__ == '__main__':
+    main()
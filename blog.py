@@ -1,136 +1,43 @@
-import requests
 import base64
 import google.generativeai as genai
 import os
 from dotenv import load_dotenv
 import re
-from difflib import SequenceMatcher
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 import json
 import time
-from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor, wait
 
+from category_index import CategoryIndex
 from dbOperations import get_categories_data, update_my_blog_url
+from http_client import get_http_client
+from image_cache import get_image_cache, normalize_query
+from image_relay import prepare_image_body, safe_filename, with_extension
+from language_id import identify_language, language_name, translation_instruction
+from llm_client import REWRITE_CONTENT_TOKENS, discard_cached_response, generate_content, trim_to_token_budget
+from llm_usage import track_article
+from publish_queue import PublishQueue
+from rate_limiter import ModelOverBudget, QuotaExhausted, get_rate_limiter
+from text_processing import (
+    MAX_TITLE_LENGTH,
+    clean_content,
+    clean_generated_title,
+    clean_keywords,
+    convert_to_html,
+    create_intelligent_fallback_title,
+    fallback_keywords,
+    finalize_rewritten_body,
+    is_bad_title,
+    is_valid_body,
+)
 
 # Load environment variables
 load_dotenv()
 
-# Rate limiting tracking for blog content generation
-class BlogRateLimiter:
-    def __init__(self):
-        self.primary_requests = []  # Flash requests
-        self.fallback_requests = []  # Flash-Lite requests
-        self.fallback_pro_requests = []  # 2.5 Pro requests
-        self.fallback_flash_requests = []  # 2.5 Flash requests
-        
-        # Rate limits for different models
-        self.primary_rpm = 15  # Gemini 2.0 Flash RPM
-        self.fallback_rpm = 30  # Gemini 2.0 Flash-Lite RPM
-        self.fallback_pro_rpm = 20  # Gemini 2.5 Pro RPM (estimated)
-        self.fallback_flash_rpm = 25  # Gemini 2.5 Flash RPM (estimated)
-        
-        # Track when all models are rate limited
-        self.all_models_rate_limited_time = None
-    
-    def get_requests_list(self, model_type):
-        """Get the appropriate requests list based on model type"""
-        if model_type == 'primary':
-            return self.primary_requests
-        elif model_type == 'fallback':
-            return self.fallback_requests
-        elif model_type == 'fallback-pro':
-            return self.fallback_pro_requests
-        elif model_type == 'fallback-flash':
-            return self.fallback_flash_requests
-        else:
-            return self.fallback_requests  # Default to fallback
-    
-    def get_rpm_limit(self, model_type):
-        """Get the RPM limit for the specified model type"""
-        if model_type == 'primary':
-            return self.primary_rpm
-        elif model_type == 'fallback':
-            return self.fallback_rpm
-        elif model_type == 'fallback-pro':
-            return self.fallback_pro_rpm
-        elif model_type == 'fallback-flash':
-            return self.fallback_flash_rpm
-        else:
-            return self.fallback_rpm  # Default to fallback
-    
-    def are_all_models_rate_limited(self):
-        """Check if all models have reached their rate limits"""
-        model_types = ['primary', 'fallback', 'fallback-flash', 'fallback-pro']
-        
-        for model_type in model_types:
-            if self.can_make_request(model_type):
-                return False
-        return True
-    
-    def should_sleep_for_hour(self):
-        """Check if we should sleep for an hour due to all models being rate limited"""
-        if self.all_models_rate_limited_time is None:
-            return False
-        
-        # Check if 1 hour has passed since all models were rate limited
-        time_since_rate_limit = datetime.now() - self.all_models_rate_limited_time
-        return time_since_rate_limit.total_seconds() < 3600  # 1 hour in seconds
-    
-    def mark_all_models_rate_limited(self):
-        """Mark that all models are currently rate limited"""
-        self.all_models_rate_limited_time = datetime.now()
-        print(f"[🚫] All models are rate limited. Sleeping for 1 hour until {self.all_models_rate_limited_time + timedelta(hours=1)}")
-    
-    def reset_rate_limit_tracking(self):
-        """Reset the rate limit tracking when models become available again"""
-        self.all_models_rate_limited_time = None
-        print("[✅] Rate limit tracking reset - models available again")
-    
-    def can_make_request(self, model_type='primary'):
-        """Check if we can make a request based on rate limits"""
-        now = datetime.now()
-        window_start = now - timedelta(minutes=1)
-        
-        requests = self.get_requests_list(model_type)
-        rpm_limit = self.get_rpm_limit(model_type)
-        
-        # Clean old requests (older than 1 minute)
-        requests[:] = [req_time for req_time in requests if req_time > window_start]
-        
-        # Check RPM limit
-        if len(requests) >= rpm_limit:
-            return False
-        
-        return True
-    
-    def record_request(self, model_type='primary'):
-        """Record a request for rate limiting"""
-        requests = self.get_requests_list(model_type)
-        requests.append(datetime.now())
-    
-    def get_wait_time(self, model_type='primary'):
-        """Calculate how long to wait before next request"""
-        now = datetime.now()
-        window_start = now - timedelta(minutes=1)
-        
-        requests = self.get_requests_list(model_type)
-        rpm_limit = self.get_rpm_limit(model_type)
-        
-        # Clean old requests
-        requests[:] = [req_time for req_time in requests if req_time > window_start]
-        
-        if len(requests) >= rpm_limit:
-            # Find the oldest request in the window
-            oldest_request = min(requests)
-            wait_until = oldest_request + timedelta(minutes=1)
-            return max(0, (wait_until - now).total_seconds())
-        
-        return 0
-
-# Initialize blog rate limiter
-blog_rate_limiter = BlogRateLimiter()
+# Shared with scraper.py so both draw from the same Gemini budget
+blog_rate_limiter = get_rate_limiter()
 
 # WordPress credentials from environment variables
 username = os.getenv('WORDPRESS_USERNAME')
@@ -153,6 +60,9 @@ cred_token = base64.b64encode(credentials.encode())
 url = f'{wordpress_url}/wp-json/wp/v2/posts'
 header = {'Authorization': 'Basic ' + cred_token.decode('utf-8')}
 
+# Keep-alive sessions per host (WordPress, Unsplash) with timeouts and retries
+http = get_http_client()
+
 # Configure Gemini AI
 gemini_api_key = os.getenv('GEMINI_API_KEY')
 if not gemini_api_key:
@@ -171,6 +81,19 @@ MODELS = {
 current_model_name = 'primary'
 model = genai.GenerativeModel(MODELS[current_model_name])
 
+# structured: one JSON request for title, body and keywords; legacy: separate requests
+BLOG_GENERATION_MODE = os.getenv('BLOG_GENERATION_MODE', 'structured').lower()
+
+# Featured image search: every candidate query is sent at once and the best-scoring
+# result wins; whatever has not answered by the deadline is left out
+IMAGE_SEARCH_DEADLINE = float(os.getenv('IMAGE_SEARCH_DEADLINE', '6'))  # seconds
+IMAGE_SEARCH_CANDIDATES = int(os.getenv('IMAGE_SEARCH_CANDIDATES', '5'))  # results per query
+IMAGE_SEARCH_WORKERS = 6  # Unsplash queries in flight across all articles
+# Image selection runs alongside the text rewrite (see prepare_article); searches get
+# their own pool so a selection never waits on a slot held by another selection
+image_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='image')
+image_search_executor = ThreadPoolExecutor(max_workers=IMAGE_SEARCH_WORKERS, thread_name_prefix='image-search')
+
 def switch_model():
     """Switch between models in a priority order"""
     global current_model_name, model
@@ -199,31 +122,6 @@ def get_model_type():
     """Get the current model type for rate limiting"""
     return current_model_name  # Return the actual model name for proper rate limiting
 
-def wait_for_rate_limit(model_type='primary'):
-    """Wait if necessary to respect rate limits"""
-    # First check if we should sleep for an hour due to all models being rate limited
-    if blog_rate_limiter.should_sleep_for_hour():
-        remaining_time = 3600 - (datetime.now() - blog_rate_limiter.all_models_rate_limited_time).total_seconds()
-        print(f"[⏰] All models still rate limited. Sleeping for {remaining_time:.0f} more seconds...")
-        time.sleep(remaining_time)
-        blog_rate_limiter.reset_rate_limit_tracking()
-        return True
-    
-    # Check if all models are currently rate limited
-    if blog_rate_limiter.are_all_models_rate_limited():
-        blog_rate_limiter.mark_all_models_rate_limited()
-        print("[😴] Sleeping for 1 hour due to all models being rate limited...")
-        time.sleep(3600)  # Sleep for 1 hour
-        blog_rate_limiter.reset_rate_limit_tracking()
-        return True
-    
-    # Normal rate limit waiting for specific model
-    wait_time = blog_rate_limiter.get_wait_time(model_type)
-    if wait_time > 0:
-        print(f"[⏳] Rate limit reached for {model_type} model. Waiting {wait_time:.1f} seconds...")
-        time.sleep(wait_time)
-    return True
-
 def is_rate_limit_error(error):
     """Check if the error is a rate limiting error"""
     error_str = str(error).lower()
@@ -239,20 +137,34 @@ def is_rate_limit_error(error):
     ]
     return any(indicator in error_str for indicator in rate_limit_indicators)
 
-def generate_content_with_retry(prompt, max_retries=3):
-    """Generate content with retry logic and model switching"""
+def generate_on_available_model(prompt, kind, generation_config=None, use_cache=True):
+    """generate_content on the current model, moving past models whose own budget is spent"""
+    for _ in range(len(MODELS)):
+        try:
+            return generate_content(model, get_model_type(), prompt, kind, generation_config=generation_config,
+                                    use_cache=use_cache)
+        except ModelOverBudget as e:
+            print(f"[⏳] {e}, switching model...")
+            switch_model()
+    raise blog_rate_limiter.mark_quota_exhausted(reason='no model has budget left')
+
+def reject_cached_response(prompt, generation_config=None):
+    """Drop a response that failed validation from the LLM cache so later runs do not reuse it"""
+    discard_cached_response(MODELS.values(), prompt, generation_config)
+
+def generate_content_with_retry(prompt, max_retries=3, kind='content', generation_config=None, use_cache=True):
+    """
+    Generate content with retry logic and model switching.
+    Callers retrying after rejecting a response pass use_cache=False so it is fetched again.
+    """
     global current_model_name, model
     
     for attempt in range(max_retries):
         try:
-            # Wait for rate limit before making request
+            # Cached, or rate limited and recorded, inside generate_content
+            response = generate_on_available_model(prompt, kind, generation_config=generation_config,
+                                                   use_cache=use_cache and attempt == 0)
             model_type = get_model_type()
-            wait_for_rate_limit(model_type)
-            
-            # Record the request for rate limiting
-            blog_rate_limiter.record_request(model_type)
-            
-            response = model.generate_content(prompt)
             content = response.text.strip()
             
             if content:
@@ -262,10 +174,15 @@ def generate_content_with_retry(prompt, max_retries=3):
                 print(f"[❌] Empty response from {model_type} model, retrying...")
                 continue
             
+        except QuotaExhausted:
+            raise
         except Exception as e:
             print(f"[🔥 Error] Attempt {attempt + 1}/{max_retries} failed: {e}")
             
             if is_rate_limit_error(e):
+                if attempt == max_retries - 1:
+                    # Every model kept refusing; park the work instead of sleeping
+                    raise blog_rate_limiter.mark_quota_exhausted(reason=str(e))
                 print(f"[⏳] Rate limit detected, switching model...")
                 switch_model()
                 # Add a longer delay for rate limit errors
@@ -286,28 +203,45 @@ def generate_content_with_retry(prompt, max_retries=3):
     return None
 
 def get_categories():
-    """Fetch all categories from WordPress, handling pagination."""
+    """Fetch all categories from WordPress, handling pagination. Returns None if any page fails."""
     categories = []
     page = 1
     while True:
         categories_url = f'{wordpress_url}/wp-json/wp/v2/categories?per_page=100&page={page}'
         try:
-            response = requests.get(categories_url, headers=header)
-            if response.status_code == 200:
-                page_data = response.json()
-                if not page_data:
-                    break
-                categories.extend(page_data)
-                page += 1
-            else:
-                print(f"❌ Error fetching categories: {response.status_code}")
+            response = http.get(categories_url, headers=header)
+            if response.status_code != 200:
+                print(f"❌ Error fetching categories page {page}: {response.status_code}")
+                return None
+            page_data = response.json()
+            if not page_data:
                 break
+            categories.extend(page_data)
+            # WordPress answers 400 past the last page, so stop on the last one
+            total_pages = int(response.headers.get('X-WP-TotalPages') or 0)
+            if len(page_data) < 100 or (total_pages and page >= total_pages):
+                break
+            page += 1
         except Exception as e:
-            print(f"❌ Exception while fetching categories: {e}")
-            break
+            print(f"❌ Exception while fetching categories page {page}: {e}")
+            return None
 
     return categories
 
+# Lower-cased name -> id, refreshed on a TTL instead of paging through categories per post
+category_index = CategoryIndex(get_categories)
+
+def warm_category_index():
+    category_index.warm()
+
+def get_category_index_stats():
+    return category_index.stats()
+
+# Posts from the scraper pipeline go out in /batch/v1 requests (see publish_queue.py)
+publish_queue = PublishQueue(url, f'{wordpress_url}/wp-json/batch/v1', header)
+
+def get_publish_stats():
+    return publish_queue.stats()
 
 def get_category_id_by_name(category_names):
     """Get category IDs by names (accepts single name or list of names)"""
@@ -315,32 +249,23 @@ def get_category_id_by_name(category_names):
     if isinstance(category_names, str):
         category_names = [category_names]
     
-    categories = get_categories()
-    matching_ids = []
-    not_found_names = []
-    
-    for category_name in category_names:
-        found = False
-        for category in categories:
-            if category['name'].lower() == category_name.lower():
-                matching_ids.append(category['id'])
-                found = True
-                break
-        
-        if not found:
-            not_found_names.append(category_name)
+    matching_ids, not_found_names = category_index.lookup(category_names)
     
     # If any categories not found, print available categories
     if not_found_names:
         print(f"❌ Categories not found: {', '.join(not_found_names)}")
         print("Available categories:")
-        for category in categories:
-            print(f"  - {category['name']} (ID: {category['id']})")
+        for name, category_id in category_index.categories():
+            print(f"  - {name} (ID: {category_id})")
     
     return matching_ids
 
 def create_category_if_not_exists(category_name):
     """Create a new category if it doesn't exist"""
+    existing_ids, _ = category_index.lookup([category_name])
+    if existing_ids:
+        return existing_ids[0]
+
     categories_url = f'{wordpress_url}/wp-json/wp/v2/categories'
     category_data = {
         'name': category_name,
@@ -348,65 +273,21 @@ def create_category_if_not_exists(category_name):
     }
     
     try:
-        response = requests.post(categories_url, headers=header, json=category_data)
+        response = http.post(categories_url, headers=header, json=category_data)
         if response.status_code == 201:
             print(f"✅ Created new category: {category_name}")
-            return response.json()['id']
+            category_id = response.json()['id']
+            category_index.add(category_name, category_id)
+            return category_id
         else:
             print(f"❌ Error creating category: {response.status_code}")
+            # WordPress answers 400 term_exists when another process created it first
+            category_index.invalidate()
             return None
     except Exception as e:
         print(f"❌ Error creating category: {e}")
         return None
 
-def is_similar(a, b, threshold=0.85):
-    return SequenceMatcher(None, a, b).ratio() > threshold
-
-def remove_near_duplicates(paragraphs, threshold=0.85):
-    unique_paragraphs = []
-    for para in paragraphs:
-        if not any(is_similar(para, up, threshold) for up in unique_paragraphs):
-            unique_paragraphs.append(para)
-    return unique_paragraphs
-
-def is_english_content(text):
-    """Check if the content is primarily in English"""
-    import re
-    
-    # Common English words and patterns
-    english_patterns = [
-        r'\b(the|and|or|but|in|on|at|to|for|of|with|by|from|up|about|into|through|during|before|after|above|below|between|among|within|without|against|toward|towards|upon|across|behind|beneath|beside|beyond|inside|outside|under|over|throughout|underneath|along|around|down|off|out|past|since|until|upon|via|per|except|like|unlike|as|than|despite|according|regarding|concerning|including|excluding|following|preceding|during|while|when|where|why|how|what|which|who|whom|whose|this|that|these|those|i|you|he|she|it|we|they|me|him|her|us|them|my|your|his|her|its|our|their|mine|yours|his|hers|ours|theirs|myself|yourself|himself|herself|itself|ourselves|yourselves|themselves|am|is|are|was|were|be|been|being|have|has|had|do|does|did|will|would|could|should|may|might|must|can|shall|ought|need|dare|used|going|gonna|wanna|gotta|lemme|gimme|wanna|gotta|lemme|gimme|wanna|gotta|lemme|gimme)\b',
-        r'\b(a|an|and|are|as|at|be|by|for|from|has|he|in|is|it|its|may|not|of|on|or|that|the|to|was|will|with|the|and|for|are|but|not|you|all|any|can|had|her|was|one|our|out|day|get|has|him|his|how|man|new|now|old|see|two|way|who|boy|did|its|let|put|say|she|too|use)\b'
-    ]
-    
-    # Count English words
-    english_word_count = 0
-    total_word_count = 0
-    
-    # Split text into words
-    words = re.findall(r'\b\w+\b', text.lower())
-    total_word_count = len(words)
-    
-    if total_word_count == 0:
-        return True  # Assume English if no words found
-    
-    # Check for English patterns
-    for pattern in english_patterns:
-        english_word_count += len(re.findall(pattern, text.lower()))
-    
-    # Calculate percentage of English words
-    english_percentage = english_word_count / total_word_count if total_word_count > 0 else 0
-    
-    # Also check for common non-English characters
-    non_english_chars = re.findall(r'[àáâãäåæçèéêëìíîïðñòóôõöøùúûüýþÿāăąćĉċčďđēĕėęěĝğġģĥħĩīĭįıĳĵķĸĺļľŀłńņňŉŋōŏőœŕŗřśŝşšſţťŧũūŭůűųŵŷźżž]', text.lower())
-    
-    # If there are many non-English characters, it's likely not English
-    if len(non_english_chars) > len(text) * 0.1:  # More than 10% non-English chars
-        return False
-    
-    # Consider it English if more than 60% of words match English patterns
-    return english_percentage > 0.6
-
 def generate_blog_content(topic):
     """Generate blog content using Gemini AI"""
     
@@ -421,7 +302,6 @@ Structure:
 4. 1-2 conclusion paragraphs
 
 Requirements:
-- If the topic contains text in a language other than English, translate it to English first
 - SEO-optimized content
 - Professional language
 - Specific examples and data
@@ -436,7 +316,7 @@ Content:"""
 
     try:
         # Generate main content using retry logic
-        content = generate_content_with_retry(main_prompt)
+        content = generate_content_with_retry(main_prompt, kind='body')
         
         if not content:
             print("❌ Failed to generate content after all retries")
@@ -462,195 +342,21 @@ Content:"""
         
         return final_content
         
+    except QuotaExhausted:
+        raise
     except Exception as e:
         print(f"Error generating content: {e}")
         return None
 
-def rewrite_title_with_ai(original_title, topic):
-    """Rewrite the title using AI to make it more engaging and SEO-friendly, ensuring complete sentences and proper meaning."""
-    import re
-    
-    MAX_TITLE_LENGTH = 80  # Increased from 60 to allow for more complete sentences
-    
-    def is_bad_title(title):
-        # Check if title contains non-English characters (common in other languages)
-        non_english_chars = re.findall(r'[^\x00-\x7F\u00A0-\u00FF\u0100-\u017F\u0180-\u024F\u1E00-\u1EFF\u2C60-\u2C7F\uA720-\uA7FF]', title)
-        if non_english_chars:
-            print(f"[⚠️] Title contains non-English characters: {non_english_chars}")
-            return True
-            
-        # Patterns to avoid (case-insensitive)
-        bad_patterns = [
-            r"here are a few options",
-            r"prioritizing seo",
-            r"engagement",
-            r"keeping (in mind|the african tech context)",
-            r"character[s]?",
-            r"option[s]?",
-            r"context",
-            r"limit[s]?",
-            r"list",
-            r"seo",
-            r"african tech context",
-            r"\d+ character[s]?",
-            r"\d+ option[s]?",
-            r"\d+ character[s]?",
-            r"\d+ word[s]?",
-            r"\d+ headline[s]?",
-            r"headline[s]?",
-            r"title[s]?",
-            r"meta",
-            r"instruction[s]?",
-            r"suggestion[s]?",
-            r"example[s]?",
-            r"catchy title[s]?",
-            r"engaging title[s]?",
-            r"seo[- ]?friendly",
-            r"african tech context",
-            r"keeping.*context",
-            r"option[s]?",
-            r"option[s]?:",
-            r"option[s]? -",
-            r"option[s]?:",
-            r"option[s]? ",
-            r"option[s]?\d*",
-            r"\d+ option[s]?",
-            r"\d+ character[s]?",
-            r"\d+ headline[s]?",
-            r"\d+ title[s]?",
-            r"\d+ suggestion[s]?",
-            r"\d+ example[s]?",
-            r"\d+ list[s]?",
-            r"list of",
-            r"list:"
-        ]
-        title_lower = title.lower()
-        for pat in bad_patterns:
-            if re.search(pat, title_lower):
-                return True
-        # Avoid titles that are just a list or meta-instructions
-        if any(sep in title_lower for sep in [":", "-", "|", ","]):
-            # If the title is just a list of options, not a real headline
-            if len(title_lower.split()) < 8 and (":" in title_lower or "," in title_lower):
-                return True
-        # Avoid titles that are too generic or not meaningful
-        if len(title_lower) < 10:
-            return True
-        # Avoid titles that are too long
-        if len(title) > MAX_TITLE_LENGTH:
-            return True
-        return False
-
-    def create_intelligent_fallback_title(topic, original_title):
-        """Create a meaningful fallback title when AI generation fails."""
-        # Clean the topic and original title
-        clean_topic = re.sub(r'[^\w\s]', ' ', topic).strip()
-        clean_original = re.sub(r'[^\w\s]', ' ', original_title).strip()
-        
-        # Try to extract meaningful words
-        meaningful_words = []
-        
-        # Add words from topic (prioritize longer, more meaningful words)
-        topic_words = [word for word in clean_topic.split() if len(word) > 3]
-        meaningful_words.extend(topic_words[:4])
-        
-        # Add words from original title if different from topic
-        if clean_original.lower() != clean_topic.lower():
-            original_words = [word for word in clean_original.split() if len(word) > 3]
-            meaningful_words.extend(original_words[:3])
-        
-        # Remove duplicates while preserving order
-        seen = set()
-        unique_words = []
-        for word in meaningful_words:
-            if word.lower() not in seen:
-                seen.add(word.lower())
-                unique_words.append(word)
-        
-        # Create a meaningful title
-        if len(unique_words) >= 3:
-            # Try to create a complete sentence
-            base_title = ' '.join(unique_words[:6])
-            
-            # Add context words to make it more meaningful
-            context_words = ['Technology', 'Innovation', 'Development', 'News', 'Update', 'Trend']
-            
-            # Check if the title already has a context word
-            has_context = any(word.lower() in base_title.lower() for word in context_words)
-            
-            if not has_context and len(base_title) < 40:
-                # Add a context word to make it more meaningful
-                base_title = f"{context_words[0]} {base_title}"
-            
-            return base_title
-        else:
-            # Fallback to a generic but meaningful title
-            return "Latest Technology News and Updates"
-
-    def ensure_complete_sentence(title):
-        """Ensure the title forms a complete sentence or meaningful phrase."""
-        # Remove trailing punctuation that might indicate incomplete sentences
-        title = re.sub(r'[,\s]+$', '', title)
-        
-        # If title ends with incomplete words (like "tech" instead of "technology"), try to complete them
-        common_incomplete_endings = {
-            'tech': 'technology',
-            'dev': 'development',
-            'innov': 'innovation',
-            'start': 'startup',
-            'fin': 'finance',
-            'crypt': 'cryptocurrency',
-            'block': 'blockchain',
-            'artif': 'artificial',
-            'intell': 'intelligence',
-            'mach': 'machine',
-            'learn': 'learning',
-            'data': 'data',
-            'cloud': 'cloud',
-            'cyber': 'cybersecurity',
-            'digit': 'digital',
-            'mob': 'mobile',
-            'web': 'web',
-            'app': 'application',
-            'soft': 'software',
-            'hard': 'hardware'
-        }
-        
-        words = title.split()
-        if words:
-            last_word = words[-1].lower()
-            for incomplete, complete in common_incomplete_endings.items():
-                if last_word.startswith(incomplete) and len(last_word) <= len(incomplete) + 2:
-                    words[-1] = complete
-                    title = ' '.join(words)
-                    break
-        
-        return title
-
-    # Detect if the original title or topic is in a non-English language
-    def detect_language(text):
-        """Simple language detection for common non-English patterns."""
-        # Common non-English character patterns
-        chinese_chars = re.findall(r'[\u4e00-\u9fff]', text)
-        arabic_chars = re.findall(r'[\u0600-\u06ff]', text)
-        cyrillic_chars = re.findall(r'[\u0400-\u04ff]', text)
-        hindi_chars = re.findall(r'[\u0900-\u097f]', text)
-        
-        if chinese_chars:
-            return "Chinese"
-        elif arabic_chars:
-            return "Arabic"
-        elif cyrillic_chars:
-            return "Cyrillic"
-        elif hindi_chars:
-            return "Hindi"
-        else:
-            return "English"
-
-    detected_lang = detect_language(original_title + " " + topic)
+def rewrite_title_with_ai(original_title, topic, language=None):
+    """
+    Rewrite the title using AI to make it more engaging and SEO-friendly, ensuring complete sentences and proper meaning.
+    language is the article body's LanguageResult; titles are too short to identify on their own.
+    """
+    translate_note = translation_instruction(language, 'original title')
     
-    if detected_lang != "English":
-        print(f"[🌐] Detected {detected_lang} language, will translate to English")
+    if translate_note:
+        print(f"[🌐] Detected {language_name(language.code)} article ({language.confidence:.0%}), will translate the title to English")
 
     title_prompt = f"""
 Create an engaging and SEO-friendly title for this article (under {MAX_TITLE_LENGTH} characters):
@@ -660,8 +366,7 @@ Topic: {topic}
 
 IMPORTANT REQUIREMENTS:
 - ALWAYS output the title in English only
-- If the original is not in English, translate the meaning to English first
-- The title must be a complete sentence or meaningful phrase
+{translate_note}- The title must be a complete sentence or meaningful phrase
 - Catchy and click-worthy
 - Under {MAX_TITLE_LENGTH} characters
 - Use action words and be specific
@@ -678,49 +383,19 @@ Title:"""
     try:
         max_attempts = 3
         for attempt in range(max_attempts):
-            new_title = generate_content_with_retry(title_prompt)
+            new_title = generate_content_with_retry(title_prompt, kind='title', use_cache=attempt == 0)
             if not new_title:
                 print("❌ Failed to rewrite title after all retries")
                 return create_intelligent_fallback_title(topic, original_title)
             
-            # Clean up any remaining markdown or special characters
-            new_title = re.sub(r'[#*`]', '', new_title)
-            new_title = re.sub(r'\s+', ' ', new_title)
-            new_title = new_title.strip()
-            
-            # Remove any meta-instructions or explanations from the title
-            meta_patterns = [
-                r"^title:\s*",
-                r"^new title:\s*",
-                r"^here's.*:",
-                r"^here is.*:",
-                r"^rewritten.*:",
-                r"^seo.*:",
-                r"^engaging.*:",
-                r"^catchy.*:"
-            ]
-            for pattern in meta_patterns:
-                new_title = re.sub(pattern, '', new_title, flags=re.IGNORECASE)
-            new_title = new_title.strip()
-            
-            # Ensure complete sentence
-            new_title = ensure_complete_sentence(new_title)
-            
-            # Truncate if slightly over length (as a last resort)
-            if len(new_title) > MAX_TITLE_LENGTH:
-                # Try to cut at the last space before the limit
-                cut = new_title[:MAX_TITLE_LENGTH].rstrip()
-                if ' ' in cut:
-                    cut = cut[:cut.rfind(' ')].rstrip()
-                new_title = cut
-                # Ensure it's still a complete sentence
-                new_title = ensure_complete_sentence(new_title)
+            new_title = clean_generated_title(new_title)
             
             # Check for bad patterns or length
             if not is_bad_title(new_title):
                 break
             else:
                 print(f"[⚠️] AI generated a bad or lengthy title, retrying... Attempt {attempt+1}")
+                reject_cached_response(title_prompt)
                 new_title = None
         
         # Fallback if AI fails or all attempts are bad
@@ -729,154 +404,45 @@ Title:"""
         
         return new_title
         
+    except QuotaExhausted:
+        raise
     except Exception as e:
         print(f"Error rewriting title: {e}")
         return create_intelligent_fallback_title(topic, original_title)
 
-def clean_content(content, topic):
-    """Clean and format the content, removing repetition, ellipsis, improper headings, near-duplicates, and markdown formatting."""
-    import re
-    # Remove HTML tags and markdown
-    content = re.sub(r'<[^>]+>', '', content)
-    content = re.sub(r'```[a-zA-Z]*\n', '', content)
-    content = re.sub(r'```\n', '', content)
-    content = re.sub(r'```', '', content)
-    
-    # Remove markdown formatting BUT PRESERVE ## headings
-    # content = re.sub(r'#{1,6}\s*', '', content)  # REMOVED - Don't remove ## headings!
-    content = re.sub(r'\*\*(.*?)\*\*', r'\1', content)  # Remove **bold**
-    content = re.sub(r'\*(.*?)\*', r'\1', content)  # Remove *italic*
-    content = re.sub(r'`(.*?)`', r'\1', content)  # Remove `code`
-    content = re.sub(r'~~(.*?)~~', r'\1', content)  # Remove ~~strikethrough~~
-    content = re.sub(r'\[(.*?)\]\(.*?\)', r'\1', content)  # Remove [link](url) -> link
-    content = re.sub(r'\[(.*?)\]', r'\1', content)  # Remove [text] -> text
-    
-    # Remove ellipsis and bracketed content
-    content = re.sub(r'\[.*?\]', '', content)
-    content = re.sub(r'\.{2,}', '.', content)
-    
-    # Split into paragraphs and clean
-    paragraphs = [p.strip() for p in content.split('\n') if p.strip()]
-    cleaned = []
-    for para in paragraphs:
-        # Remove lines that start with 'Introduction' (unless it's a heading)
-        if para.lower().startswith('introduction') and not (para.startswith('##') or para.startswith('<h2>')):
-            continue
-        # Remove lines with only 'Introduction'
-        if para.strip().lower() == 'introduction':
-            continue
-        # Remove meta-instructions and explanations
-        meta_patterns = [
-            r"here's a rewritten",
-            r"here is a rewritten",
-            r"seo-optimized version",
-            r"tailored for.*context",
-            r"adhering to.*specifications",
-            r"comprehensive blog post about",
-            r"original content:",
-            r"structure:",
-            r"requirements:",
-            r"content:",
-            r"meta-instructions",
-            r"meta-commentary"
-        ]
-        para_lower = para.lower()
-        if any(re.search(pattern, para_lower) for pattern in meta_patterns):
-            continue
-        # Remove ellipsis or incomplete lines
-        if '[...]' in para or para.endswith('...') or para.endswith('..'):
-            continue
-        # Remove lines with just dots
-        if re.match(r'^\.+$', para):
-            continue
-        # Remove lines that are just markdown formatting (but keep ## headings)
-        if re.match(r'^[*`\s]+$', para) and not para.startswith('##'):
-            continue
-        cleaned.append(para)
-    
-    # Remove near-duplicate paragraphs
-    unique_paragraphs = remove_near_duplicates(cleaned, threshold=0.85)
-    return '\n'.join(unique_paragraphs)
-
-def convert_to_html(content):
-    """Convert plain text content to proper HTML format for WordPress with better heading detection"""
-    import re
-    
-    lines = content.split('\n')
-    html_lines = []
-    
-    for line in lines:
-        line = line.strip()
-        if not line:
-            continue
-        
-        # Detect ## headings BEFORE removing markdown
-        if line.startswith('##'):
-            heading = line[2:].strip()
-            html_lines.append(f'<h2>{heading}</h2>')
-            continue
-        # Detect subheadings (not used by AI, but keep for future)
-        if line.startswith('###'):
-            heading = line[3:].strip()
-            html_lines.append(f'<h3>{heading}</h3>')
-            continue
-        
-        # Now clean any remaining markdown
-        line = re.sub(r'#{1,6}\s*', '', line)  # Remove # headings (shouldn't be needed now)
-        line = re.sub(r'\*\*(.*?)\*\*', r'\1', line)  # Remove **bold**
-        line = re.sub(r'\*(.*?)\*', r'\1', line)  # Remove *italic*
-        line = re.sub(r'`(.*?)`', r'\1', line)  # Remove `code`
-        
-        # Regular paragraph - only if it's substantial content
-        if line and len(line) > 20:
-            html_lines.append(f'<p>{line}</p>')
-    
-    return '\n'.join(html_lines)
-
-def generate_keywords(topic):
-    """Generate relevant keywords for the topic"""
+def generate_keywords(topic, language=None):
+    """Generate relevant keywords for the topic; language is the article body's LanguageResult, if any"""
+    translate_note = translation_instruction(language, 'topic')
     keyword_prompt = f"""
 Generate 8-10 SEO keywords for '{topic}'.
 Return only keywords separated by commas.
 
 Requirements:
-- If the topic contains text in a language other than English, translate it to English first
-- Generate keywords in English only
+{translate_note}- Generate keywords in English only
 - Focus on relevant, searchable terms related to the topic
 
 Keywords:"""
 
     try:
-        keywords = generate_content_with_retry(keyword_prompt)
+        keywords = generate_content_with_retry(keyword_prompt, kind='keywords')
         
         if not keywords:
             print("❌ Failed to generate keywords after all retries")
             # Generate fallback keywords based on topic
-            topic_words = topic.lower().split()
-            fallback_keywords = topic_words + ['technology', 'innovation', 'digital', 'transformation', 'future', 'trends', 'industry', 'development']
-            keywords = ', '.join(fallback_keywords[:10])
-            return keywords
+            return fallback_keywords(topic)
         
-        # Clean keywords
-        keywords = keywords.replace('\n', ', ')
-        keywords = re.sub(r'[^\w\s,]', '', keywords)  # Remove special characters except commas
-        keywords = ', '.join([k.strip() for k in keywords.split(',') if k.strip()])
-        
-        # Fallback if no keywords generated
-        if not keywords or len(keywords) < 10:
-            # Generate fallback keywords based on topic
-            topic_words = topic.lower().split()
-            fallback_keywords = topic_words + ['technology', 'innovation', 'digital', 'transformation', 'future', 'trends', 'industry', 'development']
-            keywords = ', '.join(fallback_keywords[:10])
-        
-        return keywords
+        # Clean keywords, falling back if none survive
+        cleaned = clean_keywords(keywords)
+        if not cleaned:
+            reject_cached_response(keyword_prompt)
+        return cleaned or fallback_keywords(topic)
         
+    except QuotaExhausted:
+        raise
     except Exception as e:
         print(f"Error generating keywords: {e}")
         # Fallback keywords
-        topic_words = topic.lower().split()
-        fallback_keywords = topic_words + ['technology', 'innovation', 'digital', 'transformation', 'future', 'trends', 'industry', 'development']
-        return ', '.join(fallback_keywords[:10])
+        return fallback_keywords(topic)
 
 def generate_excerpt(content, max_length=160):
     """Generate an excerpt from the content"""
@@ -980,8 +546,8 @@ Blog Notifier Bot
         print(f"❌ Error sending email notification: {e}")
         return False
 
-def post_to_wordpress(title, content, category_name="Health", featured_image_id=None):
-    """Post content to WordPress using category name"""
+def build_post_data(title, content, category_name="Health", featured_image_id=None):
+    """The /wp/v2/posts request body, with category names resolved to IDs"""
     # Get category ID by name
     category_id = get_category_id_by_name(category_name)
     
@@ -997,9 +563,14 @@ def post_to_wordpress(title, content, category_name="Health", featured_image_id=
     # Add featured image if provided
     if featured_image_id:
         post_data['featured_media'] = featured_image_id
+    return post_data
+
+def post_to_wordpress(title, content, category_name="Health", featured_image_id=None):
+    """Post content to WordPress using category name"""
+    post_data = build_post_data(title, content, category_name, featured_image_id)
     
     try:
-        response = requests.post(url, headers=header, json=post_data)
+        response = http.post(url, headers=header, json=post_data)
         if response.status_code == 201:
             print(f"✅ Blog post '{title}' published successfully!")
             print(f"Post ID: {response.json().get('id')}")
@@ -1016,85 +587,193 @@ def post_to_wordpress(title, content, category_name="Health", featured_image_id=
         print(f"❌ Error posting to WordPress: {e}")
         return None
 
+def image_search_terms(topic, category):
+    """Unsplash queries in priority order: topic, category, then a generic term"""
+    search_terms = [topic, category]
+    # Add some generic terms for better results
+    if "technology" in category.lower():
+        search_terms.extend(["technology", "digital", "innovation"])
+    elif "health" in category.lower():
+        search_terms.extend(["healthcare", "medical", "wellness"])
+    elif "business" in category.lower():
+        search_terms.extend(["business", "corporate", "professional"])
+    elif "environment" in category.lower():
+        search_terms.extend(["environment", "sustainability", "green"])
+    # One request per normalized query ("Technology" and "technology" are the same search)
+    unique_terms = {}
+    for term in search_terms:
+        unique_terms.setdefault(normalize_query(term), term)
+    return list(unique_terms.values())[:3]  # Limit to first 3 terms
+
+def search_unsplash(search_term):
+    """Landscape candidates for one query as [{'photo_id', 'url', 'width', 'height'}], cached per query"""
+    image_cache = get_image_cache()
+    # Searches are cached per normalized query: the demo key allows 50 an hour
+    cached = image_cache.get_search(search_term) if image_cache else None
+    if cached is not None:
+        return cached
+
+    response = http.get(
+        "https://api.unsplash.com/search/photos",
+        params={'query': search_term, 'per_page': IMAGE_SEARCH_CANDIDATES, 'orientation': 'landscape'},
+        headers={"Authorization": f"Client-ID {unsplash_access_key}"}
+    )
+    if response.status_code != 200:
+        print(f"❌ Unsplash search for '{search_term}' returned {response.status_code}")
+        return []
+    candidates = [
+        {'photo_id': photo.get('id'), 'url': photo['urls']['regular'],
+         'width': photo.get('width') or 0, 'height': photo.get('height') or 0}
+        for photo in response.json().get('results', [])
+    ]
+    if image_cache:
+        image_cache.put_search(search_term, candidates)
+    return candidates
+
+def score_image_candidate(candidate, term_priority, rank):
+    """
+    Relevance of one search result: the query it came from (topic before category before
+    generic) counts most, then Unsplash's own ranking and a wide aspect ratio. The
+    original's width and height only give the aspect: the 'regular' rendition we fetch
+    is about 1080px wide for every photo, so resolution cannot tell candidates apart.
+    """
+    width, height = candidate['width'], candidate['height']
+    aspect = width / height if height else 0
+    if 1.3 <= aspect <= 2.0:
+        orientation = 1.0  # 4:3 to 2:1 fills the featured image slot
+    elif aspect > 1:
+        orientation = 0.6
+    else:
+        orientation = 0.2
+    return 0.5 / (1 + term_priority) + 0.2 / (1 + rank) + 0.3 * orientation
+
 def generate_blog_image(topic, category):
-    """Get a relevant image for the blog post using Unsplash API"""
+    """Get a relevant image for the blog post using Unsplash API: (photo id, image url) or None"""
     if not unsplash_access_key:
         print("❌ Unsplash access key not available")
         return None
     category = category[0]
     try:
-        # Create search query based on topic and category
-        search_terms = [topic, category]
-        # Add some generic terms for better results
-        if "technology" in category.lower():
-            search_terms.extend(["technology", "digital", "innovation"])
-        elif "health" in category.lower():
-            search_terms.extend(["healthcare", "medical", "wellness"])
-        elif "business" in category.lower():
-            search_terms.extend(["business", "corporate", "professional"])
-        elif "environment" in category.lower():
-            search_terms.extend(["environment", "sustainability", "green"])
-        
-        # Try different search terms until we find an image
-        for search_term in search_terms[:3]:  # Limit to first 3 terms
+        # All queries at once, bounded by IMAGE_SEARCH_DEADLINE; a late query still
+        # finishes in the background and fills the search cache for next time
+        search_terms = image_search_terms(topic, category)
+        futures = {image_search_executor.submit(search_unsplash, term): priority
+                   for priority, term in enumerate(search_terms)}
+        done, not_done = wait(futures, timeout=IMAGE_SEARCH_DEADLINE)
+        if not_done:
+            print(f"⏱️ {len(not_done)} image searches missed the {IMAGE_SEARCH_DEADLINE}s deadline")
+
+        best, best_score = None, None
+        for future in done:
+            priority = futures[future]
             try:
-                query = search_term.replace(" ", "+")
-                response = requests.get(
-                    f"https://api.unsplash.com/search/photos?query={query}&per_page=1&orientation=landscape",
-                    headers={"Authorization": f"Client-ID {unsplash_access_key}"}
-                )
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    if data['results']:
-                        img_url = data['results'][0]['urls']['regular']
-                        print(f"✅ Found Unsplash image for: {search_term}")
-                        return img_url
-                        
+                candidates = future.result()
             except Exception as e:
-                print(f"❌ Error searching for '{search_term}': {e}")
+                print(f"❌ Error searching for '{search_terms[priority]}': {e}")
                 continue
-        
-        print("❌ No suitable images found on Unsplash")
-        return None
+            for rank, candidate in enumerate(candidates):
+                score = score_image_candidate(candidate, priority, rank)
+                if best_score is None or score > best_score:
+                    best, best_score = (candidate, search_terms[priority]), score
+
+        if best is None:
+            print("❌ No suitable images found on Unsplash")
+            return None
+        candidate, search_term = best
+        print(f"✅ Found Unsplash image for: {search_term} (score {best_score:.2f})")
+        return candidate['photo_id'], candidate['url']
         
     except Exception as e:
         print(f"❌ Error getting image from Unsplash: {e}")
         return None
 
-def upload_image_to_wordpress(image_url, filename, title):
-    """Upload image to WordPress media library from URL"""
+def start_featured_image_search(topic, category):
+    """Run generate_blog_image in the background; the future resolves to its result"""
+    return image_executor.submit(generate_blog_image, topic, category)
+
+def find_existing_media(photo_id=None, content_hash=None):
+    """
+    (media id, source url) of an earlier upload of the same Unsplash photo or the same
+    image bytes that still exists in WordPress, or None
+    """
+    image_cache = get_image_cache()
+    if not image_cache:
+        return None
+    cached = image_cache.find_media(photo_id=photo_id, content_hash=content_hash)
+    if not cached:
+        return None
+    media_id, source_url = cached
+    try:
+        response = http.get(f'{wordpress_url}/wp-json/wp/v2/media/{media_id}', headers=header,
+                            params={'_fields': 'id,source_url'})
+    except Exception as e:
+        print(f"⚠️ Could not check cached media {media_id}: {e}")
+        return None
+    if response.status_code == 200:
+        image_cache.record_reuse()
+        print(f"♻️ Reusing media {media_id} already in WordPress")
+        return media_id, response.json().get('source_url', source_url)
+    if response.status_code in (404, 410):
+        print(f"🗑️ Cached media {media_id} was deleted from WordPress, uploading again")
+        image_cache.forget_media(media_id)
+    return None
+
+def upload_image_to_wordpress(image_url, filename, title, photo_id=None):
+    """
+    Relay an image from URL into the WordPress media library, streamed in chunks.
+    A photo (Unsplash id) or image (content hash) uploaded before is reused instead.
+    """
     try:
+        existing = find_existing_media(photo_id=photo_id) if photo_id else None
+        if existing:
+            return existing
+
         # Download image from URL
         print(f"📥 Downloading image from: {image_url}")
-        image_response = requests.get(image_url)
-        
-        if image_response.status_code != 200:
-            print(f"❌ Failed to download image: {image_response.status_code}")
-            return None
-        
-        image_bytes = image_response.content
-        
-        # Prepare the upload
-        media_url = f'{wordpress_url}/wp-json/wp/v2/media'
-        
-        # Create multipart form data
-        files = {
-            'file': (filename, image_bytes, 'image/jpeg')
-        }
-        
-        data = {
-            'title': title,
-            'caption': title,
-            'alt_text': title
-        }
-        
-        # Upload the image
-        response = requests.post(media_url, headers=header, files=files, data=data)
-        
+        with http.get(image_url, stream=True) as image_response:
+            if image_response.status_code != 200:
+                print(f"❌ Failed to download image: {image_response.status_code}")
+                return None
+
+            # Streamed straight through, or spooled and downscaled to IMAGE_MAX_WIDTH
+            body, content_type, _ = prepare_image_body(image_response)
+            if body.content_hash:
+                # Same bytes under a different photo id or URL
+                existing = find_existing_media(content_hash=body.content_hash)
+                if existing:
+                    body.close()
+                    if photo_id:
+                        # Next time this photo id is found without downloading it
+                        get_image_cache().put_media(existing[0], existing[1], photo_id=photo_id,
+                                                    content_hash=body.content_hash)
+                    return existing
+            filename = with_extension(safe_filename(filename), content_type)
+
+            # Prepare the upload: raw body plus Content-Disposition, metadata as query args
+            media_url = f'{wordpress_url}/wp-json/wp/v2/media'
+            upload_headers = dict(header)
+            upload_headers['Content-Type'] = content_type
+            upload_headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+            params = {
+                'title': title,
+                'caption': title,
+                'alt_text': title
+            }
+
+            # Upload the image; a one-shot stream cannot be re-sent, so no retries then
+            try:
+                response = http.post(media_url, headers=upload_headers, params=params, data=body,
+                                     retries=None if body.replayable else 0)
+            finally:
+                body.close()
+
         if response.status_code == 201:
             media_info = response.json()
             print(f"✅ Image uploaded successfully: {media_info['source_url']}")
+            image_cache = get_image_cache()
+            if image_cache:
+                image_cache.put_media(media_info['id'], media_info['source_url'],
+                                      photo_id=photo_id, content_hash=body.content_hash)
             return media_info['id'], media_info['source_url']
         else:
             print(f"❌ Error uploading image: {response.status_code}")
@@ -1105,17 +784,25 @@ def upload_image_to_wordpress(image_url, filename, title):
         print(f"❌ Error uploading image to WordPress: {e}")
         return None
 
-def add_images_to_content(content, topic, category):
-    """Finds and uploads a single Unsplash image and returns its ID, without modifying the content."""
+def add_images_to_content(content, topic, category, image_search=None):
+    """
+    Finds and uploads a single Unsplash image and returns its ID, without modifying the content.
+    image_search is a future from start_featured_image_search when the search already started.
+    """
     try:
         # Get main featured image
-        print("🎨 Getting featured image from Unsplash...")
-        featured_image_url = generate_blog_image(topic, category)
+        if image_search is not None:
+            featured_image = image_search.result()
+        else:
+            print("🎨 Getting featured image from Unsplash...")
+            featured_image = generate_blog_image(topic, category)
         
-        if featured_image_url:
-            # Upload featured image
+        if featured_image:
+            # Upload featured image (or reuse it if this photo was uploaded before)
+            photo_id, featured_image_url = featured_image
             featured_filename = f"featured_{topic.lower().replace(' ', '_')}.jpg"
-            upload_result = upload_image_to_wordpress(featured_image_url, featured_filename, f"Featured image for {topic}")
+            upload_result = upload_image_to_wordpress(featured_image_url, featured_filename, f"Featured image for {topic}",
+                                                      photo_id=photo_id)
             
             if upload_result:
                 featured_image_id, _ = upload_result
@@ -1129,13 +816,20 @@ def add_images_to_content(content, topic, category):
         print(f"❌ Error adding image to content: {e}")
         return content, None
 
-def rewrite_scraped_content(original_content, topic):
-    """Rewrite scraped content using Gemini AI to make it unique and SEO-optimized"""
+def keywords_section_html(keywords):
+    return f"""
+<h3><strong>Keywords</strong></h3>
+<p><strong>Related Keywords:</strong> {keywords}</p>
+"""
+
+def rewrite_scraped_body(original_content, topic, language=None):
+    """Rewrite scraped content into an HTML body (without the keywords section)"""
+    translate_note = translation_instruction(language or identify_language(original_content), 'original content')
     
     rewrite_prompt = f"""
 Write a comprehensive blog post about '{topic}' (300-400 words).
 
-Original content: {original_content[:1000]}  # Limit to save tokens
+Original content: {trim_to_token_budget(original_content, REWRITE_CONTENT_TOKENS)}
 
 Structure:
 1. Main heading (## format)
@@ -1144,8 +838,7 @@ Structure:
 4. 1 conclusion paragraph
 
 Requirements:
-- If the original content is in a language other than English, translate it to English first
-- Completely rewrite in your own words while maintaining the original context and key information
+{translate_note}- Completely rewrite in your own words while maintaining the original context and key information
 - Preserve all important facts, data, quotes, and technical details from the original article
 - Do not add information that wasn't in the original content
 - Do not remove critical information from the original article
@@ -1159,111 +852,213 @@ Requirements:
 
 Content:"""
 
+    # Generate rewritten content using retry logic
+    content = generate_content_with_retry(rewrite_prompt, kind='body')
+    
+    if not content:
+        print("❌ Failed to rewrite content after all retries")
+        return None
+
+    return finalize_rewritten_body(content, topic)
+
+def rewrite_scraped_content(original_content, topic, language=None):
+    """Rewrite scraped content using Gemini AI to make it unique and SEO-optimized"""
+    language = language or identify_language(original_content)
     try:
-        # Generate rewritten content using retry logic
-        content = generate_content_with_retry(rewrite_prompt)
-        
+        content = rewrite_scraped_body(original_content, topic, language)
         if not content:
-            print("❌ Failed to rewrite content after all retries")
             return None
         
-        # Clean the content thoroughly
-        content = clean_content(content, topic)
-
-        # Additional cleaning to remove any remaining meta-instructions
-        content_lines = content.split('\n')
-        cleaned_lines = []
-        for line in content_lines:
-            line_lower = line.lower()
-            # Skip lines that contain meta-instructions
-            if any(phrase in line_lower for phrase in [
-                "here's a rewritten",
-                "here is a rewritten", 
-                "seo-optimized version",
-                "tailored for",
-                "adhering to",
-                "comprehensive blog post",
-                "original content:",
-                "structure:",
-                "requirements:",
-                "content:",
-                "meta-instructions",
-                "meta-commentary"
-            ]):
-                continue
-            cleaned_lines.append(line)
-        content = '\n'.join(cleaned_lines)
-
-        # Convert to proper HTML format for WordPress
-        content = convert_to_html(content)
-        
         # Generate keywords separately
-        keywords = generate_keywords(topic)
-        
-        # Add keywords section with proper formatting
-        keywords_section = f"""
-<h3><strong>Keywords</strong></h3>
-<p><strong>Related Keywords:</strong> {keywords}</p>
-"""
+        keywords = generate_keywords(topic, language)
         
         # Combine content with keywords
-        final_content = f"{content}\n{keywords_section}"
-        
-        return final_content
+        return f"{content}\n{keywords_section_html(keywords)}"
         
+    except QuotaExhausted:
+        raise
     except Exception as e:
         print(f"Error rewriting content: {e}")
         return None
 
-def process_scraped_articles(topic,content,url,title,category_received,uploaded_urls):
-    """Process scraped articles from scraper.py and post to WordPress"""
-    
+def generate_article_package(original_content, topic, original_title, language=None):
+    """
+    Ask for title, body and keywords in one JSON response, validate each field with the
+    usual title/content rules and only make follow-up calls for the fields that fail.
+    Returns {'title': ..., 'content': ...} or None if no usable body could be produced.
+    """
+    language = language or identify_language(original_content)
+    translate_note = translation_instruction(language, 'original article')
+    package_prompt = f"""
+Rewrite this article as a blog post and return it as a single JSON object.
+
+Original title: {original_title}
+Topic: {topic}
+Original content: {trim_to_token_budget(original_content, REWRITE_CONTENT_TOKENS)}
+
+Return exactly this JSON structure:
+{{
+  "title": "engaging, SEO-friendly English headline under {MAX_TITLE_LENGTH} characters",
+  "body_sections": [
+    {{"heading": "main heading", "paragraphs": ["introduction paragraph"]}},
+    {{"heading": "section heading", "paragraphs": ["section paragraph"]}},
+    {{"heading": "", "paragraphs": ["conclusion paragraph"]}}
+  ],
+  "keywords": ["8-10 SEO keywords"]
+}}
+
+Requirements:
+- Everything in English
+{translate_note}- 300-400 words across all paragraphs
+- Completely rewrite in your own words while keeping all important facts, data, quotes and technical details
+- Do not add information that wasn't in the original content
+- The title must be a complete, meaningful headline with no hashtags, lists or meta-commentary
+- Plain text only inside the JSON strings: no markdown, no HTML
+- Focus on African tech context when relevant
+- Do NOT include meta-commentary such as "Here's a rewritten version"
+
+JSON:"""
+
+    data = {}
+    package_config = {'response_mime_type': 'application/json'}
+    raw = generate_content_with_retry(package_prompt, kind='structured', generation_config=package_config)
+    if raw:
+        try:
+            raw = re.sub(r'^```(?:json)?\s*|\s*```$', '', raw.strip())
+            data = json.loads(raw)
+            if not isinstance(data, dict):
+                data = {}
+        except (json.JSONDecodeError, ValueError) as e:
+            print(f"[⚠️] Structured response was not valid JSON: {e}")
+            data = {}
+
+    # Title: same cleanup and rules as rewrite_title_with_ai
+    new_title = data.get('title')
+    if isinstance(new_title, str) and new_title.strip():
+        new_title = clean_generated_title(new_title)
+    if not isinstance(new_title, str) or len(new_title) < 10 or is_bad_title(new_title):
+        print("[⚠️] Structured title failed validation, requesting a title only...")
+        reject_cached_response(package_prompt, package_config)
+        new_title = rewrite_title_with_ai(original_title, topic, language)
+
+    # Body: rebuild "## heading" + paragraphs and run it through clean_content
+    body_lines = []
+    for section in data.get('body_sections') or []:
+        if not isinstance(section, dict):
+            continue
+        heading = str(section.get('heading') or '').strip()
+        if heading:
+            body_lines.append(f"## {heading}")
+        paragraphs = section.get('paragraphs') or []
+        if isinstance(paragraphs, str):
+            paragraphs = [paragraphs]
+        body_lines.extend(str(p).strip() for p in paragraphs if str(p).strip())
+    content = finalize_rewritten_body('\n'.join(body_lines), topic) if body_lines else ''
+    if not is_valid_body(content):
+        print("[⚠️] Structured body failed validation, requesting the body only...")
+        reject_cached_response(package_prompt, package_config)
+        content = rewrite_scraped_body(original_content, topic, language)
+        if not content:
+            return None
+
+    # Keywords: same cleanup as generate_keywords
+    keywords = clean_keywords(data.get('keywords') or '')
+    if not keywords:
+        print("[⚠️] Structured keywords failed validation, requesting keywords only...")
+        reject_cached_response(package_prompt, package_config)
+        keywords = generate_keywords(topic, language)
+
+    return {'title': new_title, 'content': f"{content}\n{keywords_section_html(keywords)}"}
+
+def prepare_article(topic, content, url, title, category_received):
+    """Run the LLM steps for one scraped article; returns everything publish_article needs, or None"""
     original_topic = topic
     original_content = content
-    url = url
     original_title = title
-    
+
     print(f"📝 Processing article: {original_topic}")
     print(f"🔗 Source: {url}")
     
     # Check if content needs translation
-    if not is_english_content(original_content):
-        print("🌐 Detected non-English content, will translate during processing...")
+    language = identify_language(original_content)
+    if translation_instruction(language, 'original content'):
+        print(f"🌐 Detected {language_name(language.code)} content ({language.confidence:.0%}), will translate during processing...")
+        # The original title is no use as an Unsplash query; search with the rewritten one later
+        image_search = None
+    else:
+        # Independent of the rewrite, so the image search runs behind the LLM calls
+        print("🎨 Getting featured image from Unsplash...")
+        image_search = start_featured_image_search(original_topic, category_received)
     
-    # Rewrite title with AI
-    print("✏️ Rewriting title...")
-    new_title = rewrite_title_with_ai(original_title, original_topic)
-    print(f"📋 New title: {new_title}")
+    if BLOG_GENERATION_MODE == 'structured':
+        # Title, body and keywords in one request, follow-ups only for invalid fields
+        print("✏️ Rewriting title, content and keywords...")
+        package = generate_article_package(original_content, original_topic, original_title, language)
+        new_title = package['title'] if package else original_title
+        rewritten_content = package['content'] if package else None
+        print(f"📋 New title: {new_title}")
+    else:
+        # Rewrite title with AI
+        print("✏️ Rewriting title...")
+        new_title = rewrite_title_with_ai(original_title, original_topic, language)
+        print(f"📋 New title: {new_title}")
+        
+        # Rewrite content using Gemini
+        print("🔄 Rewriting content...")
+        rewritten_content = rewrite_scraped_content(original_content, original_topic, language)
     
-    # Determine category based on topic content
-    category = category_received
+    if not rewritten_content:
+        print(f"❌ Failed to rewrite content for: {new_title}\n")
+        return None
+
+    return {
+        'url': url,
+        'original_topic': original_topic,
+        'title': new_title,
+        'content': rewritten_content,
+        'category': category_received,
+        'image_search': image_search
+    }
+
+def publish_article(prepared, uploaded_urls, publish_queue=None):
+    """
+    Attach a featured image, post to WordPress and record the blog URL. With a
+    publish_queue the post goes out with its batch and the URL row is updated then.
+    """
+    new_title = prepared['title']
+    category = prepared['category']
     print(f"📂 Category: {category}")
+
+    # Add images to content
+    print("🖼️ Adding images to content...")
+    content_with_images, featured_image_id = add_images_to_content(prepared['content'], new_title, category,
+                                                                   image_search=prepared.get('image_search'))
+
+    if publish_queue is not None:
+        def on_published(result):
+            uploaded_urls.append({'title': new_title, 'category': category, 'link': result['link'], 'original_topic': prepared['original_topic']})
+        post_data = build_post_data(new_title, content_with_images, category, featured_image_id)
+        publish_queue.add(post_data, prepared['url'], str(category), on_published)
+        return uploaded_urls
+  
+    # Post to WordPress
+    result = post_to_wordpress(new_title, content_with_images, category, featured_image_id)
     
-    # Rewrite content using Gemini
-    print("🔄 Rewriting content...")
-    rewritten_content = rewrite_scraped_content(original_content, original_topic)
-    
-    if rewritten_content:
-        # Add images to content
-        print("🖼️ Adding images to content...")
-        content_with_images, featured_image_id = add_images_to_content(rewritten_content, new_title, category)
-        category = category_received
-        print(f"📂 Category: {category}")
-      
-        # Post to WordPress
-        result = post_to_wordpress(new_title, content_with_images, category, featured_image_id)
-        
-        if result:
-            print(f"✅ Successfully posted: {new_title}\n")
-            update_my_blog_url(url,result['link'])
-            # Send email notification
-            # append title category and link to uploaded_urls
-            uploaded_urls.append({'title': new_title, 'category': category, 'link': result['link'], 'original_topic': original_topic})
-            # send_email_notification(original_topic, category, new_title, result['link'])
-        else:
-            print(f"❌ Failed to post: {new_title}\n")
+    if result:
+        print(f"✅ Successfully posted: {new_title}\n")
+        update_my_blog_url(prepared['url'], result['link'])
+        # append title category and link to uploaded_urls
+        uploaded_urls.append({'title': new_title, 'category': category, 'link': result['link'], 'original_topic': prepared['original_topic']})
     else:
-        print(f"❌ Failed to rewrite content for: {new_title}\n")
+        print(f"❌ Failed to post: {new_title}\n")
+    return uploaded_urls
+
+def process_scraped_articles(topic,content,url,title,category_received,uploaded_urls):
+    """Process scraped articles from scraper.py and post to WordPress"""
+    with track_article(url):
+        prepared = prepare_article(topic, content, url, title, category_received)
+    if prepared:
+        uploaded_urls = publish_article(prepared, uploaded_urls)
     
     # Add a small delay between posts to avoid rate limiting
     time.sleep(3)
@@ -1,116 +1,398 @@
 import requests
+import feedparser
 from bs4 import BeautifulSoup
 import re
-from dbOperations import get_source_url, insert_url
+from http_client import get_http_client
+from dbOperations import get_source_url, get_source_fetch_state, insert_urls, set_source_feed_url, update_source_fetch_state
+from url_filters import get_url_filter
 import time
+import os
+import hashlib
+import calendar
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from urllib.parse import urljoin, urlparse
+from dotenv import load_dotenv
 
+load_dotenv()
 
+# Crawl settings
+CRAWL_MAX_WORKERS = int(os.getenv('CRAWL_MAX_WORKERS', '8'))  # sources fetched at once
+CRAWL_PER_HOST_LIMIT = int(os.getenv('CRAWL_PER_HOST_LIMIT', '2'))  # concurrent requests per host
+CRAWL_CONNECT_TIMEOUT = float(os.getenv('CRAWL_CONNECT_TIMEOUT', '5'))
+CRAWL_READ_TIMEOUT = float(os.getenv('CRAWL_READ_TIMEOUT', '20'))
+CRAWL_DEADLINE = float(os.getenv('CRAWL_DEADLINE', '120'))  # seconds for the whole crawl
+
+# Summary of the most recent crawl, reported by /stats
+last_crawl_summary = {}
+
+# One semaphore per host so several sections of the same site are not hammered at once
+_host_semaphores = {}
+_host_semaphores_lock = threading.Lock()
+
+# Optional per-source dump of the filtered links for debugging
+LINK_DEBUG_OUTPUT = os.getenv('LINK_DEBUG_OUTPUT', 'false').lower() in ('1', 'true', 'yes')
+LINK_DEBUG_DIR = os.getenv('LINK_DEBUG_DIR', 'links_debug')
+
+# auto: prefer a source's RSS/Atom feed and fall back to anchor scraping
+# feed: only use feeds; html: always scrape anchors
+LINK_DISCOVERY_MODE = os.getenv('LINK_DISCOVERY_MODE', 'auto').lower()
+FEED_MAX_AGE_DAYS = float(os.getenv('FEED_MAX_AGE_DAYS', '7'))  # ignore older feed entries, 0 keeps all
+FEED_CONTENT_TYPES = ('application/rss+xml', 'application/atom+xml', 'application/xml', 'text/xml')
+
+
+def get_host_semaphore(url, limit=CRAWL_PER_HOST_LIMIT):
+    host = urlparse(url).netloc.lower()
+    with _host_semaphores_lock:
+        if host not in _host_semaphores:
+            _host_semaphores[host] = threading.BoundedSemaphore(max(1, limit))
+        return _host_semaphores[host]
+
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 Chrome/114.0.0.0 Safari/537.36"
+}
+
+
+def conditional_get(fetch_url, state, extra_headers=None):
+    """GET with the stored validators; returns (response, cache status, validators)"""
+    headers = dict(HEADERS)
+    if extra_headers:
+        headers.update(extra_headers)
+    # Send the validators from the last crawl so unchanged pages cost a 304
+    if state:
+        if state.get('etag'):
+            headers['If-None-Match'] = state['etag']
+        if state.get('last_modified'):
+            headers['If-Modified-Since'] = state['last_modified']
+
+    with get_host_semaphore(fetch_url):
+        response = get_http_client().get(fetch_url, headers=headers, allow_redirects=True,
+                                         timeout=(CRAWL_CONNECT_TIMEOUT, CRAWL_READ_TIMEOUT))
+
+    if response.status_code == 304:
+        print(f"[Cache] {fetch_url}: not modified, skipping link extraction")
+        return response, 'not_modified', None
+    response.raise_for_status()
+
+    validators = (
+        response.headers.get('ETag'),
+        response.headers.get('Last-Modified'),
+        hashlib.sha256(response.content).hexdigest()
+    )
+    if state and state.get('content_hash') == validators[2]:
+        # Servers without validators still send the same bytes when nothing changed
+        print(f"[Cache] {fetch_url}: identical body, skipping link extraction")
+        update_source_fetch_state(fetch_url, *validators)
+        return response, 'unchanged', None
+    return response, 'miss', validators
+
+
+def _cached_result(cache, discovery):
+    return {'cache': cache, 'discovery': discovery, 'links_found': 0, 'inserted': 0, 'skipped': 0, 'new_urls': []}
 
 
 # # # add headers to the request
-def fetch_urls_from_source_url(url):
+def fetch_urls_from_source_url(url, use_cache=True):
+    state = get_source_fetch_state(url) if use_cache else None
+    feed_url = state.get('feed_url') if state else None
+    if feed_url and urlparse(url).path.strip('/') and not is_scoped_feed(url, feed_url):
+        # Stored before discovery was category-aware: this is the site-wide feed
+        print(f"[Feed] {feed_url} is not scoped to {url}, rediscovering")
+        set_source_feed_url(url, None)
+        feed_url = None
 
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 Chrome/114.0.0.0 Safari/537.36"
-    }
+    if LINK_DISCOVERY_MODE != 'html':
+        if feed_url:
+            try:
+                return fetch_urls_from_feed(url, feed_url, use_cache)
+            except Exception as e:
+                # Feed moved or broke: scrape the page this time and rediscover
+                print(f"[Feed] {feed_url} failed ({e}), falling back to HTML for {url}")
+                set_source_feed_url(url, None)
+                feed_url = None
+        elif LINK_DISCOVERY_MODE == 'feed' and feed_url == '':
+            print(f"[Feed] {url} has no feed, skipping (LINK_DISCOVERY_MODE=feed)")
+            return _cached_result('skipped', 'none')
 
-    response = requests.get(url, headers=headers, allow_redirects=True)
+    # An undiscovered feed needs the full page, so skip the validators once
+    discover = LINK_DISCOVERY_MODE != 'html' and feed_url is None
+    response, cache, validators = conditional_get(url, None if discover else state)
+    if cache != 'miss':
+        return _cached_result(cache, 'html')
 
     soup = BeautifulSoup(response.text, 'html.parser')
 
     # print(soup.prettify())
 
-    # get all the links in the page
-    links = soup.find_all('a')
-    for link in links:
+    if discover:
+        feed_url = discover_feed_url(url, soup)
+        set_source_feed_url(url, feed_url or '')
+        if feed_url:
+            print(f"[Feed] Discovered feed for {url}: {feed_url}")
+            try:
+                result = fetch_urls_from_feed(url, feed_url, use_cache)
+                update_source_fetch_state(url, *validators)
+                return result
+            except Exception as e:
+                print(f"[Feed] {feed_url} failed ({e}), using HTML links for {url}")
+                set_source_feed_url(url, None)
+        elif LINK_DISCOVERY_MODE == 'feed':
+            print(f"[Feed] {url} has no feed, skipping (LINK_DISCOVERY_MODE=feed)")
+            return _cached_result('skipped', 'none')
+
+    # extract -> normalize -> filter -> classify -> persist, all in memory for this page only
+    links = extract_links(soup)
+    links = normalize_links(links)
+    links = filter_links(url, links)
+    filtered_links = classify_links(url, links)
+
+    if LINK_DEBUG_OUTPUT:
+        write_debug_links(url, filtered_links)
+
+    result = persist_links(url, filtered_links)
+    # Only remember the page once its links are safely stored
+    update_source_fetch_state(url, *validators)
+    result['cache'] = 'miss'
+    result['discovery'] = 'html'
+    return result
+
+
+def discover_feed_url(url, soup):
+    """Find the source's RSS/Atom feed from <link rel="alternate"> or the WordPress /feed/ path"""
+    alternates = []
+    for link in soup.find_all('link', href=True):
+        rel = link.get('rel') or []
+        if isinstance(rel, str):
+            rel = rel.split()
+        link_type = (link.get('type') or '').lower()
+        href = link['href'].strip()
+        if 'alternate' in [r.lower() for r in rel] and link_type in FEED_CONTENT_TYPES:
+            # WordPress also advertises a comments feed; we want the posts
+            if 'comments' in href.lower():
+                continue
+            alternates.append(urljoin(url, href))
+
+    if not urlparse(url).path.strip('/'):
+        # Home page source: the site-wide feed is what we want
+        return alternates[0] if alternates else probe_listing_feed(url)
+
+    # Category/section source: the first alternate is usually the site-wide feed,
+    # so only accept a feed scoped to this listing page
+    candidate = probe_listing_feed(url)
+    if candidate:
+        return candidate
+    for feed_url in alternates:
+        if is_scoped_feed(url, feed_url):
+            return feed_url
+    # Fall back to scraping the listing page rather than ingesting the whole site
+    return None
+
+
+def is_scoped_feed(url, feed_url):
+    """True when feed_url lives under the listing page or names its category"""
+    base = url.rstrip('/') + '/'
+    if feed_url.startswith(base):
+        return True
+    segment = urlparse(url).path.rstrip('/').rsplit('/', 1)[-1].lower()
+    parsed = urlparse(feed_url)
+    return bool(segment) and segment in (parsed.path + '?' + parsed.query).lower()
+
+
+def probe_listing_feed(url):
+    """WordPress serves a feed for every listing page at <page>/feed/"""
+    candidate = urljoin(url if url.endswith('/') else url + '/', 'feed/')
+    try:
+        with get_host_semaphore(candidate):
+            response = get_http_client().get(candidate, headers=HEADERS, allow_redirects=True,
+                                             timeout=(CRAWL_CONNECT_TIMEOUT, CRAWL_READ_TIMEOUT))
+        if response.status_code == 200 and feedparser.parse(response.content).entries:
+            return candidate
+    except Exception as e:
+        print(f"[Feed] Probing {candidate} failed: {e}")
+    return None
+
+
+def fetch_urls_from_feed(url, feed_url, use_cache=True):
+    """Store the article links listed in a source's feed, newest first"""
+    state = get_source_fetch_state(feed_url) if use_cache else None
+    response, cache, validators = conditional_get(
+        feed_url, state, {'Accept': 'application/rss+xml, application/atom+xml, application/xml;q=0.9, */*;q=0.8'}
+    )
+    if cache != 'miss':
+        return _cached_result(cache, 'feed')
+
+    feed = feedparser.parse(response.content)
+    if not feed.entries:
+        raise ValueError(f"feed has no entries{' (' + str(feed.bozo_exception) + ')' if feed.bozo else ''}")
+
+    entries = []
+    oldest = time.time() - FEED_MAX_AGE_DAYS * 86400 if FEED_MAX_AGE_DAYS > 0 else None
+    for entry in feed.entries:
+        link = (entry.get('link') or '').strip()
+        if not link.startswith('http'):
+            continue
+        published = entry.get('published_parsed') or entry.get('updated_parsed')
+        published_ts = calendar.timegm(published) if published else None
+        if oldest and published_ts and published_ts < oldest:
+            continue
+        entries.append((published_ts or 0, link))
+
+    # Feeds give exact article URLs, so no length or pattern heuristics are needed
+    entries.sort(key=lambda entry: entry[0], reverse=True)
+    feed_links = list(normalize_links(link for _, link in entries))
+
+    if LINK_DEBUG_OUTPUT:
+        write_debug_links(url, feed_links)
+
+    result = persist_links(url, feed_links)
+    update_source_fetch_state(feed_url, *validators)
+    result['cache'] = 'miss'
+    result['discovery'] = 'feed'
+    return result
+
+
+def extract_links(soup):
+    """Yield the raw href of every anchor on the page"""
+    for link in soup.find_all('a'):
         href = link.get('href')
         if href:  # Only process links that have an href attribute
-            print(href)
-            # write the link to a file
-            with open('links.txt', 'a') as f:
-                f.write(href + '\n')
-
-    with open('links.txt', 'r') as f:
-        links = f.readlines()
-        links = list(set(links))    
-        
-        unwanted_patterns = [
-            '/contact', '/social', '/facebook', '/twitter', '/instagram', '/linkedin', 
-            '/youtube', '/pinterest', '/tiktok', '/snapchat', '/reddit', '/medium', 
-            '/quora', '/github', '/subject/', '/about/', '/privacy/', '/terms/', 
-            '/disclaimer/', '/advertise/', '/brand-press', '/digest', '/newsletters/','/about-us','/category/','#','/tags','/author/','/tag/','privacy-policy','www.instagram.com','www.youtube.com','www.facebook.com','www.linkedin.com','www.twitter.com','www.tiktok.com','www.snapchat.com','www.reddit.com','www.medium.com','www.quora.com','www.github.com','/reach-out/','/rss.com/','/coinference','https://events.','https://technext24.com/fleshly-pressed/','https://technext24.com/technext-ng-media-privacy','https://x.com','https://techpoint.africa/editorial-team/','newsletter','/newsletter','https://web.facebook.com/TechpointAfrica','/categories','https://techcabal.com/latest','https://techcabal.com/events','http://insights.techcabal.com/','https://techcabal.com/standards-and-policies/','http://techwomenlagos.com','https://insights.techcabal.com/reports/','https://cioafrica.co/contact-us/','https://cioafrica.co/terms-of-service/','https://cioafrica.co/privacy-policy/','https://techcabal.com/?page_id=89385','https://publications.cioafrica.co/2025/June-WA','https://cioafrica.co/advertising/','https://nohitsradio.live/','javascript:void(0);','https://cioafrica.co/wp-login.php','https://events.cioafrica.co','https://cioafrica.co/southern-africa/','https://cioafrica.co/services/','https://techmoran.com/?page_id=191562','http://888starz.co.ke/en','https://publications.cioafrica.co','https://cioafrica.co/west-africa/','https://techmoran.com/technight/','/advertise','/about','category/startup-news','.net/','/companies/suppliedcontent','mailto:nomthandazo.mhlanga@memeburn.com','/companies/esquared','https://www.itnewsafrica.com/pressoffices/parallel_wirelress/index.html','https://cedirates.com/?utm_source=ghanaweb&utm_medium=affiliate&utm_campaign=partnership','https://accounts.google.com/o/oauth2/auth?response_type=code&redirect_uri=https%3A%2F%2Fwww.moroccoworldnews.com%2F%3Fsocial-callback%3Dgoogle&client_id=132657930986-i3b1ocu8hgcjk52h9kauhhspo2gkkakp.apps.googleusercontent.com&scope=https%3A%2F%2Fwww.googleapis.com%2Fauth%2Fuserinfo.profile+https%3A%2F%2Fwww.googleapis.com%2Fauth%2Fuserinfo.email&access_type=online&approval_prompt=auto'
-        ]
-        
-        # filter out links containing any unwanted patterns
-        filtered_links = []
-        date_formatted_links = []  # Links with year/month format
-        other_links = []  # Other valid links
-        
-        # Minimum length based on example URL: https://techlabari.com/explainer-the-yellowcard-and-hanypay-controversy/
-        min_length = 65  # Length of the example URL
-        if url == 'https://disrupt-africa.com/':
-            min_length = 72
-        
-        for link in links:
-            link = link.strip()  # remove newlines
-            
-            # Skip empty links or single characters
-            if not link or len(link) <= 1:
-                continue
-                
-            # Skip single forward slash
-            if link == '/':
-                continue
-                
-            # Skip links shorter than minimum length
-            if len(link) < min_length and url != 'https://techpoint.africa/':
-                continue
-                
-            # link not starts with http or https
-            if not link.startswith('http') and not link.startswith('https'):
-                continue
-            
-            should_include = True
-            
-            # Exclude the main URL and domain
-            if link == url or link == url.rstrip('/') or link == 'https://technext24.com/' or link == 'https://technext24.com':
-                should_include = False
-            
-            # Check for unwanted patterns
-            if url == 'https://addisinsight.net/category/technology/' or url == 'https://addisinsight.net/category/business/':
-                unwanted_patterns = ['https://www.addisinsight.net/category/ethiopian-news/africa-news/','https://www.addisinsight.net/category/entertainment-and-arts/ethiopian-books/']
-
-            for pattern in unwanted_patterns:
-                if pattern in link:
-                    should_include = False
-                    break
-            
-            if should_include:
-                # Check if link follows year/month format (e.g., /2025/06/ or /2024/12/)
-                date_pattern = r'/\d{4}/\d{2}/'
-                if re.search(date_pattern, link):
-                    date_formatted_links.append(link)
-                else:
-                    other_links.append(link)
-        
-        # Combine links with date-formatted links first, then others
-        # Sort each group by length (shorter links first)
-        date_formatted_links.sort(key=len, reverse=True)
-        other_links.sort(key=len, reverse=True)
-        filtered_links = date_formatted_links + other_links
-        
-        # write the filtered links back to file
-        with open('links.txt', 'w') as f:
-            for link in filtered_links:
+            yield href
+
+
+def normalize_links(links):
+    """Strip whitespace and drop duplicates within the page"""
+    seen = set()
+    for link in links:
+        link = link.strip()  # remove newlines
+        if link and link not in seen:
+            seen.add(link)
+            yield link
+
+
+def filter_links(url, links):
+    """Yield only article-looking links for the given source"""
+    # Rules live in url_filter_rules.json and are compiled once per source
+    return get_url_filter(url).filter(links)
+
+
+def classify_links(url, links):
+    """Order links with year/month paths (e.g. /2025/06/) first, each group longest first"""
+    return get_url_filter(url).order(links)
+
+
+def persist_links(url, filtered_links):
+    """Insert the page's links in one round trip and return the counts"""
+    insert_result = insert_urls(url, filtered_links)
+
+    return {
+        'links_found': len(filtered_links),
+        'inserted': len(insert_result['inserted']),
+        'skipped': len(insert_result['skipped']),
+        'new_urls': insert_result['inserted']
+    }
+
+
+def write_debug_links(url, links):
+    """Write the filtered links of one source to its own file under LINK_DEBUG_DIR"""
+    parsed = urlparse(url)
+    name = re.sub(r'[^A-Za-z0-9]+', '_', parsed.netloc + parsed.path).strip('_') or 'source'
+    try:
+        os.makedirs(LINK_DEBUG_DIR, exist_ok=True)
+        with open(os.path.join(LINK_DEBUG_DIR, f'{name}.txt'), 'w') as f:
+            for link in links:
                 f.write(link + '\n')
+    except OSError as e:
+        print(f"Error writing debug links for {url}: {e}")
+
+
+def crawl_source(source_url):
+    """Fetch one source and return a result record with status, latency and link counts"""
+    started = time.monotonic()
+    record = {
+        'source_url': source_url,
+        'status': 'ok',
+        'cache': None,
+        'discovery': None,
+        'latency': None,
+        'links_found': 0,
+        'inserted': 0,
+        'skipped': 0,
+        'error': None
+    }
+    try:
+        counts = fetch_urls_from_source_url(source_url)
+        record['cache'] = counts['cache']
+        record['discovery'] = counts['discovery']
+        record['links_found'] = counts['links_found']
+        record['inserted'] = counts['inserted']
+        record['skipped'] = counts['skipped']
+    except requests.Timeout as e:
+        record['status'] = 'timeout'
+        record['error'] = str(e)
+    except Exception as e:
+        record['status'] = 'error'
+        record['error'] = str(e)
+    record['latency'] = round(time.monotonic() - started, 3)
+    print(f"[Crawl] {source_url}: {record['status']} ({record['discovery']}, {record['cache']}) in {record['latency']}s, "
+          f"{record['links_found']} links ({record['inserted']} new, {record['skipped']} known)")
+    return record
+
+
+def extract_urls_from_source_url(max_workers=CRAWL_MAX_WORKERS, deadline=CRAWL_DEADLINE):
+    """Crawl every source concurrently; returns one result record per source"""
+    source_urls = [source[0] for source in get_source_url()]
+    if not source_urls:
+        return []
+
+    started = time.monotonic()
+    executor = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(source_urls))),
+                                  thread_name_prefix='crawl')
+    futures = {}
+    for source_url in source_urls:
+        print('now fetching urls from', source_url)
+        futures[executor.submit(crawl_source, source_url)] = source_url
+
+    done, not_done = wait(futures, timeout=deadline)
+    # Drop sources that never started; running fetches are bounded by their own timeouts
+    executor.shutdown(wait=False, cancel_futures=True)
+
+    results = []
+    for future, source_url in futures.items():
+        if future in done:
+            results.append(future.result())
+        else:
+            results.append({
+                'source_url': source_url,
+                'status': 'deadline_exceeded',
+                'cache': None,
+                'discovery': None,
+                'latency': None,
+                'links_found': 0,
+                'inserted': 0,
+                'skipped': 0,
+                'error': f"Crawl deadline of {deadline}s exceeded"
+            })
 
-        # insert the filtered links into the database
-        for link in filtered_links:
-            insert_url(url, link)
+    ok = sum(1 for r in results if r['status'] == 'ok')
+    not_modified = sum(1 for r in results if r['cache'] == 'not_modified')
+    unchanged = sum(1 for r in results if r['cache'] == 'unchanged')
+    from_feed = sum(1 for r in results if r['discovery'] == 'feed')
+    elapsed = time.monotonic() - started
+    print(f"[Crawl] {ok}/{len(results)} sources crawled in {elapsed:.1f}s, "
+          f"{sum(r['inserted'] for r in results)} new links, "
+          f"{not_modified + unchanged} served from cache ({not_modified} not modified, {unchanged} identical body), "
+          f"{from_feed} via feeds")
 
-            
-def extract_urls_from_source_url():
-    source_url = get_source_url()
-    for source in source_url:
-        print('now fetching urls from', source[0])
-        fetch_urls_from_source_url(source[0])
\ No newline at end of file
+    last_crawl_summary.clear()
+    last_crawl_summary.update({
+        'sources': len(results),
+        'ok': ok,
+        'served_from_cache': not_modified + unchanged,
+        'not_modified': not_modified,
+        'unchanged': unchanged,
+        'from_feed': from_feed,
+        'new_links': sum(r['inserted'] for r in results),
+        'elapsed_seconds': round(elapsed, 3)
+    })
+    return results
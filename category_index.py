@@ -0,0 +1,149 @@
+import json
+import os
+import threading
+import time
+
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# WordPress categories change rarely; looking them up used to page through
+# /wp/v2/categories on every post. The index maps lower-cased name -> id.
+CATEGORY_INDEX_TTL = float(os.getenv('CATEGORY_INDEX_TTL', '3600'))  # seconds
+# Optional JSON snapshot so a restart does not start cold; empty disables it
+CATEGORY_INDEX_PATH = os.getenv('CATEGORY_INDEX_PATH', '')
+# An unknown name triggers a refresh at most this often (categories added in wp-admin)
+CATEGORY_MISS_REFRESH_INTERVAL = 60
+
+
+class CategoryIndex:
+    """In-process name -> id index over the WordPress categories, refreshed on a TTL"""
+
+    def __init__(self, fetch, ttl=CATEGORY_INDEX_TTL, path=CATEGORY_INDEX_PATH):
+        self.fetch = fetch  # returns the full category list or None on failure, e.g. blog.get_categories
+        self.ttl = ttl
+        self.path = path
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()  # one fetch at a time; the others reuse it
+        self._ids = {}
+        self._names = {}
+        self._fetched_at = 0.0
+        self._failed_at = 0.0
+        self._stats = {'hits': 0, 'misses': 0, 'refreshes': 0, 'failed_refreshes': 0, 'loaded_from_disk': 0}
+        self._load()
+
+    def _set(self, categories, fetched_at):
+        self._ids = {c['name'].lower(): c['id'] for c in categories}
+        self._names = {c['name'].lower(): c['name'] for c in categories}
+        self._fetched_at = fetched_at
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+            if time.time() - data['fetched_at'] < self.ttl:
+                self._set(data['categories'], data['fetched_at'])
+                self._stats['loaded_from_disk'] += 1
+                print(f"[Categories] Loaded {len(self._ids)} categories from {self.path}")
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"[Categories] Could not load {self.path}: {e}")
+
+    def _save_locked(self):
+        if not self.path:
+            return
+        categories = [{'id': self._ids[key], 'name': self._names[key]} for key in self._ids]
+        try:
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump({'fetched_at': self._fetched_at, 'categories': categories}, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"[Categories] Could not save {self.path}: {e}")
+
+    def _expired(self):
+        return not self._fetched_at or time.time() - self._fetched_at > self.ttl
+
+    def refresh(self):
+        """Re-fetch every category; keeps the old index if the fetch fails or comes back empty"""
+        categories = self.fetch()
+        with self._lock:
+            self._stats['refreshes'] += 1
+            if categories is None:
+                # A partial list would hide categories for a whole TTL (and on disk)
+                self._stats['failed_refreshes'] += 1
+                self._failed_at = time.time()
+                print("[Categories] Refresh failed, keeping the previous index")
+                return
+            if not categories and self._ids:
+                print("[Categories] Refresh returned nothing, keeping the previous index")
+                return
+            self._set(categories, time.time())
+            self._save_locked()
+        print(f"[Categories] Indexed {len(categories)} categories")
+
+    def warm(self):
+        """Called once per scheduler cycle so posts in the cycle never wait on pagination"""
+        with self._refresh_lock:
+            self.refresh()
+
+    def invalidate(self):
+        with self._lock:
+            self._fetched_at = 0.0
+
+    def add(self, name, category_id):
+        """Record a category created through the API without re-fetching the list"""
+        with self._lock:
+            self._ids[name.lower()] = category_id
+            self._names[name.lower()] = name
+            self._save_locked()
+
+    def _refresh_if_older_than(self, max_age):
+        with self._refresh_lock:
+            now = time.time()
+            # After a failed fetch, lookups use the old index for a while instead of retrying each time
+            if now - self._failed_at < CATEGORY_MISS_REFRESH_INTERVAL:
+                return
+            if not self._fetched_at or now - self._fetched_at > max_age:
+                self.refresh()
+
+    def lookup(self, names):
+        """(ids, missing names) for the given names, in order"""
+        if self._expired():
+            self._refresh_if_older_than(self.ttl)
+        ids, missing = self._match(names)
+        if missing and time.time() - self._fetched_at > CATEGORY_MISS_REFRESH_INTERVAL:
+            self._refresh_if_older_than(CATEGORY_MISS_REFRESH_INTERVAL)
+            ids, missing = self._match(names)
+        with self._lock:
+            self._stats['hits'] += len(ids)
+            self._stats['misses'] += len(missing)
+        return ids, missing
+
+    def _match(self, names):
+        ids, missing = [], []
+        with self._lock:
+            for name in names:
+                category_id = self._ids.get(name.lower())
+                if category_id is None:
+                    missing.append(name)
+                else:
+                    ids.append(category_id)
+        return ids, missing
+
+    def categories(self):
+        """[(name, id)] currently indexed"""
+        with self._lock:
+            return [(self._names[key], self._ids[key]) for key in self._ids]
+
+    def stats(self):
+        with self._lock:
+            return dict(
+                self._stats,
+                entries=len(self._ids),
+                age_seconds=round(time.time() - self._fetched_at, 1) if self._fetched_at else None,
+                ttl=self.ttl,
+                persisted=bool(self.path)
+            )
@@ -1,4 +1,5 @@
 import psycopg2
+import psycopg2.extras
 import os
 from dotenv import load_dotenv
 import json
@@ -6,97 +7,57 @@ import requests
 import uuid
 import sys
 import traceback
+import threading
+from datetime import datetime
+
+from db_pool import get_connection
 
 # Load environment variables
 load_dotenv()
 
 def update_password(password):
-    conn = None
-    cursor = None
-    
     try:
-        conn = psycopg2.connect(
-            dbname=os.getenv('DB_DATABASE'),
-            user=os.getenv('DB_USERNAME'),
-            password=os.getenv('DB_PASSWORD'),
-            host=os.getenv('DB_HOST'),
-            port=os.getenv('DB_PORT')
-        )
-        cursor = conn.cursor()
-
-        # Update query: set perimeter_x based on location_guid
-        update_query = """
-            UPDATE tbl_otp SET otp = %s
-        """
-        # Correct the order of parameters
-        cursor.execute(update_query, (password,))  # <-- Correct order
-        conn.commit()
-        print("Record updated in the database.")
+        with get_connection() as conn, conn.cursor() as cursor:
+            # Update query: set perimeter_x based on location_guid
+            update_query = """
+                UPDATE tbl_otp SET otp = %s
+            """
+            # Correct the order of parameters
+            cursor.execute(update_query, (password,))  # <-- Correct order
+            conn.commit()
+            print("Record updated in the database.")
         
     except Exception as e:
         print(f"Error: inserting into DB: {str(e)}", file=sys.stderr)
         traceback.print_exc()
-    finally:
-        if cursor:
-            cursor.close()
-        if conn:
-            conn.close()
 
 # write a function that gets the password from the database
 def get_password():
-    conn = None
-    cursor = None
-    
     try:
-        conn = psycopg2.connect(
-            dbname=os.getenv('DB_DATABASE'),
-            user=os.getenv('DB_USERNAME'),
-            password=os.getenv('DB_PASSWORD'),
-            host=os.getenv('DB_HOST'),
-            port=os.getenv('DB_PORT')
-        )
-        cursor = conn.cursor()
-
-        # Update query: set perimeter_x based on location_guid
-        update_query = """
-            SELECT otp FROM tbl_otp
-        """
-        cursor.execute(update_query)
-        result = cursor.fetchone()
-        return result[0]
+        with get_connection() as conn, conn.cursor() as cursor:
+            # Update query: set perimeter_x based on location_guid
+            update_query = """
+                SELECT otp FROM tbl_otp
+            """
+            cursor.execute(update_query)
+            result = cursor.fetchone()
+            return result[0]
     except Exception as e:
         print(f"Error: getting password from DB: {str(e)}", file=sys.stderr)
         traceback.print_exc()
-    finally:
-        if cursor:
-            cursor.close()
-        if conn:
-            conn.close()
 
 # write function to get all categories from tbl_categories
 def get_categories_data():
-    conn = None
-    cursor = None
-    
     try:
-        conn = psycopg2.connect(
-            dbname=os.getenv('DB_DATABASE'),
-            user=os.getenv('DB_USERNAME'),
-            password=os.getenv('DB_PASSWORD'),
-            host=os.getenv('DB_HOST'),
-            port=os.getenv('DB_PORT')
-        )
-        cursor = conn.cursor()
-
-        
-        get_categories_query = """
-            SELECT category FROM tbl_categories WHERE is_deleted IS NULL OR is_deleted != '1'
-        """
-        cursor.execute(get_categories_query)
-        result = cursor.fetchall()
-        # result is a list of tuples, convert it to a list of strings
-        result = [item[0] for item in result]
-        return result
+        with get_connection() as conn, conn.cursor() as cursor:
+            get_categories_query = """
+                SELECT category FROM tbl_categories WHERE is_deleted IS NULL OR is_deleted != '1'
+            """
+            cursor.execute(get_categories_query)
+            result = cursor.fetchall()
+            # result is a list of tuples, convert it to a list of strings
+            result = [item[0] for item in result]
+            return result
     except psycopg2.Error as e:
         print(f"Database error: getting categories from DB: {str(e)}", file=sys.stderr)
         traceback.print_exc()
@@ -105,149 +66,87 @@ def get_categories_data():
         print(f"Unexpected error: getting categories from DB: {str(e)}", file=sys.stderr)
         traceback.print_exc()
         raise
-    finally:
-        if cursor:
-            cursor.close()
-        if conn:
-            conn.close()
 
 
 # soft delete a category
 def soft_delete_category(category):
-    conn = None
-    cursor = None
-    
     try:
-        conn = psycopg2.connect(
-            dbname=os.getenv('DB_DATABASE'),
-            user=os.getenv('DB_USERNAME'),
-            password=os.getenv('DB_PASSWORD'),
-            host=os.getenv('DB_HOST'),
-            port=os.getenv('DB_PORT')
-        )
-        cursor = conn.cursor()
-
-        # First check if the category exists
-        check_query = """
-            SELECT category FROM tbl_categories WHERE category = %s AND (is_deleted IS NULL OR is_deleted != '1')
-        """
-        cursor.execute(check_query, (category,))
-        if not cursor.fetchone():
-            raise ValueError(f"Category with ID {category} not found or already deleted")
+        with get_connection() as conn, conn.cursor() as cursor:
+            # First check if the category exists
+            check_query = """
+                SELECT category FROM tbl_categories WHERE category = %s AND (is_deleted IS NULL OR is_deleted != '1')
+            """
+            cursor.execute(check_query, (category,))
+            if not cursor.fetchone():
+                raise ValueError(f"Category with ID {category} not found or already deleted")
         
-        update_query = """
-            UPDATE tbl_categories SET is_deleted = '1' WHERE category = %s
-        """
-        cursor.execute(update_query, (category,))
+            update_query = """
+                UPDATE tbl_categories SET is_deleted = '1' WHERE category = %s
+            """
+            cursor.execute(update_query, (category,))
         
-        if cursor.rowcount == 0:
-            raise ValueError(f"No category was updated. Category ID {category} may not exist.")
+            if cursor.rowcount == 0:
+                raise ValueError(f"No category was updated. Category ID {category} may not exist.")
             
-        conn.commit()
-        print("Category soft deleted successfully.")
+            conn.commit()
+            print("Category soft deleted successfully.")
     except psycopg2.Error as e:
         print(f"Database error: soft deleting category: {str(e)}", file=sys.stderr)
         traceback.print_exc()
-        if conn:
-            conn.rollback()
         raise
     except ValueError as e:
         print(f"Validation error: {str(e)}", file=sys.stderr)
-        if conn:
-            conn.rollback()
         raise
     except Exception as e:
         print(f"Unexpected error: soft deleting category: {str(e)}", file=sys.stderr)
         traceback.print_exc()
-        if conn:
-            conn.rollback()
         raise
-    finally:
-        if cursor:
-            cursor.close()
-        if conn:
-            conn.close()
 
 # insert a new category
 def insert_category(category):
-    conn = None
-    cursor = None
-    
     try:
-        conn = psycopg2.connect(
-            dbname=os.getenv('DB_DATABASE'),
-            user=os.getenv('DB_USERNAME'),
-            password=os.getenv('DB_PASSWORD'),
-            host=os.getenv('DB_HOST'),
-            port=os.getenv('DB_PORT')
-        )
-        cursor = conn.cursor()
-
-        # Check if category already exists (case-insensitive)
-        check_query = """
-            SELECT category FROM tbl_categories 
-            WHERE LOWER(category) = LOWER(%s) AND (is_deleted IS NULL OR is_deleted != '1')
-        """
-        cursor.execute(check_query, (category,))
-        if cursor.fetchone():
-            raise ValueError(f"Category '{category}' already exists")
+        with get_connection() as conn, conn.cursor() as cursor:
+            # Check if category already exists (case-insensitive)
+            check_query = """
+                SELECT category FROM tbl_categories 
+                WHERE LOWER(category) = LOWER(%s) AND (is_deleted IS NULL OR is_deleted != '1')
+            """
+            cursor.execute(check_query, (category,))
+            if cursor.fetchone():
+                raise ValueError(f"Category '{category}' already exists")
         
-        insert_query = """
-            INSERT INTO tbl_categories (category) VALUES (%s)
-        """ 
-        cursor.execute(insert_query, (category,))
-        conn.commit()
-        print("Category inserted successfully.")
+            insert_query = """
+                INSERT INTO tbl_categories (category) VALUES (%s)
+            """ 
+            cursor.execute(insert_query, (category,))
+            conn.commit()
+            print("Category inserted successfully.")
     except psycopg2.IntegrityError as e:
         print(f"Database integrity error: inserting category: {str(e)}", file=sys.stderr)
         traceback.print_exc()
-        if conn:
-            conn.rollback()
         raise ValueError(f"Category '{category}' already exists or violates database constraints")
     except psycopg2.Error as e:
         print(f"Database error: inserting category: {str(e)}", file=sys.stderr)
         traceback.print_exc()
-        if conn:
-            conn.rollback()
         raise
     except ValueError as e:
         print(f"Validation error: {str(e)}", file=sys.stderr)
-        if conn:
-            conn.rollback()
         raise
     except Exception as e:
         print(f"Unexpected error: inserting category: {str(e)}", file=sys.stderr)
         traceback.print_exc()
-        if conn:
-            conn.rollback()
         raise
-    finally:
-        if cursor:
-            cursor.close()
-        if conn:
-            conn.close()
 
 # write a function to get all source_url from tbl_source_url
 def get_source_url():
-    conn = None
-    cursor = None
-    
     try:
-        conn = psycopg2.connect(
-            dbname=os.getenv('DB_DATABASE'),
-            user=os.getenv('DB_USERNAME'),
-            password=os.getenv('DB_PASSWORD'),
-            host=os.getenv('DB_HOST'),
-            port=os.getenv('DB_PORT')
-        )
-        cursor = conn.cursor()
-
-        get_source_url_query = """
-            SELECT source_url FROM tbl_source_url WHERE is_deleted IS NULL OR is_deleted != '1'
-        """
-        cursor.execute(get_source_url_query)
-        result = cursor.fetchall()
-        return result   
+        with get_connection() as conn, conn.cursor() as cursor:
+            get_source_url_query = """
+                SELECT source_url FROM tbl_source_url WHERE is_deleted IS NULL OR is_deleted != '1'
+            """
+            cursor.execute(get_source_url_query)
+            result = cursor.fetchall()
+            return result   
     except psycopg2.Error as e:
         print(f"Database error: getting source_url from DB: {str(e)}", file=sys.stderr)
         traceback.print_exc()
@@ -256,42 +155,26 @@ def get_source_url():
         print(f"Unexpected error: getting source_url from DB: {str(e)}", file=sys.stderr)
         traceback.print_exc()
         raise
-    finally:
-        if cursor:
-            cursor.close()
-        if conn:
-            conn.close()
 
 def get_source_url_data():
-    conn = None
-    cursor = None
-    
     try:
-        conn = psycopg2.connect(
-            dbname=os.getenv('DB_DATABASE'),
-            user=os.getenv('DB_USERNAME'),
-            password=os.getenv('DB_PASSWORD'),
-            host=os.getenv('DB_HOST'),
-            port=os.getenv('DB_PORT')
-        )
-        cursor = conn.cursor()
-
-        get_source_url_query = """
-            SELECT source_url, source_guid, created_at FROM tbl_source_url WHERE is_deleted IS NULL OR is_deleted != '1'
-        """
-        cursor.execute(get_source_url_query)
-        result = cursor.fetchall()
+        with get_connection() as conn, conn.cursor() as cursor:
+            get_source_url_query = """
+                SELECT source_url, source_guid, created_at FROM tbl_source_url WHERE is_deleted IS NULL OR is_deleted != '1'
+            """
+            cursor.execute(get_source_url_query)
+            result = cursor.fetchall()
         
-        # Convert the result to a list of dictionaries for better JSON structure
-        source_urls_list = []
-        for row in result:
-            source_urls_list.append({
-                'source_url': row[0],
-                'source_guid': row[1],
-                'created_at': row[2].isoformat() if row[2] else None
-            })
+            # Convert the result to a list of dictionaries for better JSON structure
+            source_urls_list = []
+            for row in result:
+                source_urls_list.append({
+                    'source_url': row[0],
+                    'source_guid': row[1],
+                    'created_at': row[2].isoformat() if row[2] else None
+                })
         
-        return source_urls_list
+            return source_urls_list
     except psycopg2.Error as e:
         print(f"Database error: getting source_url from DB: {str(e)}", file=sys.stderr)
         traceback.print_exc()
@@ -300,205 +183,201 @@ def get_source_url_data():
         print(f"Unexpected error: getting source_url from DB: {str(e)}", file=sys.stderr)
         traceback.print_exc()
         raise
-    finally:
-        if cursor:
-            cursor.close()
-        if conn:
-            conn.close()
 
 
 # write a function to insert a new source_url
 def insert_source_url(source_url):
-    conn = None
-    cursor = None
-    
     try:
-        conn = psycopg2.connect(
-            dbname=os.getenv('DB_DATABASE'),
-            user=os.getenv('DB_USERNAME'),
-            password=os.getenv('DB_PASSWORD'),
-            host=os.getenv('DB_HOST'),
-            port=os.getenv('DB_PORT')
-        )
-        cursor = conn.cursor()
-
-        # Check if source URL already exists (case-insensitive)
-        check_query = """
-            SELECT source_url FROM tbl_source_url 
-            WHERE LOWER(source_url) = LOWER(%s) AND (is_deleted IS NULL OR is_deleted != '1')
-        """
-        cursor.execute(check_query, (source_url,))
-        if cursor.fetchone():
-            raise ValueError(f"Source URL '{source_url}' already exists")
+        with get_connection() as conn, conn.cursor() as cursor:
+            # Check if source URL already exists (case-insensitive)
+            check_query = """
+                SELECT source_url FROM tbl_source_url 
+                WHERE LOWER(source_url) = LOWER(%s) AND (is_deleted IS NULL OR is_deleted != '1')
+            """
+            cursor.execute(check_query, (source_url,))
+            if cursor.fetchone():
+                raise ValueError(f"Source URL '{source_url}' already exists")
         
-        insert_source_url_query = """
-            INSERT INTO tbl_source_url (source_url) VALUES (%s)
-        """
-        cursor.execute(insert_source_url_query, (source_url,))
-        conn.commit()
-        print("Source URL inserted successfully.")
+            insert_source_url_query = """
+                INSERT INTO tbl_source_url (source_url) VALUES (%s)
+            """
+            cursor.execute(insert_source_url_query, (source_url,))
+            conn.commit()
+            print("Source URL inserted successfully.")
     except psycopg2.IntegrityError as e:
         print(f"Database integrity error: inserting source_url into DB: {str(e)}", file=sys.stderr)
         traceback.print_exc()
-        if conn:
-            conn.rollback()
         raise ValueError(f"Source URL '{source_url}' already exists or violates database constraints")
     except psycopg2.Error as e:
         print(f"Database error: inserting source_url into DB: {str(e)}", file=sys.stderr)
         traceback.print_exc()
-        if conn:
-            conn.rollback()
         raise
     except ValueError as e:
         print(f"Validation error: {str(e)}", file=sys.stderr)
-        if conn:
-            conn.rollback()
         raise
     except Exception as e:
         print(f"Unexpected error: inserting source_url into DB: {str(e)}", file=sys.stderr)
         traceback.print_exc()
-        if conn:
-            conn.rollback()
         raise
-    finally:
-        if cursor:
-            cursor.close()
-        if conn:
-            conn.close()
 
 # write a function to soft delete a source_url
 def soft_delete_source_url(source_url_id):
-    conn = None
-    cursor = None
-    
     try:
-        conn = psycopg2.connect(
-            dbname=os.getenv('DB_DATABASE'),
-            user=os.getenv('DB_USERNAME'),
-            password=os.getenv('DB_PASSWORD'),
-            host=os.getenv('DB_HOST'),
-            port=os.getenv('DB_PORT')
-        )
-        cursor = conn.cursor()
-
-        # First check if the source URL exists
-        check_query = """
-            SELECT source_guid FROM tbl_source_url WHERE source_guid = %s AND (is_deleted IS NULL OR is_deleted != '1')
-        """
-        cursor.execute(check_query, (source_url_id,))
-        if not cursor.fetchone():
-            raise ValueError(f"Source URL with ID {source_url_id} not found or already deleted")
+        with get_connection() as conn, conn.cursor() as cursor:
+            # First check if the source URL exists
+            check_query = """
+                SELECT source_guid FROM tbl_source_url WHERE source_guid = %s AND (is_deleted IS NULL OR is_deleted != '1')
+            """
+            cursor.execute(check_query, (source_url_id,))
+            if not cursor.fetchone():
+                raise ValueError(f"Source URL with ID {source_url_id} not found or already deleted")
         
-        soft_delete_source_url_query = """
-            UPDATE tbl_source_url SET is_deleted = '1' WHERE source_guid = %s
-        """ 
-        cursor.execute(soft_delete_source_url_query, (source_url_id,))
+            soft_delete_source_url_query = """
+                UPDATE tbl_source_url SET is_deleted = '1' WHERE source_guid = %s
+            """ 
+            cursor.execute(soft_delete_source_url_query, (source_url_id,))
         
-        if cursor.rowcount == 0:
-            raise ValueError(f"No source URL was updated. Source URL ID {source_url_id} may not exist.")
+            if cursor.rowcount == 0:
+                raise ValueError(f"No source URL was updated. Source URL ID {source_url_id} may not exist.")
             
-        conn.commit()
-        print("Source URL soft deleted successfully.")
+            conn.commit()
+            print("Source URL soft deleted successfully.")
     except psycopg2.Error as e:
         print(f"Database error: soft deleting source_url: {str(e)}", file=sys.stderr)
         traceback.print_exc()
-        if conn:
-            conn.rollback()
         raise
     except ValueError as e:
         print(f"Validation error: {str(e)}", file=sys.stderr)
-        if conn:
-            conn.rollback()
         raise
     except Exception as e:
         print(f"Unexpected error: soft deleting source_url: {str(e)}", file=sys.stderr)
         traceback.print_exc()
-        if conn:
-            conn.rollback()
         raise
-    finally:
-        if cursor:
-            cursor.close()
-        if conn:
-            conn.close()
 
 # write function to insert source_url, category and fetched_url into tbl_url
-import os
-import sys
-import traceback
-import psycopg2
-
 def insert_url(source_url, fetched_url):
-    conn = None
-    cursor = None
-
     try:
-        conn = psycopg2.connect(
-            dbname=os.getenv('DB_DATABASE'),
-            user=os.getenv('DB_USERNAME'),
-            password=os.getenv('DB_PASSWORD'),
-            host=os.getenv('DB_HOST'),
-            port=os.getenv('DB_PORT')
-        )
-        cursor = conn.cursor()
-
-        # First check if the URL already exists
-        check_url_query = """
-            SELECT fetched_url FROM tbl_urls WHERE fetched_url = %s
-        """
-        cursor.execute(check_url_query, (fetched_url,))
+        with get_connection() as conn, conn.cursor() as cursor:
+            # First check if the URL already exists
+            check_url_query = """
+                SELECT fetched_url FROM tbl_urls WHERE fetched_url = %s
+            """
+            cursor.execute(check_url_query, (fetched_url,))
         
-        if cursor.fetchone():
-            print(f"[SKIP] Fetched URL already exists: {fetched_url}")
-            return
+            if cursor.fetchone():
+                print(f"[SKIP] Fetched URL already exists: {fetched_url}")
+                return
         
-        # If URL doesn't exist, insert it
-        insert_url_query = """
-            INSERT INTO tbl_urls (source_url, fetched_url)
-            VALUES (%s, %s)
-        """
-        cursor.execute(insert_url_query, (source_url, fetched_url))
-        conn.commit()
+            # If URL doesn't exist, insert it
+            insert_url_query = """
+                INSERT INTO tbl_urls (source_url, fetched_url)
+                VALUES (%s, %s)
+            """
+            cursor.execute(insert_url_query, (source_url, fetched_url))
+            conn.commit()
+
+            print(f"[INSERTED] {fetched_url}")
 
-        print(f"[INSERTED] {fetched_url}")
+    except psycopg2.Error as e:
+        print(f"[DatabaseError] {str(e)}", file=sys.stderr)
+        traceback.print_exc()
+    except Exception as e:
+        print(f"[UnexpectedError] {str(e)}", file=sys.stderr)
+        traceback.print_exc()
+
+# make sure tbl_urls.fetched_url has a unique index so bulk inserts can use ON CONFLICT
+_fetched_url_index_checked = False
+_fetched_url_index_lock = threading.Lock()
+
+def ensure_fetched_url_unique_index():
+    global _fetched_url_index_checked
+    if _fetched_url_index_checked:
+        return
+    with _fetched_url_index_lock:
+        if _fetched_url_index_checked:
+            return
+        try:
+            with get_connection() as conn, conn.cursor() as cursor:
+                create_index_query = """
+                    CREATE UNIQUE INDEX IF NOT EXISTS tbl_urls_fetched_url_key ON tbl_urls (fetched_url)
+                """
+                cursor.execute(create_index_query)
+                conn.commit()
+        except psycopg2.IntegrityError as e:
+            # Existing duplicate rows block the index; insert_urls still skips known URLs via NOT EXISTS
+            print(f"Database integrity error: tbl_urls has duplicate fetched_url rows, "
+                  f"unique index not created: {str(e)}", file=sys.stderr)
+        except psycopg2.Error as e:
+            print(f"Database error: creating unique index on tbl_urls.fetched_url: {str(e)}", file=sys.stderr)
+            traceback.print_exc()
+        # Only try once per process either way
+        _fetched_url_index_checked = True
+
+# write function to insert many fetched urls of one source page in a single statement
+def insert_urls(source_url, fetched_urls):
+    """Bulk insert fetched URLs; returns {'inserted': [...], 'skipped': [...]}"""
+    # Dedupe while keeping the caller's ordering
+    unique_urls = list(dict.fromkeys(url for url in fetched_urls if url))
+    result = {'inserted': [], 'skipped': []}
+    if not unique_urls:
+        return result
+
+    ensure_fetched_url_unique_index()
+
+    try:
+        with get_connection() as conn, conn.cursor() as cursor:
+            # NOT EXISTS skips known URLs even without the unique index,
+            # ON CONFLICT covers rows inserted concurrently by another worker
+            insert_urls_query = """
+                INSERT INTO tbl_urls (source_url, fetched_url)
+                SELECT v.source_url, v.fetched_url
+                FROM (VALUES %s) AS v(source_url, fetched_url)
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM tbl_urls t WHERE t.fetched_url = v.fetched_url
+                )
+                ON CONFLICT DO NOTHING
+                RETURNING fetched_url
+            """
+            rows = psycopg2.extras.execute_values(
+                cursor,
+                insert_urls_query,
+                [(source_url, url) for url in unique_urls],
+                page_size=500,
+                fetch=True
+            )
+            conn.commit()
+
+        inserted = {row[0] for row in rows}
+        result['inserted'] = [url for url in unique_urls if url in inserted]
+        result['skipped'] = [url for url in unique_urls if url not in inserted]
+        print(f"[BULK INSERT] {source_url}: {len(result['inserted'])} inserted, {len(result['skipped'])} skipped")
+        return result
 
     except psycopg2.Error as e:
         print(f"[DatabaseError] {str(e)}", file=sys.stderr)
         traceback.print_exc()
-        if conn:
-            conn.rollback()
+        raise
     except Exception as e:
         print(f"[UnexpectedError] {str(e)}", file=sys.stderr)
         traceback.print_exc()
-        if conn:
-            conn.rollback()
-    finally:
-        if cursor:
-            cursor.close()
-        if conn:
-            conn.close()
+        raise
 
 # write function to get all urls from tbl_url
 def get_urls():
-    conn = None
-    cursor = None
-
+    ensure_parked_urls_table()
     try:
-        conn = psycopg2.connect(
-            dbname=os.getenv('DB_DATABASE'),
-            user=os.getenv('DB_USERNAME'),
-            password=os.getenv('DB_PASSWORD'),
-            host=os.getenv('DB_HOST'),
-            port=os.getenv('DB_PORT')
-        )
-        cursor = conn.cursor()
-
-        get_urls_query = """
-            SELECT DISTINCT fetched_url FROM tbl_urls WHERE blog_written = '0'
-        """
-        cursor.execute(get_urls_query)
-        result = cursor.fetchall()
-        return [item[0] for item in result]
+        with get_connection() as conn, conn.cursor() as cursor:
+            # URLs parked for quota exhaustion are skipped until their resume time
+            get_urls_query = """
+                SELECT DISTINCT u.fetched_url FROM tbl_urls u
+                WHERE u.blog_written = '0'
+                AND NOT EXISTS (
+                    SELECT 1 FROM tbl_parked_urls p WHERE p.fetched_url = u.fetched_url AND p.resume_at > %s
+                )
+            """
+            cursor.execute(get_urls_query, (datetime.now(),))
+            result = cursor.fetchall()
+            return [item[0] for item in result]
 
     except psycopg2.Error as e:
         print(f"Database error: getting urls from DB: {str(e)}", file=sys.stderr)
@@ -508,168 +387,150 @@ def get_urls():
         print(f"Unexpected error: getting urls from DB: {str(e)}", file=sys.stderr)
         traceback.print_exc()
         raise
-    finally:
-        if cursor:
-            cursor.close()
-        if conn:
-            conn.close()
 
 
 # write a function for soft delete a url
 def soft_delete_url(fetched_url, category):
-    conn = None
-    cursor = None
-    
+    ensure_parked_urls_table()
     try:
-        conn = psycopg2.connect(
-            dbname=os.getenv('DB_DATABASE'),
-            user=os.getenv('DB_USERNAME'),
-            password=os.getenv('DB_PASSWORD'),
-            host=os.getenv('DB_HOST'),
-            port=os.getenv('DB_PORT')
-        )
-        cursor = conn.cursor()
-
-        # Validate inputs
-        if not fetched_url or not isinstance(fetched_url, str):
-            raise ValueError("Fetched URL must be a non-empty string")
+        with get_connection() as conn, conn.cursor() as cursor:
+            # Validate inputs
+            if not fetched_url or not isinstance(fetched_url, str):
+                raise ValueError("Fetched URL must be a non-empty string")
         
-        if not category or not isinstance(category, str):
-            raise ValueError("Category must be a non-empty string")
-
-        # First check if the url exists
-        check_query = """
-            SELECT fetched_url FROM tbl_urls WHERE fetched_url = %s
-        """
-        cursor.execute(check_query, (fetched_url,))
-        if not cursor.fetchone():
-            raise ValueError(f"URL with ID {fetched_url} not found")
+            if not category or not isinstance(category, str):
+                raise ValueError("Category must be a non-empty string")
+
+            # First check if the url exists
+            check_query = """
+                SELECT fetched_url FROM tbl_urls WHERE fetched_url = %s
+            """
+            cursor.execute(check_query, (fetched_url,))
+            if not cursor.fetchone():
+                raise ValueError(f"URL with ID {fetched_url} not found")
         
-        soft_delete_url_query = """
-            UPDATE tbl_urls SET blog_written = '1', category = %s WHERE fetched_url = %s
-        """
-        cursor.execute(soft_delete_url_query, (category, fetched_url))
+            soft_delete_url_query = """
+                UPDATE tbl_urls SET blog_written = '1', category = %s WHERE fetched_url = %s
+            """
+            cursor.execute(soft_delete_url_query, (category, fetched_url))
         
-        if cursor.rowcount == 0:
-            raise ValueError(f"No URL was updated. URL ID {fetched_url} may not exist.")
+            if cursor.rowcount == 0:
+                raise ValueError(f"No URL was updated. URL ID {fetched_url} may not exist.")
+
+            # The URL is done, so it no longer needs a retry slot
+            cursor.execute("DELETE FROM tbl_parked_urls WHERE fetched_url = %s", (fetched_url,))
             
-        conn.commit()
-        print("URL soft deleted successfully.")
+            conn.commit()
+            print("URL soft deleted successfully.")
     except psycopg2.Error as e:
         print(f"Database error: soft deleting url: {str(e)}", file=sys.stderr)
         traceback.print_exc()
-        if conn:
-            conn.rollback()
         raise
     except ValueError as e:
         print(f"Validation error: {str(e)}", file=sys.stderr)
-        if conn:
-            conn.rollback()
         raise
     except Exception as e:
         print(f"Unexpected error: soft deleting url: {str(e)}", file=sys.stderr)
         traceback.print_exc()
-        if conn:
-            conn.rollback()
         raise
-    finally:
-        if cursor:
-            cursor.close()
-        if conn:
-            conn.close()
 
 
 def update_my_blog_url(fetched_url, my_blog_url):
-    conn = None
-    cursor = None
-    
     try:
-        conn = psycopg2.connect(
-            dbname=os.getenv('DB_DATABASE'),
-            user=os.getenv('DB_USERNAME'),
-            password=os.getenv('DB_PASSWORD'),
-            host=os.getenv('DB_HOST'),
-            port=os.getenv('DB_PORT')
-        )
-        cursor = conn.cursor()
-
-        # Validate inputs
-        if not fetched_url or not isinstance(fetched_url, str):
-            raise ValueError("Fetched URL must be a non-empty string")
+        with get_connection() as conn, conn.cursor() as cursor:
+            # Validate inputs
+            if not fetched_url or not isinstance(fetched_url, str):
+                raise ValueError("Fetched URL must be a non-empty string")
         
-        if not my_blog_url or not isinstance(my_blog_url, str):
-            raise ValueError("My blog URL must be a non-empty string")
+            if not my_blog_url or not isinstance(my_blog_url, str):
+                raise ValueError("My blog URL must be a non-empty string")
         
-        # Basic URL validation
-        if not my_blog_url.startswith(('http://', 'https://')):
-            raise ValueError("My blog URL must start with http:// or https://")
-
-        # First check if the url exists
-        check_query = """
-            SELECT fetched_url FROM tbl_urls WHERE fetched_url = %s
-        """
-        cursor.execute(check_query, (fetched_url,))
-        if not cursor.fetchone():
-            raise ValueError(f"URL with ID {fetched_url} not found")
+            # Basic URL validation
+            if not my_blog_url.startswith(('http://', 'https://')):
+                raise ValueError("My blog URL must start with http:// or https://")
+
+            # First check if the url exists
+            check_query = """
+                SELECT fetched_url FROM tbl_urls WHERE fetched_url = %s
+            """
+            cursor.execute(check_query, (fetched_url,))
+            if not cursor.fetchone():
+                raise ValueError(f"URL with ID {fetched_url} not found")
         
-        update_my_blog_url_query = """
-            UPDATE tbl_urls SET my_blog_url = %s, blog_written_at = NOW() WHERE fetched_url = %s
-        """
-        cursor.execute(update_my_blog_url_query, (my_blog_url, fetched_url))
+            update_my_blog_url_query = """
+                UPDATE tbl_urls SET my_blog_url = %s, blog_written_at = NOW() WHERE fetched_url = %s
+            """
+            cursor.execute(update_my_blog_url_query, (my_blog_url, fetched_url))
         
-        if cursor.rowcount == 0:
-            raise ValueError(f"No URL was updated. URL ID {fetched_url} may not exist or my blog url is already set.")
+            if cursor.rowcount == 0:
+                raise ValueError(f"No URL was updated. URL ID {fetched_url} may not exist or my blog url is already set.")
             
-        conn.commit()
-        print("My blog url updated successfully.")
+            conn.commit()
+            print("My blog url updated successfully.")
     except psycopg2.Error as e:
         print(f"Database error: updating my blog url: {str(e)}", file=sys.stderr)
         traceback.print_exc()
-        if conn:
-            conn.rollback()
         raise
     except ValueError as e:
         print(f"Validation error: {str(e)}", file=sys.stderr)
-        if conn:
-            conn.rollback()
         raise
     except Exception as e:
         print(f"Unexpected error: updating my blog url: {str(e)}", file=sys.stderr)
         traceback.print_exc()
-        if conn:
-            conn.rollback()
         raise
-    finally:
-        if cursor:
-            cursor.close()
-        if conn:
-            conn.close()
+
+
+def update_published_urls(rows):
+    """
+    Mark a publish batch as written in one transaction. rows are
+    (fetched_url, my_blog_url or None when the post failed, category); returns the
+    number of tbl_urls rows updated.
+    """
+    rows = [row for row in rows if row[0]]
+    if not rows:
+        return 0
+    ensure_parked_urls_table()
+    try:
+        with get_connection() as conn, conn.cursor() as cursor:
+            update_published_urls_query = """
+                UPDATE tbl_urls AS t SET
+                    blog_written = '1',
+                    category = v.category,
+                    my_blog_url = COALESCE(v.my_blog_url, t.my_blog_url),
+                    blog_written_at = CASE WHEN v.my_blog_url IS NULL THEN t.blog_written_at ELSE NOW() END
+                FROM (VALUES %s) AS v(fetched_url, my_blog_url, category)
+                WHERE t.fetched_url = v.fetched_url
+                RETURNING t.fetched_url
+            """
+            updated = psycopg2.extras.execute_values(
+                cursor, update_published_urls_query, rows, template="(%s, %s::text, %s)", fetch=True
+            )
+            # Done, so they no longer need a retry slot
+            cursor.execute("DELETE FROM tbl_parked_urls WHERE fetched_url = ANY(%s)", ([row[0] for row in rows],))
+            conn.commit()
+
+        missing = len(rows) - len(updated)
+        print(f"Updated {len(updated)} published URL(s)" + (f", {missing} not found." if missing else "."))
+        return len(updated)
+    except psycopg2.Error as e:
+        print(f"Database error: updating published urls: {str(e)}", file=sys.stderr)
+        traceback.print_exc()
+        raise
 
 
 # write a function to get source_url fetched_url and my_blog_url and blog_written_at
 def get_source_url_fetched_url_and_my_blog_url():
-    conn = None
-    cursor = None
-    
     try:
-        conn = psycopg2.connect(
-            dbname=os.getenv('DB_DATABASE'),
-            user=os.getenv('DB_USERNAME'),
-            password=os.getenv('DB_PASSWORD'),
-            host=os.getenv('DB_HOST'),
-            port=os.getenv('DB_PORT')
-        )
-        cursor = conn.cursor()
-
-        get_source_url_fetched_url_and_my_blog_url_query = """
-            SELECT source_url, fetched_url, my_blog_url, blog_written_at, category, created_at 
-            FROM tbl_urls 
-            WHERE blog_written = '1'
-            ORDER BY blog_written_at DESC
-        """
-        cursor.execute(get_source_url_fetched_url_and_my_blog_url_query)
-        result = cursor.fetchall()
-        return result
+        with get_connection() as conn, conn.cursor() as cursor:
+            get_source_url_fetched_url_and_my_blog_url_query = """
+                SELECT source_url, fetched_url, my_blog_url, blog_written_at, category, created_at 
+                FROM tbl_urls 
+                WHERE blog_written = '1'
+                ORDER BY blog_written_at DESC
+            """
+            cursor.execute(get_source_url_fetched_url_and_my_blog_url_query)
+            result = cursor.fetchall()
+            return result
     except psycopg2.Error as e:
         print(f"Database error: getting source_url fetched_url and my_blog_url and blog_written_at from DB: {str(e)}", file=sys.stderr)
         traceback.print_exc()
@@ -678,10 +539,357 @@ def get_source_url_fetched_url_and_my_blog_url():
         print(f"Unexpected error: getting source_url fetched_url and my_blog_url and blog_written_at from DB: {str(e)}", file=sys.stderr)
         traceback.print_exc()
         raise
-    finally:
-        if cursor:
-            cursor.close()
-        if conn:
-            conn.close()
+
+# keep the HTTP validators of every crawled page so unchanged pages can be skipped
+_source_fetch_state_table_checked = False
+_source_fetch_state_table_lock = threading.Lock()
+
+def ensure_source_fetch_state_table():
+    global _source_fetch_state_table_checked
+    if _source_fetch_state_table_checked:
+        return
+    with _source_fetch_state_table_lock:
+        if _source_fetch_state_table_checked:
+            return
+        try:
+            with get_connection() as conn, conn.cursor() as cursor:
+                create_table_query = """
+                    CREATE TABLE IF NOT EXISTS tbl_source_fetch_state (
+                        fetch_url TEXT PRIMARY KEY,
+                        etag TEXT,
+                        last_modified TEXT,
+                        content_hash TEXT,
+                        updated_at TIMESTAMP DEFAULT NOW()
+                    )
+                """
+                cursor.execute(create_table_query)
+                # feed_url: NULL = not discovered yet, '' = source has no feed
+                add_feed_url_query = """
+                    ALTER TABLE tbl_source_fetch_state ADD COLUMN IF NOT EXISTS feed_url TEXT
+                """
+                cursor.execute(add_feed_url_query)
+                conn.commit()
+            _source_fetch_state_table_checked = True
+        except psycopg2.Error as e:
+            print(f"Database error: creating tbl_source_fetch_state: {str(e)}", file=sys.stderr)
+            traceback.print_exc()
+            raise
+
+# write a function to get the stored etag, last_modified, content_hash and feed_url of a fetched page
+def get_source_fetch_state(fetch_url):
+    ensure_source_fetch_state_table()
+    try:
+        with get_connection() as conn, conn.cursor() as cursor:
+            get_state_query = """
+                SELECT etag, last_modified, content_hash, feed_url FROM tbl_source_fetch_state WHERE fetch_url = %s
+            """
+            cursor.execute(get_state_query, (fetch_url,))
+            row = cursor.fetchone()
+            if not row:
+                return None
+            return {'etag': row[0], 'last_modified': row[1], 'content_hash': row[2], 'feed_url': row[3]}
+    except psycopg2.Error as e:
+        print(f"Database error: getting fetch state for {fetch_url}: {str(e)}", file=sys.stderr)
+        traceback.print_exc()
+        raise
+
+# write a function to save the etag, last_modified and content_hash of a fetched page
+def update_source_fetch_state(fetch_url, etag, last_modified, content_hash):
+    ensure_source_fetch_state_table()
+    try:
+        with get_connection() as conn, conn.cursor() as cursor:
+            upsert_state_query = """
+                INSERT INTO tbl_source_fetch_state (fetch_url, etag, last_modified, content_hash, updated_at)
+                VALUES (%s, %s, %s, %s, NOW())
+                ON CONFLICT (fetch_url) DO UPDATE SET
+                    etag = EXCLUDED.etag,
+                    last_modified = EXCLUDED.last_modified,
+                    content_hash = EXCLUDED.content_hash,
+                    updated_at = NOW()
+            """
+            cursor.execute(upsert_state_query, (fetch_url, etag, last_modified, content_hash))
+            conn.commit()
+    except psycopg2.Error as e:
+        print(f"Database error: saving fetch state for {fetch_url}: {str(e)}", file=sys.stderr)
+        traceback.print_exc()
+        raise
+
+# write a function to remember the RSS/Atom feed of a source ('' = no feed, None = rediscover)
+def set_source_feed_url(fetch_url, feed_url):
+    ensure_source_fetch_state_table()
+    try:
+        with get_connection() as conn, conn.cursor() as cursor:
+            upsert_feed_url_query = """
+                INSERT INTO tbl_source_fetch_state (fetch_url, feed_url, updated_at)
+                VALUES (%s, %s, NOW())
+                ON CONFLICT (fetch_url) DO UPDATE SET feed_url = EXCLUDED.feed_url, updated_at = NOW()
+            """
+            cursor.execute(upsert_feed_url_query, (fetch_url, feed_url))
+            conn.commit()
+    except psycopg2.Error as e:
+        print(f"Database error: saving feed url for {fetch_url}: {str(e)}", file=sys.stderr)
+        traceback.print_exc()
+        raise
+
+# make sure the retry queue for URLs parked by quota exhaustion exists
+_parked_urls_table_checked = False
+_parked_urls_table_lock = threading.Lock()
+
+def ensure_parked_urls_table():
+    global _parked_urls_table_checked
+    if _parked_urls_table_checked:
+        return
+    with _parked_urls_table_lock:
+        if _parked_urls_table_checked:
+            return
+        try:
+            with get_connection() as conn, conn.cursor() as cursor:
+                create_table_query = """
+                    CREATE TABLE IF NOT EXISTS tbl_parked_urls (
+                        fetched_url TEXT PRIMARY KEY,
+                        resume_at TIMESTAMP NOT NULL,
+                        reason TEXT,
+                        attempts INTEGER NOT NULL DEFAULT 1,
+                        parked_at TIMESTAMP DEFAULT NOW()
+                    )
+                """
+                cursor.execute(create_table_query)
+                conn.commit()
+            _parked_urls_table_checked = True
+        except psycopg2.Error as e:
+            print(f"Database error: creating tbl_parked_urls: {str(e)}", file=sys.stderr)
+            traceback.print_exc()
+            raise
+
+# write a function to park urls until resume_at (re-parking pushes resume_at and counts the attempt)
+def park_urls(fetched_urls, resume_at, reason=None):
+    unique_urls = list(dict.fromkeys(url for url in fetched_urls if url))
+    if not unique_urls:
+        return 0
+    ensure_parked_urls_table()
+    try:
+        with get_connection() as conn, conn.cursor() as cursor:
+            park_urls_query = """
+                INSERT INTO tbl_parked_urls (fetched_url, resume_at, reason)
+                VALUES %s
+                ON CONFLICT (fetched_url) DO UPDATE SET
+                    resume_at = EXCLUDED.resume_at,
+                    reason = EXCLUDED.reason,
+                    attempts = tbl_parked_urls.attempts + 1,
+                    parked_at = NOW()
+            """
+            psycopg2.extras.execute_values(
+                cursor, park_urls_query, [(url, resume_at, reason) for url in unique_urls]
+            )
+            conn.commit()
+            print(f"Parked {len(unique_urls)} URL(s) until {resume_at}.")
+            return len(unique_urls)
+    except psycopg2.Error as e:
+        print(f"Database error: parking urls: {str(e)}", file=sys.stderr)
+        traceback.print_exc()
+        raise
+
+# write a function to get the earliest resume time of parked urls after a given time
+def get_next_parked_resume_at(after=None):
+    ensure_parked_urls_table()
+    try:
+        with get_connection() as conn, conn.cursor() as cursor:
+            next_resume_query = """
+                SELECT MIN(resume_at) FROM tbl_parked_urls WHERE resume_at > %s
+            """
+            cursor.execute(next_resume_query, (after or datetime.now(),))
+            row = cursor.fetchone()
+            return row[0] if row else None
+    except psycopg2.Error as e:
+        print(f"Database error: getting next parked resume time: {str(e)}", file=sys.stderr)
+        traceback.print_exc()
+        raise
+
+# make sure tbl_urls records who made the tech decision and what the pre-filter scored
+_tech_label_schema_checked = False
+_tech_label_schema_lock = threading.Lock()
+
+def ensure_tech_label_schema():
+    global _tech_label_schema_checked
+    if _tech_label_schema_checked:
+        return
+    with _tech_label_schema_lock:
+        if _tech_label_schema_checked:
+            return
+        try:
+            with get_connection() as conn, conn.cursor() as cursor:
+                # label_source: 'llm' when Gemini made the tech decision, 'prefilter' when the local pre-filter did,
+                # 'fallback' when Gemini failed and the default answer was used
+                alter_urls_query = """
+                    ALTER TABLE tbl_urls
+                        ADD COLUMN IF NOT EXISTS label_source TEXT,
+                        ADD COLUMN IF NOT EXISTS prefilter_probability REAL
+                """
+                cursor.execute(alter_urls_query)
+                conn.commit()
+            _tech_label_schema_checked = True
+        except psycopg2.Error as e:
+            print(f"Database error: creating tech label schema: {str(e)}", file=sys.stderr)
+            traceback.print_exc()
+            raise
+
+# write a function to record who made a url's tech decision and the pre-filter probability for it
+def record_tech_decision(fetched_url, label_source, prefilter_probability=None):
+    ensure_tech_label_schema()
+    try:
+        with get_connection() as conn, conn.cursor() as cursor:
+            record_decision_query = """
+                UPDATE tbl_urls SET label_source = %s, prefilter_probability = %s WHERE fetched_url = %s
+            """
+            cursor.execute(record_decision_query, (label_source, prefilter_probability, fetched_url))
+            conn.commit()
+    except psycopg2.Error as e:
+        print(f"Database error: recording tech decision: {str(e)}", file=sys.stderr)
+        traceback.print_exc()
+        raise
+
+# write a function to get fetched urls whose tech decision Gemini made (for the tech pre-filter)
+def get_labeled_urls():
+    ensure_tech_label_schema()
+    try:
+        with get_connection() as conn, conn.cursor() as cursor:
+            # Pre-filter decisions are left out so the classifier never trains on its own output
+            get_labeled_urls_query = """
+                SELECT fetched_url, category, prefilter_probability FROM tbl_urls
+                WHERE blog_written = '1' AND category IS NOT NULL AND category != ''
+                AND category != 'DUPLICATE' AND label_source = 'llm'
+            """
+            cursor.execute(get_labeled_urls_query)
+            return cursor.fetchall()
+    except psycopg2.Error as e:
+        print(f"Database error: getting labeled urls from DB: {str(e)}", file=sys.stderr)
+        traceback.print_exc()
+        raise
+
+# make sure tbl_urls can hold article fingerprints and the LSH index table exists
+_article_fingerprint_schema_checked = False
+_article_fingerprint_schema_lock = threading.Lock()
+
+def ensure_article_fingerprint_schema():
+    global _article_fingerprint_schema_checked
+    if _article_fingerprint_schema_checked:
+        return
+    with _article_fingerprint_schema_lock:
+        if _article_fingerprint_schema_checked:
+            return
+        try:
+            with get_connection() as conn, conn.cursor() as cursor:
+                alter_urls_query = """
+                    ALTER TABLE tbl_urls
+                        ADD COLUMN IF NOT EXISTS minhash TEXT,
+                        ADD COLUMN IF NOT EXISTS fingerprinted_at TIMESTAMP,
+                        ADD COLUMN IF NOT EXISTS duplicate_of TEXT
+                """
+                cursor.execute(alter_urls_query)
+                create_lsh_query = """
+                    CREATE TABLE IF NOT EXISTS tbl_url_lsh (
+                        band SMALLINT NOT NULL,
+                        bucket TEXT NOT NULL,
+                        fetched_url TEXT NOT NULL,
+                        created_at TIMESTAMP NOT NULL,
+                        PRIMARY KEY (band, bucket, fetched_url)
+                    )
+                """
+                cursor.execute(create_lsh_query)
+                cursor.execute("CREATE INDEX IF NOT EXISTS tbl_url_lsh_created_at ON tbl_url_lsh (created_at)")
+                conn.commit()
+            _article_fingerprint_schema_checked = True
+        except psycopg2.Error as e:
+            print(f"Database error: creating article fingerprint schema: {str(e)}", file=sys.stderr)
+            traceback.print_exc()
+            raise
+
+# write a function to get published or in-flight urls sharing an LSH bucket with the given band keys
+def find_lsh_candidates(band_keys, since, exclude_url):
+    if not band_keys:
+        return []
+    ensure_article_fingerprint_schema()
+    ensure_parked_urls_table()
+    try:
+        with get_connection() as conn, conn.cursor() as cursor:
+            # In-flight: fingerprinted but not yet written, parked or rejected, so a copy
+            # fetched in the same cycle as its original is caught too
+            find_candidates_query = """
+                SELECT DISTINCT u.fetched_url, u.minhash
+                FROM tbl_url_lsh l
+                JOIN tbl_urls u ON u.fetched_url = l.fetched_url
+                WHERE (l.band, l.bucket) IN %s
+                AND l.created_at > %s
+                AND l.fetched_url != %s
+                AND u.minhash IS NOT NULL
+                AND (
+                    u.my_blog_url IS NOT NULL
+                    OR (
+                        COALESCE(u.blog_written, '0') = '0'
+                        AND COALESCE(u.category, '') != 'NOT_TECH_RELATED'
+                        AND NOT EXISTS (SELECT 1 FROM tbl_parked_urls p WHERE p.fetched_url = u.fetched_url)
+                    )
+                )
+            """
+            cursor.execute(find_candidates_query, (tuple(band_keys), since, exclude_url))
+            return cursor.fetchall()
+    except psycopg2.Error as e:
+        print(f"Database error: finding near-duplicate candidates: {str(e)}", file=sys.stderr)
+        traceback.print_exc()
+        raise
+
+# write a function to store an article's minhash and its LSH band keys in one transaction
+def save_article_fingerprint(fetched_url, minhash, band_keys, created_at):
+    ensure_article_fingerprint_schema()
+    try:
+        with get_connection() as conn, conn.cursor() as cursor:
+            update_fingerprint_query = """
+                UPDATE tbl_urls SET minhash = %s, fingerprinted_at = %s WHERE fetched_url = %s
+            """
+            cursor.execute(update_fingerprint_query, (minhash, created_at, fetched_url))
+            insert_lsh_query = """
+                INSERT INTO tbl_url_lsh (band, bucket, fetched_url, created_at) VALUES %s
+                ON CONFLICT (band, bucket, fetched_url) DO UPDATE SET created_at = EXCLUDED.created_at
+            """
+            psycopg2.extras.execute_values(
+                cursor, insert_lsh_query, [(band, bucket, fetched_url, created_at) for band, bucket in band_keys]
+            )
+            conn.commit()
+    except psycopg2.Error as e:
+        print(f"Database error: saving article fingerprint: {str(e)}", file=sys.stderr)
+        traceback.print_exc()
+        raise
+
+# write a function to mark a url as a near-duplicate of an earlier article
+def mark_url_duplicate(fetched_url, original_url):
+    ensure_article_fingerprint_schema()
+    ensure_parked_urls_table()
+    try:
+        with get_connection() as conn, conn.cursor() as cursor:
+            mark_duplicate_query = """
+                UPDATE tbl_urls SET blog_written = '1', category = 'DUPLICATE', duplicate_of = %s
+                WHERE fetched_url = %s
+            """
+            cursor.execute(mark_duplicate_query, (original_url, fetched_url))
+            cursor.execute("DELETE FROM tbl_parked_urls WHERE fetched_url = %s", (fetched_url,))
+            conn.commit()
+    except psycopg2.Error as e:
+        print(f"Database error: marking url as duplicate: {str(e)}", file=sys.stderr)
+        traceback.print_exc()
+        raise
+
+# write a function to drop LSH index entries older than the dedup window
+def prune_lsh_index(before):
+    ensure_article_fingerprint_schema()
+    try:
+        with get_connection() as conn, conn.cursor() as cursor:
+            cursor.execute("DELETE FROM tbl_url_lsh WHERE created_at < %s", (before,))
+            deleted = cursor.rowcount
+            conn.commit()
+            return deleted
+    except psycopg2.Error as e:
+        print(f"Database error: pruning LSH index: {str(e)}", file=sys.stderr)
+        traceback.print_exc()
+        raise
 
 # write a function 
\ No newline at end of file
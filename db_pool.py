@@ -0,0 +1,289 @@
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+import psycopg2
+import psycopg2.extensions
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Pool sizing: gunicorn runs 4 sync workers (one request thread each) and the
+# scheduler adds a handful of scraping threads per process.
+DB_POOL_MIN_SIZE = int(os.getenv('DB_POOL_MIN_SIZE', '1'))
+DB_POOL_MAX_SIZE = int(os.getenv('DB_POOL_MAX_SIZE', '8'))
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', '30'))  # seconds to wait for a free connection
+DB_POOL_MAX_USES = int(os.getenv('DB_POOL_MAX_USES', '500'))  # recycle after this many checkouts
+DB_POOL_MAX_AGE = float(os.getenv('DB_POOL_MAX_AGE', '1800'))  # recycle after this many seconds
+DB_POOL_HEALTH_CHECK_AFTER = float(os.getenv('DB_POOL_HEALTH_CHECK_AFTER', '30'))  # idle seconds before "SELECT 1"
+
+
+class PoolTimeoutError(Exception):
+    """Raised when no connection becomes available within the pool timeout"""
+
+
+class _PooledConnection:
+    """A raw psycopg2 connection plus the bookkeeping needed for recycling"""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.created_at = time.monotonic()
+        self.last_used_at = self.created_at
+        self.uses = 0
+
+
+class ConnectionPool:
+    """Thread-safe PostgreSQL connection pool with health checks and recycling"""
+
+    def __init__(self, min_size=DB_POOL_MIN_SIZE, max_size=DB_POOL_MAX_SIZE, timeout=DB_POOL_TIMEOUT,
+                 max_uses=DB_POOL_MAX_USES, max_age=DB_POOL_MAX_AGE,
+                 health_check_after=DB_POOL_HEALTH_CHECK_AFTER):
+        if max_size < 1 or min_size < 0 or min_size > max_size:
+            raise ValueError(f"Invalid pool size: min={min_size}, max={max_size}")
+
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_uses = max_uses
+        self.max_age = max_age
+        self.health_check_after = health_check_after
+
+        self._idle = []  # LIFO stack of _PooledConnection
+        self._size = 0  # open connections, idle + checked out
+        self._cond = threading.Condition()
+        self._pid = os.getpid()
+
+        # Statistics
+        self._checkouts = 0
+        self._waits = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        self._created = 0
+        self._recycled = 0
+        self._failed_health_checks = 0
+        self._timeouts = 0
+        self._in_use = 0
+        self._peak_in_use = 0
+
+    def _connect(self):
+        conn = psycopg2.connect(
+            dbname=os.getenv('DB_DATABASE'),
+            user=os.getenv('DB_USERNAME'),
+            password=os.getenv('DB_PASSWORD'),
+            host=os.getenv('DB_HOST'),
+            port=os.getenv('DB_PORT')
+        )
+        with self._cond:
+            self._created += 1
+        return _PooledConnection(conn)
+
+    def _close(self, pooled):
+        try:
+            pooled.conn.close()
+        except Exception:
+            pass
+
+    def _is_expired(self, pooled):
+        if self.max_uses and pooled.uses >= self.max_uses:
+            return True
+        if self.max_age and time.monotonic() - pooled.created_at >= self.max_age:
+            return True
+        return False
+
+    def _is_healthy(self, pooled):
+        conn = pooled.conn
+        if conn.closed:
+            return False
+        # Only ping connections that have been sitting idle for a while
+        if time.monotonic() - pooled.last_used_at < self.health_check_after:
+            return True
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except Exception:
+            return False
+
+    def _reset_after_fork(self):
+        """Drop connections inherited from a parent process (gunicorn preload_app)"""
+        if os.getpid() != self._pid:
+            self._pid = os.getpid()
+            self._idle = []
+            self._size = 0
+            self._in_use = 0
+
+    def _acquire(self):
+        start = time.monotonic()
+        deadline = start + self.timeout
+        waited = False
+
+        with self._cond:
+            self._reset_after_fork()
+            while True:
+                if self._idle:
+                    pooled = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    self._size += 1
+                    pooled = None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise PoolTimeoutError(
+                        f"Timed out after {self.timeout:.0f}s waiting for a database connection "
+                        f"(max_size={self.max_size})"
+                    )
+                waited = True
+                self._cond.wait(remaining)
+
+        # Connect / health check outside the lock so other threads are not blocked
+        try:
+            if pooled is not None:
+                expired = self._is_expired(pooled)
+                if expired or not self._is_healthy(pooled):
+                    with self._cond:
+                        if expired:
+                            self._recycled += 1
+                        else:
+                            self._failed_health_checks += 1
+                    self._close(pooled)
+                    pooled = None
+            if pooled is None:
+                pooled = self._connect()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+
+        wait_time = time.monotonic() - start
+        with self._cond:
+            self._checkouts += 1
+            if waited:
+                self._waits += 1
+            self._total_wait += wait_time
+            self._max_wait = max(self._max_wait, wait_time)
+            self._in_use += 1
+            self._peak_in_use = max(self._peak_in_use, self._in_use)
+
+        pooled.uses += 1
+        return pooled
+
+    def _release(self, pooled, discard=False):
+        conn = pooled.conn
+        if not discard and not conn.closed:
+            try:
+                # Never hand out a connection with an open transaction
+                if conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            except Exception:
+                discard = True
+        if conn.closed:
+            discard = True
+
+        pooled.last_used_at = time.monotonic()
+        with self._cond:
+            self._in_use = max(0, self._in_use - 1)
+            if os.getpid() != self._pid:
+                # Connection belongs to another process; just drop it
+                return
+            if discard or self._is_expired(pooled):
+                if not discard:
+                    self._recycled += 1
+                self._size -= 1
+                self._close(pooled)
+            else:
+                self._idle.append(pooled)
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self):
+        """Check out a connection; it is rolled back and returned to the pool on exit"""
+        pooled = self._acquire()
+        discard = False
+        try:
+            yield pooled.conn
+        except (psycopg2.InterfaceError, psycopg2.OperationalError):
+            # The connection itself is probably broken; do not reuse it
+            discard = True
+            raise
+        finally:
+            self._release(pooled, discard=discard)
+
+    def prefill(self):
+        """Open min_size connections up front"""
+        with self._cond:
+            self._reset_after_fork()
+            missing = max(0, self.min_size - self._size)
+            self._size += missing
+        for _ in range(missing):
+            try:
+                pooled = self._connect()
+            except Exception as e:
+                with self._cond:
+                    self._size -= 1
+                print(f"[DBPool] Error pre-filling connection pool: {e}", file=sys.stderr)
+                continue
+            with self._cond:
+                self._idle.append(pooled)
+                self._cond.notify()
+
+    def close_all(self):
+        """Close every idle connection (checked-out connections close on release)"""
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+        for pooled in idle:
+            self._close(pooled)
+
+    def stats(self):
+        """Return a snapshot of pool usage for sizing"""
+        with self._cond:
+            return {
+                'pid': self._pid,
+                'min_size': self.min_size,
+                'max_size': self.max_size,
+                'size': self._size,
+                'idle': len(self._idle),
+                'in_use': self._in_use,
+                'peak_in_use': self._peak_in_use,
+                'checkouts': self._checkouts,
+                'waits': self._waits,
+                'timeouts': self._timeouts,
+                'total_wait_seconds': round(self._total_wait, 4),
+                'avg_wait_seconds': round(self._total_wait / self._checkouts, 6) if self._checkouts else 0.0,
+                'max_wait_seconds': round(self._max_wait, 4),
+                'connections_created': self._created,
+                'connections_recycled': self._recycled,
+                'failed_health_checks': self._failed_health_checks,
+            }
+
+
+# Process-wide pool, created lazily so gunicorn's preloaded master never holds sockets
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool()
+    return _pool
+
+
+@contextmanager
+def get_connection():
+    """Context manager used by every dbOperations function to borrow a connection"""
+    with get_pool().connection() as conn:
+        yield conn
+
+
+def get_pool_stats():
+    return get_pool().stats()
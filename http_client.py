@@ -0,0 +1,186 @@
+import bisect
+import os
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+import requests
+from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+
+# Load environment variables
+load_dotenv()
+
+# Shared outbound HTTP: one pooled keep-alive session per host (WordPress, Unsplash,
+# the crawled sources), explicit timeouts, retries and per-host latency histograms.
+HTTP_POOL_SIZE = int(os.getenv('HTTP_POOL_SIZE', '10'))  # kept-alive connections per host
+HTTP_CONNECT_TIMEOUT = float(os.getenv('HTTP_CONNECT_TIMEOUT', '5'))
+HTTP_READ_TIMEOUT = float(os.getenv('HTTP_READ_TIMEOUT', '30'))
+HTTP_MAX_RETRIES = int(os.getenv('HTTP_MAX_RETRIES', '3'))
+HTTP_BACKOFF_SECONDS = float(os.getenv('HTTP_BACKOFF_SECONDS', '0.5'))  # doubled per attempt
+HTTP_MAX_BACKOFF_SECONDS = 30
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Only these can be repeated after a 5xx or a dropped connection without side effects.
+# POST (new post, media upload) is retried only on 429 and connect timeouts, when the
+# server has certainly not acted on it.
+IDEMPOTENT_METHODS = {'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'}
+
+# Histogram bucket upper bounds in milliseconds; the last bucket is everything slower
+LATENCY_BUCKETS_MS = [50, 100, 250, 500, 1000, 2500, 5000, 10000]
+
+
+class _HostStats:
+    def __init__(self):
+        self.requests = 0
+        self.retries = 0
+        self.errors = 0
+        self.statuses = {}
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, elapsed_ms, status):
+        self.requests += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.buckets[bisect.bisect_left(LATENCY_BUCKETS_MS, elapsed_ms)] += 1
+        key = str(status) if status is not None else 'error'
+        self.statuses[key] = self.statuses.get(key, 0) + 1
+
+    def as_dict(self):
+        labels = [f"<={bound}ms" for bound in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]}ms"]
+        return {
+            'requests': self.requests,
+            'retries': self.retries,
+            'errors': self.errors,
+            'statuses': dict(self.statuses),
+            'avg_ms': round(self.total_ms / self.requests, 1) if self.requests else 0.0,
+            'max_ms': round(self.max_ms, 1),
+            'latency_histogram': dict(zip(labels, self.buckets)),
+        }
+
+
+class HTTPClient:
+    """Per-host requests sessions with keep-alive pools, timeouts and retry with backoff"""
+
+    def __init__(self, pool_size=HTTP_POOL_SIZE, timeout=(HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT),
+                 max_retries=HTTP_MAX_RETRIES, backoff=HTTP_BACKOFF_SECONDS):
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self._lock = threading.Lock()
+        self._sessions = {}
+        self._stats = {}
+        self._pid = os.getpid()
+
+    def _session(self, host):
+        with self._lock:
+            # Pooled sockets must not be shared across a fork (gunicorn workers)
+            if self._pid != os.getpid():
+                self._sessions = {}
+                self._stats = {}
+                self._pid = os.getpid()
+            session = self._sessions.get(host)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, max_retries=0)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                self._sessions[host] = session
+                self._stats[host] = _HostStats()
+            return session, self._stats[host]
+
+    def _retry_delay(self, attempt, response=None):
+        if response is not None:
+            retry_after = response.headers.get('Retry-After')
+            if retry_after:
+                try:
+                    return min(HTTP_MAX_BACKOFF_SECONDS, max(0.0, float(retry_after)))
+                except ValueError:
+                    try:
+                        seconds = parsedate_to_datetime(retry_after).timestamp() - time.time()
+                        return min(HTTP_MAX_BACKOFF_SECONDS, max(0.0, seconds))
+                    except (TypeError, ValueError):
+                        pass
+        # Exponential backoff with jitter so parallel workers do not retry in step
+        delay = self.backoff * (2 ** attempt)
+        return min(HTTP_MAX_BACKOFF_SECONDS, delay * random.uniform(0.5, 1.0))
+
+    def request(self, method, url, timeout=None, retries=None, **kwargs):
+        """
+        requests.request through the host's pooled session. Returns the last response,
+        even a retried 5xx/429, so callers keep checking status codes as before;
+        connection errors and timeouts are raised once retries are used up.
+        """
+        method = method.upper()
+        host = urlparse(url).netloc.lower()
+        session, stats = self._session(host)
+        retries = self.max_retries if retries is None else retries
+        idempotent = method in IDEMPOTENT_METHODS
+
+        attempt = 0
+        while True:
+            start = time.monotonic()
+            try:
+                response = session.request(method, url, timeout=timeout or self.timeout, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                elapsed_ms = (time.monotonic() - start) * 1000
+                with self._lock:
+                    stats.observe(elapsed_ms, None)
+                    stats.errors += 1
+                safe_to_retry = idempotent or isinstance(e, requests.ConnectTimeout)
+                if attempt >= retries or not safe_to_retry:
+                    raise
+                delay = self._retry_delay(attempt)
+                print(f"[HTTP] {method} {host} failed ({type(e).__name__}), retrying in {delay:.1f}s")
+            else:
+                elapsed_ms = (time.monotonic() - start) * 1000
+                with self._lock:
+                    stats.observe(elapsed_ms, response.status_code)
+                status = response.status_code
+                retryable = status in RETRY_STATUSES and (idempotent or status == 429)
+                if not retryable or attempt >= retries:
+                    return response
+                delay = self._retry_delay(attempt, response)
+                print(f"[HTTP] {method} {host} returned {status}, retrying in {delay:.1f}s")
+                response.close()
+            with self._lock:
+                stats.retries += 1
+            time.sleep(delay)
+            attempt += 1
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'pool_size': self.pool_size,
+                'timeout': list(self.timeout),
+                'hosts': {host: stats.as_dict() for host, stats in self._stats.items()},
+            }
+
+
+# Process-wide client
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_http_client():
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = HTTPClient()
+    return _client
+
+
+def get_http_stats():
+    return get_http_client().stats()
@@ -0,0 +1,158 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Featured images: which Unsplash photo / file content is already in the WordPress
+# media library (so a repeat pick reuses its media id instead of uploading again),
+# plus Unsplash search results per normalized query, because the demo key only
+# allows 50 requests an hour.
+IMAGE_CACHE_ENABLED = os.getenv('IMAGE_CACHE_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+IMAGE_CACHE_PATH = os.getenv('IMAGE_CACHE_PATH', 'image_cache.sqlite3')
+IMAGE_SEARCH_TTL = float(os.getenv('IMAGE_SEARCH_TTL', str(24 * 3600)))  # seconds
+# Queries with no results are retried sooner
+IMAGE_EMPTY_SEARCH_TTL = float(os.getenv('IMAGE_EMPTY_SEARCH_TTL', str(6 * 3600)))
+
+
+def normalize_query(query):
+    return ' '.join((query or '').lower().split())
+
+
+class ImageCache:
+    """SQLite index: Unsplash photo id / content hash -> WordPress media, and search results"""
+
+    def __init__(self, path=IMAGE_CACHE_PATH, search_ttl=IMAGE_SEARCH_TTL, empty_search_ttl=IMAGE_EMPTY_SEARCH_TTL):
+        self.path = path
+        self.search_ttl = search_ttl
+        self.empty_search_ttl = empty_search_ttl
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+        self._stats = {'search_hits': 0, 'search_misses': 0, 'media_reused': 0, 'media_stored': 0,
+                       'media_forgotten': 0}
+
+    def _connection(self):
+        # A connection must not cross a fork
+        if self._conn is None or self._pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS unsplash_search (
+                    query TEXT PRIMARY KEY,
+                    results TEXT NOT NULL,
+                    fetched_at REAL NOT NULL
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS image_media (
+                    media_id INTEGER NOT NULL,
+                    photo_id TEXT NOT NULL DEFAULT '',
+                    content_hash TEXT,
+                    source_url TEXT,
+                    uploaded_at REAL NOT NULL,
+                    PRIMARY KEY (media_id, photo_id)
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS image_media_photo ON image_media (photo_id)")
+            conn.execute("CREATE INDEX IF NOT EXISTS image_media_hash ON image_media (content_hash)")
+            self._conn = conn
+            self._pid = os.getpid()
+        return self._conn
+
+    def get_search(self, query):
+        """
+        Cached candidates for the query (a list of photo dicts, [] for a cached "no results"),
+        or None when the query has to go to Unsplash.
+        """
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT results, fetched_at FROM unsplash_search WHERE query = ?",
+                (normalize_query(query),)
+            ).fetchone()
+            if row is not None:
+                results = json.loads(row[0])
+                ttl = self.search_ttl if results else self.empty_search_ttl
+                if time.time() - row[1] <= ttl:
+                    self._stats['search_hits'] += 1
+                    return results
+            self._stats['search_misses'] += 1
+            return None
+
+    def put_search(self, query, results):
+        with self._lock:
+            self._connection().execute(
+                "INSERT OR REPLACE INTO unsplash_search (query, results, fetched_at) VALUES (?, ?, ?)",
+                (normalize_query(query), json.dumps(results), time.time())
+            )
+
+    def find_media(self, photo_id=None, content_hash=None):
+        """(media_id, source_url) already uploaded for this photo or file content, or None"""
+        with self._lock:
+            conn = self._connection()
+            row = None
+            if photo_id:
+                row = conn.execute(
+                    "SELECT media_id, source_url FROM image_media WHERE photo_id = ? ORDER BY uploaded_at DESC LIMIT 1",
+                    (photo_id,)
+                ).fetchone()
+            if row is None and content_hash:
+                row = conn.execute(
+                    "SELECT media_id, source_url FROM image_media WHERE content_hash = ? ORDER BY uploaded_at DESC LIMIT 1",
+                    (content_hash,)
+                ).fetchone()
+            return tuple(row) if row else None
+
+    def record_reuse(self):
+        with self._lock:
+            self._stats['media_reused'] += 1
+
+    def put_media(self, media_id, source_url, photo_id=None, content_hash=None):
+        """Remember an upload; also called when another photo id turns out to be the same image"""
+        with self._lock:
+            self._connection().execute(
+                "INSERT OR REPLACE INTO image_media (media_id, photo_id, content_hash, source_url, uploaded_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (media_id, photo_id or '', content_hash, source_url, time.time())
+            )
+            self._stats['media_stored'] += 1
+
+    def forget_media(self, media_id):
+        """Drop a media id that no longer exists in WordPress"""
+        with self._lock:
+            self._connection().execute("DELETE FROM image_media WHERE media_id = ?", (media_id,))
+            self._stats['media_forgotten'] += 1
+
+    def stats(self):
+        with self._lock:
+            conn = self._connection()
+            (searches,) = conn.execute("SELECT COUNT(*) FROM unsplash_search").fetchone()
+            (media,) = conn.execute("SELECT COUNT(DISTINCT media_id) FROM image_media").fetchone()
+            return dict(self._stats, cached_searches=searches, cached_media=media)
+
+
+# Process-wide cache, opened lazily
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_image_cache():
+    """The shared cache, or None when IMAGE_CACHE_ENABLED is off"""
+    global _cache
+    if not IMAGE_CACHE_ENABLED:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ImageCache()
+    return _cache
+
+
+def get_image_cache_stats():
+    cache = get_image_cache()
+    return cache.stats() if cache else {'enabled': False}
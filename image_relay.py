@@ -0,0 +1,153 @@
+import hashlib
+import os
+import re
+import tempfile
+
+from dotenv import load_dotenv
+from PIL import Image, UnidentifiedImageError
+
+# Load environment variables
+load_dotenv()
+
+# Featured images are relayed from Unsplash to the WordPress media library without
+# holding the whole file in memory. Images wider than IMAGE_MAX_WIDTH are downscaled
+# on the way (the theme never shows more than that); 0 relays the original bytes.
+IMAGE_MAX_WIDTH = int(os.getenv('IMAGE_MAX_WIDTH', '1200'))
+IMAGE_JPEG_QUALITY = int(os.getenv('IMAGE_JPEG_QUALITY', '82'))
+# Downloads are spooled in memory up to this size, then to a temporary file
+IMAGE_SPOOL_BYTES = int(os.getenv('IMAGE_SPOOL_BYTES', str(2 * 1024 * 1024)))
+RELAY_CHUNK_SIZE = 64 * 1024
+
+CONTENT_TYPE_EXTENSIONS = {'image/jpeg': '.jpg', 'image/png': '.png', 'image/webp': '.webp', 'image/gif': '.gif'}
+
+
+class StreamBody:
+    """
+    Request body that forwards a streamed download chunk by chunk. With a known
+    length requests sends Content-Length; it can only be sent once, so no retries.
+    """
+
+    replayable = False
+
+    def __init__(self, response, length=None):
+        self.response = response
+        self.length = length
+        self.content_hash = None  # known once the whole body has been sent
+
+    def __iter__(self):
+        digest = hashlib.sha256()
+        for chunk in self.response.iter_content(chunk_size=RELAY_CHUNK_SIZE):
+            if chunk:
+                digest.update(chunk)
+                yield chunk
+        self.content_hash = digest.hexdigest()
+
+    def __len__(self):
+        return self.length or 0
+
+    def close(self):
+        self.response.close()
+
+
+class FileBody:
+    """Request body read in chunks from a (spooled) file; rewinds, so retries are safe"""
+
+    replayable = True
+
+    def __init__(self, fileobj, length, content_hash=None):
+        self.fileobj = fileobj
+        self.length = length
+        self.content_hash = content_hash  # SHA-256 of the downloaded (original) image
+
+    def __iter__(self):
+        self.fileobj.seek(0)
+        while True:
+            chunk = self.fileobj.read(RELAY_CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+
+    def __len__(self):
+        return self.length
+
+    def close(self):
+        self.fileobj.close()
+
+
+def safe_filename(filename):
+    """ASCII-only name for the Content-Disposition header"""
+    return re.sub(r'[^A-Za-z0-9._-]+', '_', filename).strip('_') or 'image'
+
+
+def with_extension(filename, content_type):
+    extension = CONTENT_TYPE_EXTENSIONS.get(content_type)
+    if not extension:
+        return filename
+    return os.path.splitext(filename)[0] + extension
+
+
+def _spool(response):
+    spool = tempfile.SpooledTemporaryFile(max_size=IMAGE_SPOOL_BYTES)
+    digest = hashlib.sha256()
+    size = 0
+    for chunk in response.iter_content(chunk_size=RELAY_CHUNK_SIZE):
+        if chunk:
+            spool.write(chunk)
+            digest.update(chunk)
+            size += len(chunk)
+    return spool, size, digest.hexdigest()
+
+
+def _downscale(spool, max_width):
+    """(file, size, content type) of the downscaled image, or None to keep the original"""
+    spool.seek(0)
+    with Image.open(spool) as img:
+        if img.width <= max_width:
+            return None
+        if img.format == 'JPEG':
+            # Let the JPEG decoder skip detail we would throw away anyway
+            img.draft('RGB', (max_width, img.height * max_width // img.width))
+        height = max(1, round(img.height * max_width / img.width))
+        resized = img.resize((max_width, height), Image.LANCZOS)
+
+    out = tempfile.SpooledTemporaryFile(max_size=IMAGE_SPOOL_BYTES)
+    has_alpha = resized.mode in ('RGBA', 'LA') or (resized.mode == 'P' and 'transparency' in resized.info)
+    if has_alpha:
+        resized.save(out, format='PNG', optimize=True)
+        content_type = 'image/png'
+    else:
+        resized.convert('RGB').save(out, format='JPEG', quality=IMAGE_JPEG_QUALITY, optimize=True, progressive=True)
+        content_type = 'image/jpeg'
+    return out, out.tell(), content_type
+
+
+def prepare_image_body(response, max_width=None):
+    """
+    Turn a streamed image download (requests response opened with stream=True) into an
+    upload body. Returns (body, content_type, length). body.content_hash is the SHA-256
+    of the downloaded bytes: set up front when spooled, after sending when streamed.
+    """
+    max_width = IMAGE_MAX_WIDTH if max_width is None else max_width
+    content_type = response.headers.get('Content-Type', 'image/jpeg').split(';')[0].strip() or 'image/jpeg'
+    content_length = response.headers.get('Content-Length')
+    length = int(content_length) if content_length and content_length.isdigit() else None
+    if response.headers.get('Content-Encoding'):
+        length = None  # iter_content decodes, so the wire length is not the body length
+
+    if max_width <= 0:
+        # Straight relay: never more than one chunk of the image in memory
+        return StreamBody(response, length), content_type, length
+
+    spool, size, content_hash = _spool(response)
+    try:
+        resized = _downscale(spool, max_width)
+    except (UnidentifiedImageError, OSError, ValueError) as e:
+        print(f"[Image] Could not resize ({e}), uploading the original")
+        resized = None
+    if resized is None:
+        return FileBody(spool, size, content_hash), content_type, size
+
+    out, out_size, out_type = resized
+    spool.close()
+    print(f"[Image] Downscaled to {max_width}px wide: {size // 1024} KB -> {out_size // 1024} KB")
+    return FileBody(out, out_size, content_hash), out_type, out_size
@@ -0,0 +1,231 @@
+"""Language identification for scraped articles.
+
+Latin-script languages are told apart with character-trigram profiles built at import
+from the sample texts below (naive Bayes over the trigrams of a bounded prefix of the
+article). Other scripts are recognised by their Unicode ranges. Headlines are too short
+and too full of product names to classify, so callers pass the article body; anything
+short or ambiguous comes back 'und' and is treated like English.
+"""
+import math
+import os
+import re
+from collections import Counter, namedtuple
+
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Only the start of the text is looked at; a few hundred characters settle the language
+LANGID_SAMPLE_CHARS = int(os.getenv('LANGID_SAMPLE_CHARS', '500'))
+# Fewer letters than this and the answer is 'und' (undetermined)
+MIN_LETTERS = 12
+# Latin-script text needs more: a headline's names and numbers outweigh its few words
+LATIN_MIN_LETTERS = 80
+# Below this confidence a Latin-script answer is 'und'; also the bar for asking for a translation
+LANGID_MIN_CONFIDENCE = float(os.getenv('LANGID_MIN_CONFIDENCE', '0.7'))
+# Share of the letters a non-Latin script needs before it decides the language
+SCRIPT_SHARE = 0.3
+# Most sources publish in English: short, ambiguous headlines should stay English
+ENGLISH_PRIOR = math.log(50)
+
+LANGUAGE_NAMES = {
+    'en': 'English', 'fr': 'French', 'pt': 'Portuguese', 'es': 'Spanish', 'sw': 'Swahili',
+    'de': 'German', 'it': 'Italian', 'nl': 'Dutch', 'ar': 'Arabic', 'am': 'Amharic',
+    'ru': 'Russian', 'zh': 'Chinese', 'hi': 'Hindi', 'und': 'undetermined',
+}
+
+# Profile texts: tech-news prose, which is what the scraper feeds in
+SAMPLE_TEXTS = {
+    'en': """
+The startup said the new funding round will help it expand its payments platform to more
+countries across the continent and hire engineers for its data and security teams. Investors
+who took part in the deal include several venture capital firms that have backed fintech
+companies in the region. According to the chief executive, the company processed more than
+two million transactions last month, and it now works with thousands of small businesses
+that had no access to banking services before. The government has also announced plans to
+improve broadband coverage in rural areas, which should make it easier for people to use
+mobile money and online services. Analysts say this is one of the largest deals of the year,
+although funding for early stage companies has slowed down since the previous quarter.
+""",
+    'fr': """
+La startup a annoncé que cette nouvelle levée de fonds lui permettra d'étendre sa plateforme
+de paiement à davantage de pays du continent et de recruter des ingénieurs pour ses équipes
+chargées des données et de la sécurité. Parmi les investisseurs qui ont participé à
+l'opération figurent plusieurs fonds de capital-risque qui soutiennent déjà des entreprises
+de la fintech dans la région. Selon le directeur général, la société a traité plus de deux
+millions de transactions le mois dernier et travaille désormais avec des milliers de petites
+entreprises qui n'avaient pas accès aux services bancaires. Le gouvernement a également
+annoncé un plan pour améliorer la couverture du haut débit dans les zones rurales, ce qui
+devrait faciliter l'utilisation de l'argent mobile et des services en ligne.
+""",
+    'pt': """
+A startup afirmou que a nova rodada de investimento vai ajudar a expandir a sua plataforma de
+pagamentos para mais países do continente e contratar engenheiros para as equipas de dados e
+de segurança. Entre os investidores que participaram no negócio estão vários fundos de
+capital de risco que já apoiaram empresas de tecnologia financeira na região. Segundo o
+diretor executivo, a empresa processou mais de dois milhões de transações no mês passado e
+trabalha agora com milhares de pequenas empresas que não tinham acesso a serviços bancários.
+O governo também anunciou planos para melhorar a cobertura de banda larga nas zonas rurais,
+o que deverá facilitar a utilização do dinheiro móvel e dos serviços online pela população.
+""",
+    'es': """
+La empresa emergente afirmó que la nueva ronda de financiación le ayudará a ampliar su
+plataforma de pagos a más países del continente y a contratar ingenieros para sus equipos de
+datos y seguridad. Entre los inversores que participaron en la operación hay varios fondos de
+capital riesgo que ya han respaldado a compañías de tecnología financiera en la región. Según
+el director ejecutivo, la compañía procesó más de dos millones de transacciones el mes pasado
+y ahora trabaja con miles de pequeñas empresas que antes no tenían acceso a servicios
+bancarios. El gobierno también anunció planes para mejorar la cobertura de banda ancha en las
+zonas rurales, lo que debería facilitar el uso del dinero móvil y de los servicios en línea.
+""",
+    'sw': """
+Kampuni hiyo changa imesema kwamba ufadhili huo mpya utaisaidia kupanua huduma zake za malipo
+kwa nchi nyingi zaidi barani Afrika na kuajiri wahandisi kwa ajili ya timu zake za data na
+usalama. Wawekezaji walioshiriki katika mpango huo ni pamoja na mifuko kadhaa ya mitaji ambayo
+imekuwa ikiunga mkono kampuni za teknolojia ya fedha katika kanda hii. Kwa mujibu wa mkurugenzi
+mtendaji, kampuni ilishughulikia zaidi ya miamala milioni mbili mwezi uliopita na sasa
+inafanya kazi na maelfu ya biashara ndogo ambazo hazikuwa na huduma za benki hapo awali.
+Serikali pia imetangaza mipango ya kuboresha mtandao wa intaneti vijijini, jambo ambalo
+litarahisisha matumizi ya pesa kwa simu na huduma za mtandaoni kwa wananchi wengi.
+""",
+    'de': """
+Das Startup erklärte, dass die neue Finanzierungsrunde helfen wird, seine Zahlungsplattform
+auf weitere Länder des Kontinents auszuweiten und Ingenieure für die Daten- und
+Sicherheitsteams einzustellen. Zu den Investoren, die sich an dem Geschäft beteiligt haben,
+gehören mehrere Risikokapitalgeber, die bereits Fintech-Unternehmen in der Region unterstützt
+haben. Nach Angaben des Geschäftsführers hat das Unternehmen im vergangenen Monat mehr als zwei
+Millionen Transaktionen abgewickelt und arbeitet inzwischen mit tausenden kleinen Firmen
+zusammen, die vorher keinen Zugang zu Bankdienstleistungen hatten. Die Regierung kündigte
+außerdem an, die Breitbandversorgung in ländlichen Gebieten verbessern zu wollen.
+""",
+    'it': """
+La startup ha dichiarato che il nuovo round di finanziamento la aiuterà ad estendere la sua
+piattaforma di pagamento a più paesi del continente e ad assumere ingegneri per i gruppi che
+si occupano di dati e sicurezza. Tra gli investitori che hanno partecipato all'operazione ci
+sono diversi fondi di capitale di rischio che hanno già sostenuto aziende della tecnologia
+finanziaria nella regione. Secondo l'amministratore delegato, la società ha gestito più di due
+milioni di transazioni il mese scorso e ora lavora con migliaia di piccole imprese che prima
+non avevano accesso ai servizi bancari. Il governo ha anche annunciato un piano per migliorare
+la copertura della banda larga nelle zone rurali e rendere più facile l'uso dei servizi online.
+""",
+    'nl': """
+De startup zegt dat de nieuwe financieringsronde het bedrijf helpt om zijn betaalplatform naar
+meer landen op het continent uit te breiden en ingenieurs aan te nemen voor de teams die zich
+met data en beveiliging bezighouden. Onder de investeerders die aan de deal meededen zijn
+verschillende durfkapitaalfondsen die eerder al fintechbedrijven in de regio hebben gesteund.
+Volgens de directeur verwerkte het bedrijf vorige maand meer dan twee miljoen transacties en
+werkt het nu samen met duizenden kleine ondernemingen die voorheen geen toegang tot
+bankdiensten hadden. De overheid heeft ook plannen aangekondigd om de breedbanddekking op het
+platteland te verbeteren, waardoor het gebruik van mobiel geld en onlinediensten eenvoudiger wordt.
+""",
+}
+
+# Non-Latin scripts: (language code, first code point, last code point)
+SCRIPT_RANGES = [
+    ('zh', '\u4e00', '\u9fff'),
+    ('ar', '\u0600', '\u06ff'),
+    ('ru', '\u0400', '\u04ff'),
+    ('hi', '\u0900', '\u097f'),
+    ('am', '\u1200', '\u137f'),
+]
+SCRIPT_PATTERN = re.compile(r'[\u4e00-\u9fff\u0600-\u06ff\u0400-\u04ff\u0900-\u097f\u1200-\u137f]')
+LETTERS_PATTERN = re.compile(r'[^\W\d_]+')
+
+LanguageResult = namedtuple('LanguageResult', ['code', 'confidence'])
+
+
+def _normalize(text):
+    """Lower-cased letters only, words separated (and padded) by single spaces"""
+    return ' ' + ' '.join(LETTERS_PATTERN.findall(text.lower())) + ' '
+
+
+def _trigrams(sample):
+    return [sample[i:i + 3] for i in range(len(sample) - 2)]
+
+
+def _build_profiles(texts):
+    """
+    Per-language log-probability tables, add-one smoothed. Every table holds the whole
+    vocabulary so scoring is a plain lookup per trigram.
+    """
+    counts = {code: Counter(_trigrams(_normalize(text))) for code, text in texts.items()}
+    vocabulary = set().union(*counts.values())
+    profiles, unseen = {}, {}
+    for code, grams in counts.items():
+        denominator = sum(grams.values()) + len(vocabulary)
+        unseen[code] = math.log(1 / denominator)
+        profiles[code] = {gram: math.log((grams[gram] + 1) / denominator) for gram in vocabulary}
+    # The language each known trigram is most typical of, for the confidence vote
+    winners = {gram: max(profiles, key=lambda code: profiles[code][gram]) for gram in vocabulary}
+    return profiles, unseen, winners
+
+
+PROFILES, UNSEEN, WINNERS = _build_profiles(SAMPLE_TEXTS)
+
+
+def identify_language(text, sample_chars=None):
+    """
+    LanguageResult(code, confidence) for the first sample_chars characters of text.
+    The confidence is the share of letters in the detected script for non-Latin text.
+    For Latin text it is the winner's share of the trigram votes against the contrast
+    that matters for translation: English for a non-English winner, the runner-up for
+    English. Latin text shorter than LATIN_MIN_LETTERS or below LANGID_MIN_CONFIDENCE
+    is 'und'.
+    """
+    sample = (text or '')[:sample_chars or LANGID_SAMPLE_CHARS]
+    normalized = _normalize(sample)
+    letters = len(normalized) - normalized.count(' ')
+    if letters < MIN_LETTERS:
+        return LanguageResult('und', 0.0)
+
+    script_chars = SCRIPT_PATTERN.findall(sample)
+    if len(script_chars) >= letters * SCRIPT_SHARE:
+        by_script = Counter()
+        for code, low, high in SCRIPT_RANGES:
+            by_script[code] = sum(1 for char in script_chars if low <= char <= high)
+        code, count = by_script.most_common(1)[0]
+        return LanguageResult(code, round(min(1.0, count / letters), 3))
+
+    if letters < LATIN_MIN_LETTERS:
+        return LanguageResult('und', 0.0)
+
+    grams = _trigrams(normalized)
+    known = [gram for gram in grams if gram in WINNERS]
+    unknown = len(grams) - len(known)
+    # One lookup per trigram picks the candidates; only those (and English, which has
+    # the prior) get the full naive Bayes score
+    votes = Counter(map(WINNERS.__getitem__, known))
+    candidates = {code for code, _ in votes.most_common(2)} | {'en'}
+    scores = {
+        code: sum(map(PROFILES[code].__getitem__, known)) + unknown * UNSEEN[code]
+        for code in candidates
+    }
+    scores['en'] += ENGLISH_PRIOR
+    ranked = sorted(scores, key=scores.get, reverse=True)
+    best = ranked[0]
+    contrast = ranked[1] if best == 'en' else 'en'
+    contested = votes[best] + votes[contrast]
+    confidence = round(votes[best] / contested if contested else 0.0, 3)
+    if confidence < LANGID_MIN_CONFIDENCE:
+        return LanguageResult('und', confidence)
+    return LanguageResult(best, confidence)
+
+
+def is_english(text):
+    """True unless the text is confidently identified as another language"""
+    return identify_language(text).code in ('en', 'und')
+
+
+def language_name(code):
+    return LANGUAGE_NAMES.get(code, code)
+
+
+def translation_instruction(language, subject):
+    """
+    Prompt requirement line asking for `subject` to be translated, or '' when the
+    LanguageResult is English, undetermined or not confident enough to act on.
+    """
+    if language is None or language.code in ('en', 'und') or language.confidence < LANGID_MIN_CONFIDENCE:
+        return ''
+    return f"- The {subject} is in {language_name(language.code)}; translate it to English first\n"
@@ -0,0 +1,161 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Gemini responses keyed by model name + generation config + prompt, so re-running a
+# cycle after a crash or re-scraping a URL does not pay for the same calls twice.
+#   on     - read and write the cache (default)
+#   off    - always call the API
+#   replay - only serve cached responses and never touch the network (local testing)
+LLM_CACHE_MODE = os.getenv('LLM_CACHE_MODE', 'on').lower()
+LLM_CACHE_PATH = os.getenv('LLM_CACHE_PATH', 'llm_cache.sqlite3')
+LLM_CACHE_TTL = float(os.getenv('LLM_CACHE_TTL', str(7 * 86400)))  # seconds
+LLM_CACHE_MAX_ENTRIES = int(os.getenv('LLM_CACHE_MAX_ENTRIES', '5000'))
+
+
+class LLMCacheMiss(Exception):
+    """Raised in replay mode when a prompt has no cached response"""
+
+
+def cache_key(model_name, prompt, generation_config=None):
+    config = json.dumps(generation_config or {}, sort_keys=True)
+    digest = hashlib.sha256()
+    for part in (model_name, config, prompt):
+        digest.update(part.encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+class LLMCache:
+    """SQLite-backed response cache with a TTL and least-recently-used eviction"""
+
+    def __init__(self, path=LLM_CACHE_PATH, ttl=LLM_CACHE_TTL, max_entries=LLM_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+        self._stats = {'hits': 0, 'misses': 0, 'expired': 0, 'stores': 0, 'evictions': 0}
+
+    def _connection(self):
+        # A connection must not cross a fork
+        if self._conn is None or self._pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS llm_cache (
+                    key TEXT PRIMARY KEY,
+                    model TEXT NOT NULL,
+                    kind TEXT,
+                    prompt TEXT NOT NULL,
+                    response TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_used_at REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS llm_cache_last_used ON llm_cache (last_used_at)")
+            self._conn = conn
+            self._pid = os.getpid()
+        return self._conn
+
+    def get(self, model_name, prompt, generation_config=None):
+        """Cached response text, or None on a miss"""
+        key = cache_key(model_name, prompt, generation_config)
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute("SELECT response, created_at FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            now = time.time()
+            if row is None:
+                self._stats['misses'] += 1
+                return None
+            response, created_at = row
+            if self.ttl and now - created_at > self.ttl:
+                conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self._stats['expired'] += 1
+                self._stats['misses'] += 1
+                return None
+            conn.execute("UPDATE llm_cache SET last_used_at = ? WHERE key = ?", (now, key))
+            self._stats['hits'] += 1
+            return response
+
+    def put(self, model_name, prompt, response, generation_config=None, kind=None):
+        if not response:
+            return
+        key = cache_key(model_name, prompt, generation_config)
+        with self._lock:
+            conn = self._connection()
+            now = time.time()
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, model, kind, prompt, response, created_at, last_used_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, model_name, kind, prompt, response, now, now)
+            )
+            self._stats['stores'] += 1
+            # Evict in batches so most stores do not pay for the count
+            if self.max_entries and self._stats['stores'] % 50 == 0:
+                self._evict_locked(conn, now)
+
+    def delete(self, model_name, prompt, generation_config=None):
+        """Drop a cached response the caller rejected so the next lookup refetches it"""
+        key = cache_key(model_name, prompt, generation_config)
+        with self._lock:
+            self._connection().execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+
+    def _evict_locked(self, conn, now):
+        if self.ttl:
+            expired = conn.execute("DELETE FROM llm_cache WHERE created_at < ?", (now - self.ttl,)).rowcount
+            self._stats['expired'] += max(0, expired)
+        (count,) = conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()
+        excess = count - self.max_entries
+        if excess > 0:
+            conn.execute(
+                "DELETE FROM llm_cache WHERE key IN (SELECT key FROM llm_cache ORDER BY last_used_at LIMIT ?)",
+                (excess,)
+            )
+            self._stats['evictions'] += excess
+
+    def entries(self):
+        with self._lock:
+            return self._connection().execute("SELECT kind, prompt, response FROM llm_cache").fetchall()
+
+    def stats(self):
+        with self._lock:
+            (count,) = self._connection().execute("SELECT COUNT(*) FROM llm_cache").fetchone()
+            lookups = self._stats['hits'] + self._stats['misses']
+            return dict(
+                self._stats,
+                mode=LLM_CACHE_MODE,
+                entries=count,
+                hit_rate=round(self._stats['hits'] / lookups, 3) if lookups else 0.0
+            )
+
+
+# Process-wide cache, opened lazily
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_llm_cache():
+    """The shared cache, or None when LLM_CACHE_MODE=off"""
+    global _cache
+    if LLM_CACHE_MODE == 'off':
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = LLMCache()
+    return _cache
+
+
+def get_llm_cache_stats():
+    cache = get_llm_cache()
+    return cache.stats() if cache else {'mode': LLM_CACHE_MODE}
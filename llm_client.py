@@ -0,0 +1,126 @@
+import os
+import re
+
+from dotenv import load_dotenv
+
+from llm_cache import LLM_CACHE_MODE, LLMCacheMiss, get_llm_cache
+from llm_usage import record_llm_request, record_llm_tokens
+from rate_limiter import estimate_tokens, get_rate_limiter
+
+# Load environment variables
+load_dotenv()
+
+# How much article text goes into each prompt, in tokens (about 4 characters each).
+# These replace the old [:1000] / [:1500] character slices.
+CLASSIFY_CONTENT_TOKENS = int(os.getenv('CLASSIFY_CONTENT_TOKENS', '600'))
+REWRITE_CONTENT_TOKENS = int(os.getenv('REWRITE_CONTENT_TOKENS', '1500'))
+
+# End of a sentence: punctuation, an optional closing quote/bracket, then whitespace
+SENTENCE_END_PATTERN = re.compile(r'[.!?]["\'”’)\]]?(?=\s)')
+
+
+def trim_to_token_budget(text, max_tokens):
+    """Cut text to about max_tokens, ending on a sentence boundary where possible"""
+    if not text or max_tokens <= 0:
+        return ''
+    if estimate_tokens(text) <= max_tokens:
+        return text
+
+    cut = text[:max_tokens * 4]
+    # Last sentence end in the second half of the budget; a word boundary otherwise
+    last_end = None
+    for match in SENTENCE_END_PATTERN.finditer(cut):
+        last_end = match.end()
+    if last_end is not None and last_end >= len(cut) // 2:
+        return cut[:last_end].strip()
+    space = cut.rfind(' ')
+    if space >= len(cut) // 2:
+        return cut[:space].strip()
+    return cut.strip()
+
+
+def _usage_tokens(response):
+    """(prompt, output) token counts from the response usage metadata, or (None, None)"""
+    usage = getattr(response, 'usage_metadata', None)
+    if usage is None:
+        return None, None
+    prompt_tokens = getattr(usage, 'prompt_token_count', None)
+    output_tokens = getattr(usage, 'candidates_token_count', None)
+    return prompt_tokens, output_tokens
+
+
+class CachedResponse:
+    """Stands in for a Gemini response served from the LLM cache"""
+
+    usage_metadata = None
+
+    def __init__(self, text):
+        self.text = text
+
+
+def wait_for_rate_limit(model_type='primary', tokens=0):
+    """Wait if necessary to respect rate limits, then record the request.
+    Raises QuotaExhausted instead of sleeping when the budget is gone."""
+    rate_limiter = get_rate_limiter()
+    rate_limiter.ensure_quota_available()
+    
+    # Wait for room under RPM/TPM/RPD and record the request in one step
+    rate_limiter.acquire(model_type, tokens)
+    return True
+
+
+def generate_content(model, model_type, prompt, kind, generation_config=None, use_cache=True):
+    """
+    model.generate_content with caching, rate limiting and token accounting.
+    Cache hits return before touching the rate limiter; retries pass use_cache=False so
+    a response the caller rejected is fetched again (and replaced). On a miss the limiter reserves
+    the estimated prompt tokens; the rest of the real usage, including the response,
+    is added to the TPM window afterwards.
+    """
+    cache = get_llm_cache()
+    model_name = getattr(model, 'model_name', model_type)
+    if cache is not None and (use_cache or LLM_CACHE_MODE == 'replay'):
+        cached = cache.get(model_name, prompt, generation_config)
+        if cached is not None:
+            print(f"[💾] LLM cache hit ({kind})")
+            return CachedResponse(cached)
+        if LLM_CACHE_MODE == 'replay':
+            raise LLMCacheMiss(f"No cached {kind} response for this prompt (LLM_CACHE_MODE=replay)")
+
+    estimated_prompt_tokens = estimate_tokens(prompt)
+    wait_for_rate_limit(model_type, estimated_prompt_tokens)
+
+    record_llm_request(kind)
+    if generation_config is None:
+        response = model.generate_content(prompt)
+    else:
+        response = model.generate_content(prompt, generation_config=generation_config)
+
+    try:
+        text = response.text
+    except Exception:
+        # Blocked or empty candidates have no text
+        text = ''
+
+    prompt_tokens, output_tokens = _usage_tokens(response)
+    estimated = prompt_tokens is None or output_tokens is None
+    if prompt_tokens is None:
+        prompt_tokens = estimated_prompt_tokens
+    if output_tokens is None:
+        output_tokens = estimate_tokens(text)
+
+    get_rate_limiter().record_tokens(model_type, prompt_tokens + output_tokens - estimated_prompt_tokens)
+    record_llm_tokens(kind, prompt_tokens, output_tokens, estimated)
+
+    if cache is not None and text.strip():
+        cache.put(model_name, prompt, text, generation_config, kind)
+    return response
+
+
+def discard_cached_response(model_names, prompt, generation_config=None):
+    """Forget the cached response to prompt under every model it may have come from"""
+    cache = get_llm_cache()
+    if cache is None or LLM_CACHE_MODE == 'replay':
+        return
+    for model_name in set(model_names):
+        cache.delete(model_name, prompt, generation_config)
@@ -0,0 +1,98 @@
+import threading
+from contextlib import contextmanager
+
+# Per-article LLM accounting. Each pipeline worker thread handles one article at a
+# time, so the current article's counters live in a thread-local.
+_local = threading.local()
+_lock = threading.Lock()
+
+# Totals across every tracked article in this process
+_totals = {
+    'articles': 0,
+    'requests': 0,
+    'prompt_tokens': 0,
+    'output_tokens': 0,
+    'estimated_responses': 0,
+    'by_kind': {},
+    'tokens_by_kind': {}
+}
+
+
+def _add_tokens(counters, kind, prompt_tokens, output_tokens):
+    counters['prompt_tokens'] += prompt_tokens
+    counters['output_tokens'] += output_tokens
+    by_kind = counters['tokens_by_kind']
+    by_kind[kind] = by_kind.get(kind, 0) + prompt_tokens + output_tokens
+
+
+def _current():
+    return getattr(_local, 'article', None)
+
+
+@contextmanager
+def track_article(url):
+    """Count LLM requests and tokens used by this thread until the block exits (nested calls reuse the outer article)"""
+    if _current() is not None:
+        yield _current()
+        return
+
+    article = {'url': url, 'requests': 0, 'prompt_tokens': 0, 'output_tokens': 0,
+               'by_kind': {}, 'tokens_by_kind': {}}
+    _local.article = article
+    try:
+        yield article
+    finally:
+        _local.article = None
+        with _lock:
+            _totals['articles'] += 1
+            _totals['requests'] += article['requests']
+            for kind, count in article['by_kind'].items():
+                _totals['by_kind'][kind] = _totals['by_kind'].get(kind, 0) + count
+            for kind, tokens in article['tokens_by_kind'].items():
+                _totals['tokens_by_kind'][kind] = _totals['tokens_by_kind'].get(kind, 0) + tokens
+            _totals['prompt_tokens'] += article['prompt_tokens']
+            _totals['output_tokens'] += article['output_tokens']
+        total_tokens = article['prompt_tokens'] + article['output_tokens']
+        print(f"[LLM Usage] {article['requests']} request(s), {total_tokens} token(s) for {url}: {article['by_kind']}")
+
+
+def record_llm_request(kind):
+    """Record one model request of the given kind (classification, title, body, keywords, ...)"""
+    article = _current()
+    if article is not None:
+        article['requests'] += 1
+        article['by_kind'][kind] = article['by_kind'].get(kind, 0) + 1
+    else:
+        # Requests outside an article still count toward the totals
+        with _lock:
+            _totals['requests'] += 1
+            _totals['by_kind'][kind] = _totals['by_kind'].get(kind, 0) + 1
+
+
+def record_llm_tokens(kind, prompt_tokens, output_tokens, estimated=False):
+    """Record the token usage of one model response (estimated=True when the API gave no usage metadata)"""
+    article = _current()
+    with _lock:
+        if estimated:
+            _totals['estimated_responses'] += 1
+        if article is None:
+            # Tokens outside an article still count toward the totals
+            _add_tokens(_totals, kind, prompt_tokens, output_tokens)
+    if article is not None:
+        _add_tokens(article, kind, prompt_tokens, output_tokens)
+
+
+def get_llm_usage_stats():
+    with _lock:
+        articles = _totals['articles']
+        return {
+            'articles': articles,
+            'requests': _totals['requests'],
+            'requests_per_article': round(_totals['requests'] / articles, 2) if articles else 0.0,
+            'by_kind': dict(_totals['by_kind']),
+            'prompt_tokens': _totals['prompt_tokens'],
+            'output_tokens': _totals['output_tokens'],
+            'tokens_per_article': round((_totals['prompt_tokens'] + _totals['output_tokens']) / articles, 1) if articles else 0.0,
+            'tokens_by_kind': dict(_totals['tokens_by_kind']),
+            'estimated_responses': _totals['estimated_responses']
+        }
@@ -0,0 +1,235 @@
+import html
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+from dotenv import load_dotenv
+
+from dbOperations import update_published_urls
+from http_client import HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT, get_http_client
+
+# Load environment variables
+load_dotenv()
+
+# Finished posts are collected and sent to WordPress together: one /batch/v1 request
+# per PUBLISH_BATCH_SIZE posts (WordPress accepts at most 25), or a small pool of
+# concurrent single POSTs when the site does not allow batching posts.
+WORDPRESS_MAX_BATCH = 25
+PUBLISH_BATCH_SIZE = max(1, min(WORDPRESS_MAX_BATCH, int(os.getenv('PUBLISH_BATCH_SIZE', '25'))))
+PUBLISH_MAX_WAIT = float(os.getenv('PUBLISH_MAX_WAIT', '300'))  # seconds the oldest post may wait
+PUBLISH_WORKERS = int(os.getenv('PUBLISH_WORKERS', '4'))  # concurrent POSTs without batching
+# A batch creates every post before answering, so its read timeout grows with its size
+PUBLISH_BATCH_SECONDS_PER_POST = float(os.getenv('PUBLISH_BATCH_SECONDS_PER_POST', '6'))
+# After a failed batch, posts not found on WordPress are looked up once more after this
+# many seconds, in case it was still creating them; 0 skips the second lookup
+PUBLISH_RECONCILE_DELAY = float(os.getenv('PUBLISH_RECONCILE_DELAY', '10'))
+
+
+def _post_title(post):
+    """The title as it was sent: 'raw' in the edit context, else the rendered HTML unescaped"""
+    title = post.get('title') or {}
+    return title.get('raw') if title.get('raw') is not None else html.unescape(title.get('rendered', ''))
+
+
+class PublishQueue:
+    """Collects posts and publishes them in batches; tbl_urls is updated once per batch"""
+
+    def __init__(self, posts_url, batch_url, headers, batch_size=PUBLISH_BATCH_SIZE,
+                 max_wait=PUBLISH_MAX_WAIT, workers=PUBLISH_WORKERS):
+        self.posts_url = posts_url
+        self.batch_url = batch_url
+        self.posts_path = '/' + posts_url.split('/wp-json/', 1)[1]  # e.g. /wp/v2/posts
+        self.headers = headers
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+        self.workers = max(1, workers)
+        self.batch_supported = None  # unknown until the first batch
+        self._lock = threading.Lock()
+        self._pending = []
+        self._oldest = None
+        self._stats = {'queued': 0, 'published': 0, 'failed': 0, 'unconfirmed': 0, 'batch_requests': 0,
+                       'single_requests': 0, 'reconciled': 0, 'db_batches': 0}
+
+    def add(self, post_data, fetched_url, category, on_published=None):
+        """
+        Queue one post. on_published(result) runs with the WordPress post JSON once it is
+        live and recorded in tbl_urls. Publishes right away when the batch is full or the
+        oldest post has waited max_wait seconds.
+        """
+        entry = {'post_data': post_data, 'fetched_url': fetched_url, 'category': category,
+                 'on_published': on_published}
+        with self._lock:
+            self._pending.append(entry)
+            self._stats['queued'] += 1
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            waiting = len(self._pending)
+            due = waiting >= self.batch_size or time.monotonic() - self._oldest >= self.max_wait
+        print(f"📮 Queued '{post_data['title']}' for publishing ({waiting} waiting)")
+        if due:
+            self.flush()
+
+    def flush(self):
+        """Publish everything queued; returns the number of posts that went live"""
+        with self._lock:
+            pending, self._pending, self._oldest = self._pending, [], None
+        published = 0
+        for start in range(0, len(pending), self.batch_size):
+            published += self._publish(pending[start:start + self.batch_size])
+        return published
+
+    def _publish(self, entries):
+        results = [None] * len(entries)
+        single = list(range(len(entries)))
+        unconfirmed = set()
+        if self.batch_supported is not False:
+            single, unconfirmed = self._post_batch(entries, results)
+        if single:
+            with ThreadPoolExecutor(max_workers=min(self.workers, len(single)),
+                                    thread_name_prefix='publish') as executor:
+                for index, result in zip(single, executor.map(self._post_one, [entries[i] for i in single])):
+                    results[index] = result
+
+        # Every post of the batch is marked written, in one transaction. Posts a failed batch
+        # may or may not have created stay unwritten, so a later cycle picks them up again.
+        rows = [(entry['fetched_url'], result.get('link') if result else None, entry['category'])
+                for index, (entry, result) in enumerate(zip(entries, results)) if index not in unconfirmed]
+        try:
+            update_published_urls(rows)
+            with self._lock:
+                self._stats['db_batches'] += 1
+        except Exception as e:
+            print(f"❌ Error recording published posts: {e}")
+
+        published = 0
+        for index, (entry, result) in enumerate(zip(entries, results)):
+            title = entry['post_data']['title']
+            if index in unconfirmed:
+                print(f"⚠️ Could not confirm '{title}' was posted, leaving it for the next cycle\n")
+                continue
+            if not result:
+                print(f"❌ Failed to post: {title}\n")
+                continue
+            published += 1
+            print(f"✅ Successfully posted: {title} ({result.get('link')})")
+            if entry['on_published']:
+                entry['on_published'](result)
+        with self._lock:
+            self._stats['published'] += published
+            self._stats['unconfirmed'] += len(unconfirmed)
+            self._stats['failed'] += len(entries) - published - len(unconfirmed)
+        print(f"📬 Published {published}/{len(entries)} queued posts")
+        return published
+
+    def _post_batch(self, entries, results):
+        """
+        One /batch/v1 request for the entries, filling results in place. Returns (indexes that
+        still need a single POST, indexes whose outcome is unknown). The first covers batching
+        not being available or the batch being rejected before it ran. The second covers a 5xx
+        or a dropped connection, when the posts it could not find again may still be created.
+        """
+        payload = {
+            'validation': 'normal',
+            'requests': [{'method': 'POST', 'path': self.posts_path, 'body': entry['post_data']}
+                         for entry in entries],
+        }
+        http = get_http_client()
+        with self._lock:
+            self._stats['batch_requests'] += 1
+        sent_at = datetime.now(timezone.utc)
+        read_timeout = max(HTTP_READ_TIMEOUT, PUBLISH_BATCH_SECONDS_PER_POST * len(entries))
+        try:
+            response = http.post(self.batch_url, headers=self.headers, json=payload,
+                                 timeout=(HTTP_CONNECT_TIMEOUT, read_timeout))
+        except Exception as e:
+            # The batch may have been applied: posting again could duplicate posts
+            print(f"❌ Error sending publish batch: {e}")
+            return [], self._reconcile(entries, results, sent_at)
+
+        if response.status_code == 404:
+            print("⚠️ WordPress has no /batch/v1 endpoint, publishing posts one by one")
+            self.batch_supported = False
+            return list(range(len(entries))), set()
+        if response.status_code >= 500:
+            print(f"❌ Publish batch failed: {response.status_code} {response.text[:300]}")
+            return [], self._reconcile(entries, results, sent_at)
+        if response.status_code not in (200, 207):
+            # Rejected as a whole (e.g. too many requests) before any post was created
+            print(f"⚠️ Publish batch rejected: {response.status_code} {response.text[:300]}")
+            return list(range(len(entries))), set()
+
+        single = []
+        for index, item in enumerate(response.json().get('responses', [])):
+            body = item.get('body') or {}
+            if item.get('status') == 201:
+                results[index] = body
+            elif isinstance(body, dict) and body.get('code') == 'rest_batch_not_allowed':
+                self.batch_supported = False
+                single.append(index)
+            else:
+                print(f"❌ Error publishing post '{entries[index]['post_data']['title']}': "
+                      f"{item.get('status')} {body}")
+        if self.batch_supported is None and not single:
+            self.batch_supported = True
+        return single, set()
+
+    def _reconcile(self, entries, results, sent_at):
+        """
+        After a batch whose outcome is unknown, find the posts it created by title among
+        posts dated from sent_at on. Fills results in place; returns the indexes not found.
+        Only a lookup that misses some posts waits PUBLISH_RECONCILE_DELAY and tries again.
+        """
+        since = (sent_at - timedelta(minutes=1)).strftime('%Y-%m-%dT%H:%M:%S')
+        unconfirmed = self._find_posts(entries, results, range(len(entries)), since)
+        if unconfirmed and PUBLISH_RECONCILE_DELAY > 0:
+            time.sleep(PUBLISH_RECONCILE_DELAY)
+            unconfirmed = self._find_posts(entries, results, sorted(unconfirmed), since)
+        with self._lock:
+            self._stats['reconciled'] += len(entries) - len(unconfirmed)
+        print(f"🔎 Found {len(entries) - len(unconfirmed)}/{len(entries)} posts of the failed batch on WordPress")
+        return unconfirmed
+
+    def _find_posts(self, entries, results, indexes, since):
+        """Look up the given entries by title; fills results and returns the indexes not found"""
+        http = get_http_client()
+        unconfirmed = set()
+        for index in indexes:
+            entry = entries[index]
+            title = entry['post_data']['title']
+            try:
+                response = http.get(self.posts_url, headers=self.headers, params={
+                    'search': title, 'status': 'publish', 'orderby': 'date', 'per_page': 10,
+                    'context': 'edit', '_fields': 'id,link,title,date_gmt',
+                })
+                posts = response.json() if response.status_code == 200 else []
+            except Exception as e:
+                print(f"❌ Error looking up post '{title}': {e}")
+                posts = []
+            match = next((post for post in posts if isinstance(post, dict)
+                          and _post_title(post) == title and (post.get('date_gmt') or '') >= since), None)
+            if match:
+                results[index] = match
+            else:
+                unconfirmed.add(index)
+        return unconfirmed
+
+    def _post_one(self, entry):
+        with self._lock:
+            self._stats['single_requests'] += 1
+        try:
+            response = get_http_client().post(self.posts_url, headers=self.headers, json=entry['post_data'])
+        except Exception as e:
+            print(f"❌ Error posting to WordPress: {e}")
+            return None
+        if response.status_code == 201:
+            return response.json()
+        print(f"❌ Error publishing post: {response.status_code}")
+        print(f"Response: {response.text}")
+        return None
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, pending=len(self._pending), batch_size=self.batch_size,
+                        batch_supported=self.batch_supported)
@@ -0,0 +1,415 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# One budget per Gemini API key. scraper.py and blog.py used to keep separate
+# limiters and each assumed it had the whole quota; both now use the shared
+# instance returned by get_rate_limiter().
+#   memory - budget shared by every thread in this process
+#   sqlite - budget shared by every process on the host (gunicorn workers + scheduler)
+RATE_LIMIT_BACKEND = os.getenv('RATE_LIMIT_BACKEND', 'memory').lower()
+RATE_LIMIT_DB_PATH = os.getenv('RATE_LIMIT_DB_PATH', 'rate_limit.sqlite3')
+
+# Waits longer than this are not slept through inside a worker; the work is
+# parked with a resume time instead (see QuotaExhausted)
+QUOTA_MAX_INLINE_WAIT = float(os.getenv('QUOTA_MAX_INLINE_WAIT', '120'))
+# How long to back off when the API itself keeps answering with quota errors
+QUOTA_BACKOFF_SECONDS = float(os.getenv('QUOTA_BACKOFF_SECONDS', '3600'))
+
+MODEL_TYPES = ['primary', 'fallback', 'fallback-flash', 'fallback-pro']
+
+# Default limits per model type (requests/minute, tokens/minute, requests/day)
+DEFAULT_LIMITS = {
+    'primary': {'rpm': 15, 'tpm': 1000000, 'rpd': 200},  # Gemini 2.0 Flash
+    'fallback': {'rpm': 30, 'tpm': 1000000, 'rpd': 200},  # Gemini 2.0 Flash-Lite
+    'fallback-pro': {'rpm': 20, 'tpm': 1000000, 'rpd': 200},  # Gemini 2.5 Pro (estimated)
+    'fallback-flash': {'rpm': 25, 'tpm': 1000000, 'rpd': 200},  # Gemini 2.5 Flash (estimated)
+}
+
+MINUTE = 60
+DAY = 86400
+
+
+class QuotaExhausted(Exception):
+    """Raised instead of sleeping when no model has budget left until resume_at"""
+
+    def __init__(self, resume_at, reason=''):
+        self.resume_at = resume_at
+        self.reason = reason
+        super().__init__(f"Gemini quota exhausted until {resume_at:%Y-%m-%d %H:%M:%S}" + (f" ({reason})" if reason else ''))
+
+
+class ModelOverBudget(Exception):
+    """Raised when one model type is out of budget but another still has room; switch models"""
+
+    def __init__(self, model_type, wait):
+        self.model_type = model_type
+        self.wait = wait
+        super().__init__(f"{model_type} model over budget for {wait:.0f}s")
+
+
+def load_limits():
+    """DEFAULT_LIMITS overridden by RATE_LIMIT_<TYPE>_<RPM|TPM|RPD>, e.g. RATE_LIMIT_PRIMARY_RPM=10"""
+    limits = {}
+    for model_type, defaults in DEFAULT_LIMITS.items():
+        prefix = 'RATE_LIMIT_' + model_type.upper().replace('-', '_')
+        limits[model_type] = {
+            name: int(os.getenv(f'{prefix}_{name.upper()}', str(value)))
+            for name, value in defaults.items()
+        }
+    return limits
+
+
+def estimate_tokens(text):
+    """Rough prompt size for the TPM budget (about 4 characters per token)"""
+    return len(text or '') // 4
+
+
+def _windows(limits):
+    """(name, window seconds, limit, which cost it counts) for each enforced limit"""
+    return [
+        ('rpm', MINUTE, limits['rpm'], 'requests'),
+        ('tpm', MINUTE, limits['tpm'], 'tokens'),
+        ('rpd', DAY, limits['rpd'], 'requests'),
+    ]
+
+
+def _wait_for_window(events, used, limit, seconds, cost, now):
+    """
+    Seconds until `cost` more fits under `limit`, given the (timestamp, cost) events
+    in the window (oldest first) that add up to `used`. A limit of 0 disables the check.
+    """
+    if limit <= 0 or cost <= 0:
+        return 0
+    # A single request larger than the limit only waits for an empty window
+    cost = min(cost, limit)
+    if used + cost <= limit:
+        return 0
+    freed = 0
+    for ts, event_cost in events:
+        freed += event_cost
+        if used - freed + cost <= limit:
+            return max(0, ts + seconds - now)
+    return seconds
+
+
+class _Window:
+    """Sliding window over (timestamp, cost) events with a running total"""
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.events = deque()
+        self.total = 0
+
+    def prune(self, now):
+        cutoff = now - self.seconds
+        events = self.events
+        while events and events[0][0] <= cutoff:
+            self.total -= events.popleft()[1]
+
+    def add(self, now, cost):
+        if cost:
+            self.events.append((now, cost))
+            self.total += cost
+
+
+class MemoryBackend:
+    """Per-process budget kept in deques; checks are O(1) amortized"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._state = {}
+
+    def _get(self, model_type):
+        state = self._state.get(model_type)
+        if state is None:
+            state = {'rpm': _Window(MINUTE), 'tpm': _Window(MINUTE), 'rpd': _Window(DAY)}
+            self._state[model_type] = state
+        return state
+
+    def _wait_locked(self, model_type, limits, requests, tokens, now):
+        state = self._get(model_type)
+        costs = {'requests': requests, 'tokens': tokens}
+        wait = 0
+        for name, seconds, limit, counts in _windows(limits):
+            window = state[name]
+            window.prune(now)
+            wait = max(wait, _wait_for_window(window.events, window.total, limit, seconds, costs[counts], now))
+        return wait
+
+    def _record_locked(self, model_type, requests, tokens, now):
+        state = self._get(model_type)
+        state['rpm'].add(now, requests)
+        state['tpm'].add(now, tokens)
+        state['rpd'].add(now, requests)
+
+    def wait_time(self, model_type, limits, requests, tokens):
+        with self._lock:
+            return self._wait_locked(model_type, limits, requests, tokens, time.time())
+
+    def record(self, model_type, requests, tokens):
+        with self._lock:
+            self._record_locked(model_type, requests, tokens, time.time())
+
+    def reserve(self, model_type, limits, requests, tokens):
+        """Record the request if it fits right now; otherwise return how long to wait"""
+        with self._lock:
+            now = time.time()
+            wait = self._wait_locked(model_type, limits, requests, tokens, now)
+            if wait <= 0:
+                self._record_locked(model_type, requests, tokens, now)
+            return wait
+
+    def usage(self, model_type):
+        with self._lock:
+            now = time.time()
+            state = self._get(model_type)
+            for window in state.values():
+                window.prune(now)
+            return {'rpm': state['rpm'].total, 'tpm': state['tpm'].total, 'rpd': state['rpd'].total}
+
+
+class SQLiteBackend:
+    """Budget kept in a SQLite file so every process on the host draws from it"""
+
+    def __init__(self, path=RATE_LIMIT_DB_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+        self._last_cleanup = 0
+
+    def _connection(self):
+        # A connection must not cross a fork
+        if self._conn is None or self._pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS rate_limit_events (
+                    model_type TEXT NOT NULL,
+                    ts REAL NOT NULL,
+                    requests INTEGER NOT NULL,
+                    tokens INTEGER NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS rate_limit_events_model_ts ON rate_limit_events (model_type, ts)")
+            self._conn = conn
+            self._pid = os.getpid()
+        return self._conn
+
+    def _wait_locked(self, conn, model_type, limits, requests, tokens, now):
+        costs = {'requests': requests, 'tokens': tokens}
+        wait = 0
+        for name, seconds, limit, counts in _windows(limits):
+            cost = costs[counts]
+            if limit <= 0 or cost <= 0:
+                continue
+            (used,) = conn.execute(
+                f"SELECT COALESCE(SUM({counts}), 0) FROM rate_limit_events WHERE model_type = ? AND ts > ?",
+                (model_type, now - seconds)
+            ).fetchone()
+            if used + min(cost, limit) <= limit:
+                continue
+            # Only read the individual events when the window is actually full
+            events = conn.execute(
+                f"SELECT ts, {counts} FROM rate_limit_events WHERE model_type = ? AND ts > ? AND {counts} > 0 ORDER BY ts",
+                (model_type, now - seconds)
+            ).fetchall()
+            wait = max(wait, _wait_for_window(events, used, limit, seconds, cost, now))
+        return wait
+
+    def _record_locked(self, conn, model_type, requests, tokens, now):
+        conn.execute(
+            "INSERT INTO rate_limit_events (model_type, ts, requests, tokens) VALUES (?, ?, ?, ?)",
+            (model_type, now, requests, tokens)
+        )
+        if now - self._last_cleanup > MINUTE:
+            conn.execute("DELETE FROM rate_limit_events WHERE ts <= ?", (now - DAY,))
+            self._last_cleanup = now
+
+    def wait_time(self, model_type, limits, requests, tokens):
+        with self._lock:
+            conn = self._connection()
+            return self._wait_locked(conn, model_type, limits, requests, tokens, time.time())
+
+    def record(self, model_type, requests, tokens):
+        with self._lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._record_locked(conn, model_type, requests, tokens, time.time())
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+    def reserve(self, model_type, limits, requests, tokens):
+        # BEGIN IMMEDIATE takes the write lock, so check-and-record is atomic across processes
+        with self._lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                wait = self._wait_locked(conn, model_type, limits, requests, tokens, now)
+                if wait <= 0:
+                    self._record_locked(conn, model_type, requests, tokens, now)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            return wait
+
+    def usage(self, model_type):
+        with self._lock:
+            conn = self._connection()
+            now = time.time()
+            rpm, tpm = conn.execute(
+                "SELECT COALESCE(SUM(requests), 0), COALESCE(SUM(tokens), 0) FROM rate_limit_events WHERE model_type = ? AND ts > ?",
+                (model_type, now - MINUTE)
+            ).fetchone()
+            (rpd,) = conn.execute(
+                "SELECT COALESCE(SUM(requests), 0) FROM rate_limit_events WHERE model_type = ? AND ts > ?",
+                (model_type, now - DAY)
+            ).fetchone()
+            return {'rpm': rpm, 'tpm': tpm, 'rpd': rpd}
+
+
+class RateLimiter:
+    """RPM, TPM and RPD limits per model type, enforced together"""
+
+    def __init__(self, backend=None, limits=None):
+        self.backend = backend or MemoryBackend()
+        self.limits = limits or load_limits()
+
+        # Set while the whole budget is exhausted; callers park work until then
+        self.quota_resume_at = None
+        self._quota_lock = threading.Lock()
+
+    def get_limits(self, model_type):
+        return self.limits.get(model_type) or self.limits['fallback']  # Default to fallback
+
+    def get_rpm_limit(self, model_type):
+        """Get the RPM limit for the specified model type"""
+        return self.get_limits(model_type)['rpm']
+
+    def can_make_request(self, model_type='primary', tokens=0):
+        """Check if we can make a request based on rate limits"""
+        return self.get_wait_time(model_type, tokens) <= 0
+
+    def get_wait_time(self, model_type='primary', tokens=0):
+        """Calculate how long to wait before next request"""
+        return self.backend.wait_time(model_type, self.get_limits(model_type), 1, tokens)
+
+    def record_request(self, model_type='primary', tokens=0):
+        """Record a request for rate limiting"""
+        self.backend.record(model_type, 1, tokens)
+
+    def record_tokens(self, model_type, tokens):
+        """Add tokens to the TPM window without counting another request"""
+        if tokens > 0:
+            self.backend.record(model_type, 0, tokens)
+
+    def acquire(self, model_type='primary', tokens=0, timeout=None, max_wait=QUOTA_MAX_INLINE_WAIT):
+        """
+        Block until the request fits every limit, then record it; returns False on timeout.
+        Instead of sleeping longer than max_wait it raises ModelOverBudget while another
+        model type still has budget, and QuotaExhausted once none has.
+        """
+        limits = self.get_limits(model_type)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        announced = False
+        while True:
+            wait = self.backend.reserve(model_type, limits, 1, tokens)
+            if wait <= 0:
+                return True
+            if max_wait is not None and wait > max_wait:
+                # Only this model's budget may be gone; park everything only when all are
+                shortest = min(self.get_wait_time(other) for other in MODEL_TYPES if other != model_type)
+                if shortest <= max_wait:
+                    raise ModelOverBudget(model_type, wait)
+                raise self.mark_quota_exhausted(min(wait, shortest), reason='all models over their limits')
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            if not announced:
+                print(f"[⏳] Rate limit reached for {model_type} model. Waiting {wait:.1f} seconds...")
+                announced = True
+            # Another thread or process may take the slot first; re-check after waking
+            time.sleep(wait)
+
+    def are_all_models_rate_limited(self):
+        """Check if all models have reached their rate limits"""
+        for model_type in MODEL_TYPES:
+            if self.can_make_request(model_type):
+                return False
+        return True
+
+    def get_quota_resume_at(self):
+        """When parked work may run again, or None if the budget is not exhausted"""
+        with self._quota_lock:
+            if self.quota_resume_at is not None and datetime.now() >= self.quota_resume_at:
+                self.quota_resume_at = None
+                print("[✅] Rate limit tracking reset - models available again")
+            return self.quota_resume_at
+
+    def mark_quota_exhausted(self, seconds=None, reason=''):
+        """Record that no model has budget for `seconds`; returns the QuotaExhausted to raise"""
+        resume_at = datetime.now() + timedelta(seconds=QUOTA_BACKOFF_SECONDS if seconds is None else seconds)
+        with self._quota_lock:
+            if self.quota_resume_at is None or resume_at > self.quota_resume_at:
+                self.quota_resume_at = resume_at
+            resume_at = self.quota_resume_at
+        print(f"[🚫] All models are rate limited. Parking remaining work until {resume_at}")
+        return QuotaExhausted(resume_at, reason)
+
+    def ensure_quota_available(self):
+        """Raise QuotaExhausted right away when the budget is gone; never sleeps"""
+        resume_at = self.get_quota_resume_at()
+        if resume_at is not None:
+            raise QuotaExhausted(resume_at, 'waiting for quota to refill')
+        if self.are_all_models_rate_limited():
+            wait = min(self.get_wait_time(model_type) for model_type in MODEL_TYPES)
+            if wait > QUOTA_MAX_INLINE_WAIT:
+                raise self.mark_quota_exhausted(wait, reason='all models over their limits')
+
+    def stats(self):
+        return {
+            'backend': type(self.backend).__name__,
+            'quota_resume_at': self.quota_resume_at.isoformat() if self.quota_resume_at else None,
+            'models': {
+                model_type: {'used': self.backend.usage(model_type), 'limits': self.get_limits(model_type)}
+                for model_type in MODEL_TYPES
+            }
+        }
+
+
+# Process-wide limiter shared by scraper.py and blog.py
+_rate_limiter = None
+_rate_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter():
+    global _rate_limiter
+    if _rate_limiter is None:
+        with _rate_limiter_lock:
+            if _rate_limiter is None:
+                if RATE_LIMIT_BACKEND == 'sqlite':
+                    backend = SQLiteBackend(RATE_LIMIT_DB_PATH)
+                else:
+                    backend = MemoryBackend()
+                _rate_limiter = RateLimiter(backend)
+    return _rate_limiter
+
+
+def get_rate_limit_stats():
+    return get_rate_limiter().stats()
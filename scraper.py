@@ -6,8 +6,15 @@ import json
 import google.generativeai as genai
 import os
 from dotenv import load_dotenv
-from blog import blog_main, send_email_notification_blog
-from dbOperations import get_categories_data, get_urls, soft_delete_url
+from blog import blog_main, prepare_article, publish_article, publish_queue, send_email_notification_blog
+from article_pipeline import Stage, StagedPipeline
+from llm_client import CLASSIFY_CONTENT_TOKENS, generate_content, trim_to_token_budget
+from llm_usage import track_article
+from tech_classifier import prefilter_decision
+from rate_limiter import ModelOverBudget, QuotaExhausted, get_rate_limiter
+from article_dedup import DEDUP_ENABLED, DEDUP_WINDOW_DAYS, find_duplicate
+from dbOperations import (get_categories_data, get_urls, mark_url_duplicate, park_urls, prune_lsh_index,
+                          record_tech_decision, soft_delete_url)
 import time
 from datetime import datetime, timedelta
 
@@ -16,130 +23,19 @@ load_dotenv()
 # Global flag to prevent multiple scraping instances
 scraping_in_progress = False
 
-# Rate limiting tracking
-class RateLimiter:
-    def __init__(self):
-        self.primary_requests = []  # Flash requests
-        self.fallback_requests = []  # Flash-Lite requests
-        self.fallback_pro_requests = []  # 2.5 Pro requests
-        self.fallback_flash_requests = []  # 2.5 Flash requests
-        
-        # Rate limits for different models
-        self.primary_rpm = 15  # Gemini 2.0 Flash RPM
-        self.fallback_rpm = 30  # Gemini 2.0 Flash-Lite RPM
-        self.fallback_pro_rpm = 20  # Gemini 2.5 Pro RPM (estimated)
-        self.fallback_flash_rpm = 25  # Gemini 2.5 Flash RPM (estimated)
-        
-        self.primary_tpm = 1000000  # Flash TPM
-        self.fallback_tpm = 1000000  # Flash-Lite TPM
-        self.fallback_pro_tpm = 1000000  # 2.5 Pro TPM
-        self.fallback_flash_tpm = 1000000  # 2.5 Flash TPM
-        
-        self.primary_rpd = 200  # Flash RPD
-        self.fallback_rpd = 200  # Flash-Lite RPD
-        self.fallback_pro_rpd = 200  # 2.5 Pro RPD
-        self.fallback_flash_rpd = 200  # 2.5 Flash RPD
-        
-        # Track when all models are rate limited
-        self.all_models_rate_limited_time = None
-    
-    def get_requests_list(self, model_type):
-        """Get the appropriate requests list based on model type"""
-        if model_type == 'primary':
-            return self.primary_requests
-        elif model_type == 'fallback':
-            return self.fallback_requests
-        elif model_type == 'fallback-pro':
-            return self.fallback_pro_requests
-        elif model_type == 'fallback-flash':
-            return self.fallback_flash_requests
-        else:
-            return self.fallback_requests  # Default to fallback
-    
-    def get_rpm_limit(self, model_type):
-        """Get the RPM limit for the specified model type"""
-        if model_type == 'primary':
-            return self.primary_rpm
-        elif model_type == 'fallback':
-            return self.fallback_rpm
-        elif model_type == 'fallback-pro':
-            return self.fallback_pro_rpm
-        elif model_type == 'fallback-flash':
-            return self.fallback_flash_rpm
-        else:
-            return self.fallback_rpm  # Default to fallback
-    
-    def are_all_models_rate_limited(self):
-        """Check if all models have reached their rate limits"""
-        model_types = ['primary', 'fallback', 'fallback-flash', 'fallback-pro']
-        
-        for model_type in model_types:
-            if self.can_make_request(model_type):
-                return False
-        return True
-    
-    def should_sleep_for_hour(self):
-        """Check if we should sleep for an hour due to all models being rate limited"""
-        if self.all_models_rate_limited_time is None:
-            return False
-        
-        # Check if 1 hour has passed since all models were rate limited
-        time_since_rate_limit = datetime.now() - self.all_models_rate_limited_time
-        return time_since_rate_limit.total_seconds() < 3600  # 1 hour in seconds
-    
-    def mark_all_models_rate_limited(self):
-        """Mark that all models are currently rate limited"""
-        self.all_models_rate_limited_time = datetime.now()
-        print(f"[🚫] All models are rate limited. Sleeping for 1 hour until {self.all_models_rate_limited_time + timedelta(hours=1)}")
-    
-    def reset_rate_limit_tracking(self):
-        """Reset the rate limit tracking when models become available again"""
-        self.all_models_rate_limited_time = None
-        print("[✅] Rate limit tracking reset - models available again")
-    
-    def can_make_request(self, model_type='primary'):
-        """Check if we can make a request based on rate limits"""
-        now = datetime.now()
-        window_start = now - timedelta(minutes=1)
-        
-        requests = self.get_requests_list(model_type)
-        rpm_limit = self.get_rpm_limit(model_type)
-        
-        # Clean old requests (older than 1 minute)
-        requests[:] = [req_time for req_time in requests if req_time > window_start]
-        
-        # Check RPM limit
-        if len(requests) >= rpm_limit:
-            return False
-        
-        return True
-    
-    def record_request(self, model_type='primary'):
-        """Record a request for rate limiting"""
-        requests = self.get_requests_list(model_type)
-        requests.append(datetime.now())
-    
-    def get_wait_time(self, model_type='primary'):
-        """Calculate how long to wait before next request"""
-        now = datetime.now()
-        window_start = now - timedelta(minutes=1)
-        
-        requests = self.get_requests_list(model_type)
-        rpm_limit = self.get_rpm_limit(model_type)
-        
-        # Clean old requests
-        requests[:] = [req_time for req_time in requests if req_time > window_start]
-        
-        if len(requests) >= rpm_limit:
-            # Find the oldest request in the window
-            oldest_request = min(requests)
-            wait_until = oldest_request + timedelta(minutes=1)
-            return max(0, (wait_until - now).total_seconds())
-        
-        return 0
+# Worker counts per stage of the article pipeline
+PIPELINE_FETCH_WORKERS = int(os.getenv('PIPELINE_FETCH_WORKERS', '4'))
+PIPELINE_LLM_WORKERS = int(os.getenv('PIPELINE_LLM_WORKERS', '1'))
+PIPELINE_PUBLISH_WORKERS = int(os.getenv('PIPELINE_PUBLISH_WORKERS', '2'))
+PIPELINE_QUEUE_SIZE = int(os.getenv('PIPELINE_QUEUE_SIZE', '8'))
+PIPELINE_DRAIN_TIMEOUT = float(os.getenv('PIPELINE_DRAIN_TIMEOUT', '120'))  # seconds to finish in-flight articles on shutdown
 
-# Initialize rate limiter
-rate_limiter = RateLimiter()
+# The pipeline currently running, so shutdown can ask it to drain
+active_pipeline = None
+
+# Rate limiting tracking
+# Shared with blog.py so both draw from the same Gemini budget
+rate_limiter = get_rate_limiter()
 
 # Initialize Gemini model
 gemini_api_key = os.getenv('GEMINI_API_KEY')
@@ -184,30 +80,16 @@ def get_model_type():
     """Get the current model type for rate limiting"""
     return current_model_name  # Return the actual model name for proper rate limiting
 
-def wait_for_rate_limit(model_type='primary'):
-    """Wait if necessary to respect rate limits"""
-    # First check if we should sleep for an hour due to all models being rate limited
-    if rate_limiter.should_sleep_for_hour():
-        remaining_time = 3600 - (datetime.now() - rate_limiter.all_models_rate_limited_time).total_seconds()
-        print(f"[⏰] All models still rate limited. Sleeping for {remaining_time:.0f} more seconds...")
-        time.sleep(remaining_time)
-        rate_limiter.reset_rate_limit_tracking()
-        return True
-    
-    # Check if all models are currently rate limited
-    if rate_limiter.are_all_models_rate_limited():
-        rate_limiter.mark_all_models_rate_limited()
-        print("[😴] Sleeping for 1 hour due to all models being rate limited...")
-        time.sleep(3600)  # Sleep for 1 hour
-        rate_limiter.reset_rate_limit_tracking()
-        return True
-    
-    # Normal rate limit waiting for specific model
-    wait_time = rate_limiter.get_wait_time(model_type)
-    if wait_time > 0:
-        print(f"[⏳] Rate limit reached for {model_type} model. Waiting {wait_time:.1f} seconds...")
-        time.sleep(wait_time)
-    return True
+def generate_on_available_model(prompt, kind, generation_config=None, use_cache=True):
+    """generate_content on the current model, moving past models whose own budget is spent"""
+    for _ in range(len(MODELS)):
+        try:
+            return generate_content(model, get_model_type(), prompt, kind, generation_config=generation_config,
+                                    use_cache=use_cache)
+        except ModelOverBudget as e:
+            print(f"[⏳] {e}, switching model...")
+            switch_model()
+    raise rate_limiter.mark_quota_exhausted(reason='no model has budget left')
 
 def is_rate_limit_error(error):
     """Check if the error is a rate limiting error"""
@@ -276,9 +158,8 @@ def assign_category_with_gemini(content, categories_data, max_retries=3):
     
     for attempt in range(max_retries):
         try:
-            # Wait for rate limit before making request
+            # Pick the model for this attempt
             model_type = get_model_type()
-            wait_for_rate_limit(model_type)
             
             # Format categories as bullet list
             formatted_categories = "\n".join(f"- {cat}" for cat in categories_data)
@@ -288,17 +169,16 @@ def assign_category_with_gemini(content, categories_data, max_retries=3):
 Classify this content into the most relevant categories from the list below.
 Return only category names separated by commas.
 
-Content: {content[:1500]}  # Limit content to save tokens
+Content: {trim_to_token_budget(content, CLASSIFY_CONTENT_TOKENS)}
 
 Categories:
 {formatted_categories}
 
 Categories:"""
 
-            # Record the request for rate limiting
-            rate_limiter.record_request(model_type)
-            
-            response = model.generate_content(prompt)
+            # Cached, or rate limited and recorded, inside generate_content
+            response = generate_on_available_model(prompt, 'classification', use_cache=attempt == 0)
+            model_type = get_model_type()
             prediction = response.text.strip()
 
             # Basic cleanup / normalization
@@ -327,10 +207,15 @@ Categories:"""
                 print(f"[❌] No valid categories found, retrying...")
                 continue
 
+        except QuotaExhausted:
+            raise
         except Exception as e:
             print(f"[🔥 Error] Attempt {attempt + 1}/{max_retries} failed: {e}")
             
             if is_rate_limit_error(e):
+                if attempt == max_retries - 1:
+                    # Every model kept refusing; park the work instead of sleeping
+                    raise rate_limiter.mark_quota_exhausted(reason=str(e))
                 print(f"[⏳] Rate limit detected, switching model...")
                 switch_model()
                 # Add a longer delay for rate limit errors
@@ -355,19 +240,139 @@ def scraper_main(url, category):
     uploaded_urls = []  # Initialize empty array for single URL processing
     result = scrape_url(url)
     if result:
-        # Check if article is tech-related before processing
-        if is_tech_related_article(result['title'], result['text']):
+        # A manual scrape is never skipped, but it is indexed so later copies are caught
+        try:
+            original_url, score = find_duplicate(url, result['text'])
+            if original_url:
+                print(f"[Scraper] Note: near-duplicate ({score:.0%}) of {original_url}")
+        except Exception as e:
+            print(f"[Scraper] Near-duplicate check failed for {url}: {e}")
+        with track_article(url):
+            # Check if article is tech-related before processing; the local pre-filter answers obvious cases
+            decision, _ = prefilter_decision(url, result['title'], result['text'])
+            if decision == 'uncertain':
+                is_tech = is_tech_related_article(result['title'], result['text'])
+            else:
+                is_tech = decision == 'tech'
+            if is_tech:
+                print(f"[✅] Article confirmed as tech-related: {result['title'][:100]}...")
+                uploaded_urls = blog_main(result['topic'], result['text'], result['url'], result['title'], category, uploaded_urls)
+                return result['topic'], result['title'], result['url'], uploaded_urls
+            else:
+                print(f"[❌] Article NOT tech-related, skipping: {result['title'][:100]}...")
+                return None, None, None, []
+    return None, None, None, []
+
+
+def fetch_stage(url):
+    """Pipeline stage 1: download and parse the article"""
+    print(f"[Scraper] Processing URL: {url}")
+    result = scrape_url(url)
+    if not result:
+        print(f"[Scraper] No result found for {url}")
+        return None
+
+    # Same story from another source: skip it before any LLM spend
+    try:
+        original_url, score = find_duplicate(url, result['text'])
+    except Exception as e:
+        print(f"[Scraper] Near-duplicate check failed for {url}: {e}")
+        original_url = None
+    if original_url:
+        print(f"[Scraper] Near-duplicate ({score:.0%}) of {original_url}, skipping {url}")
+        mark_url_duplicate(url, original_url)
+        return None
+    return {'url': url, 'result': result}
+
+
+def park_for_quota(url, error):
+    """Park the URL until the quota refills and stop feeding the pipeline; never sleeps"""
+    print(f"[Scraper] {error}. Parking {url}")
+    park_urls([url], error.resume_at, 'quota')
+    pipeline = active_pipeline
+    if pipeline is not None:
+        pipeline.stop()
+
+
+def make_llm_stage(categories_data):
+    def llm_stage(item):
+        """Pipeline stage 2: tech check, categorization and rewriting (rate limited)"""
+        with track_article(item['url']):
+            url = item['url']
+            result = item['result']
+            decision, probability = prefilter_decision(url, result['title'], result['text'])
+            try:
+                if decision == 'not_tech':
+                    # Obviously not tech: no Gemini call at all
+                    classification = {'is_tech': False, 'categories': []}
+                elif decision == 'tech':
+                    # Obviously tech: only the short categorization prompt
+                    classification = {'is_tech': True,
+                                      'categories': assign_category_with_gemini(result['text'], categories_data)}
+                else:
+                    # Tech check and categorization in one request
+                    classification = classify_article(result['title'], result['text'], categories_data)
+            except QuotaExhausted as e:
+                park_for_quota(url, e)
+                return None
+            # Only Gemini's decisions are used to train and evaluate the pre-filter
+            if decision != 'uncertain':
+                label_source = 'prefilter'
+            elif classification.get('fallback'):
+                label_source = 'fallback'
+            else:
+                label_source = 'llm'
+            record_tech_decision(url, label_source, probability)
+            if not classification['is_tech']:
+                print(f"[❌] Article NOT tech-related, skipping: {result['title'][:100]}...")
+                # Mark URL as processed but not tech-related
+                soft_delete_url(url, "NOT_TECH_RELATED")
+                return None
+
             print(f"[✅] Article confirmed as tech-related: {result['title'][:100]}...")
-            uploaded_urls = blog_main(result['topic'], result['text'], result['url'], result['title'], category, uploaded_urls)
-            return result['topic'], result['title'], result['url'], uploaded_urls
+            category = classification['categories']
+            print(f"[Scraper] Category: {category}")
+            if not category:
+                print(f"[Scraper] No category found for {url}")
+                return None
+
+            item['category'] = category
+            try:
+                item['prepared'] = prepare_article(result['topic'], result['text'], result['url'], result['title'], category)
+            except QuotaExhausted as e:
+                park_for_quota(url, e)
+                return None
+            return item
+    return llm_stage
+
+
+def make_publish_stage(uploaded_urls):
+    def publish_stage(item):
+        """Pipeline stage 3: image, then the WordPress post joins the publish queue"""
+        if item['prepared']:
+            # tbl_urls is updated when the post's batch is published
+            publish_article(item['prepared'], uploaded_urls, publish_queue)
         else:
-            print(f"[❌] Article NOT tech-related, skipping: {result['title'][:100]}...")
-            return None, None, None, []
-    return None, None, None, []
+            soft_delete_url(item['url'], str(item['category']))
+        return item
+    return publish_stage
+
+
+def request_pipeline_stop(timeout=None):
+    """Stop feeding new URLs to a running pipeline and wait for in-flight articles to finish"""
+    pipeline = active_pipeline
+    if pipeline is None:
+        return True
+    print("[Scraper] Stop requested, draining the article pipeline...")
+    pipeline.stop()
+    drained = pipeline.wait(PIPELINE_DRAIN_TIMEOUT if timeout is None else timeout)
+    if not drained:
+        print("[Scraper] Pipeline did not drain before the timeout")
+    return drained
 
 
 def scrap_db_urls_and_write_blogs():
-    global scraping_in_progress
+    global scraping_in_progress, active_pipeline
     
     if scraping_in_progress:
         print("[Scraper] Another scraping instance is already running, skipping...")
@@ -383,34 +388,32 @@ def scrap_db_urls_and_write_blogs():
         print(f"[Scraper] Found {len(urls)} URLs to scrape")
         
         uploaded_urls = []  # Initialize array to collect uploaded posts
-        
-        for url in urls:
-            print(f"[Scraper] Processing URL: {url}")
-            result = scrape_url(url)
-            if result:
-                # Check if article is tech-related before processing
-                if is_tech_related_article(result['title'], result['text']):
-                    print(f"[✅] Article confirmed as tech-related: {result['title'][:100]}...")
-                    categories_data = get_categories_data()
-                    category = assign_category_with_gemini(result['text'], categories_data)
-                    print(f"[Scraper] Category: {category}")
-                    if category:
-                        # Pass the uploaded_urls array to collect results
-                        uploaded_urls = blog_main(result['topic'], result['text'], result['url'], result['title'], category, uploaded_urls)
-                        soft_delete_url(url, str(category))
-                        time.sleep(5)
-                    else:
-                        print(f"[Scraper] No category found for {url}")
-                        continue
-                else:
-                    print(f"[❌] Article NOT tech-related, skipping: {result['title'][:100]}...")
-                    # Mark URL as processed but not tech-related
-                    soft_delete_url(url, "NOT_TECH_RELATED")
-                    continue
-            else:
-                print(f"[Scraper] No result found for {url}")
-                # retry for 3 times
-                continue
+        categories_data = get_categories_data()
+        if DEDUP_ENABLED:
+            try:
+                prune_lsh_index(datetime.now() - timedelta(days=DEDUP_WINDOW_DAYS))
+            except Exception as e:
+                print(f"[Scraper] Could not prune the near-duplicate index: {e}")
+
+        # Downloads and WordPress calls overlap with the rate-limited LLM work
+        pipeline = StagedPipeline([
+            Stage('fetch', fetch_stage, PIPELINE_FETCH_WORKERS),
+            Stage('llm', make_llm_stage(categories_data), PIPELINE_LLM_WORKERS),
+            Stage('publish', make_publish_stage(uploaded_urls), PIPELINE_PUBLISH_WORKERS),
+        ], queue_size=PIPELINE_QUEUE_SIZE)
+        active_pipeline = pipeline
+        try:
+            fed = pipeline.run(urls)
+        finally:
+            active_pipeline = None
+            # Whatever is still queued goes out now, also when the run was stopped early
+            publish_queue.flush()
+        print(f"[Scraper] Pipeline stats: {pipeline.stats}")
+
+        # Quota ran out mid-run: park what was never fed so the scheduler resumes it
+        resume_at = rate_limiter.get_quota_resume_at()
+        if resume_at is not None and fed < len(urls):
+            park_urls(urls[fed:], resume_at, 'quota')
         
         print(f"[Scraper] Completed scrap_db_urls_and_write_blogs. Uploaded {len(uploaded_urls)} posts.")
         return uploaded_urls
@@ -418,25 +421,8 @@ def scrap_db_urls_and_write_blogs():
         scraping_in_progress = False
 
 
-def is_tech_related_article(title, text, max_retries=3):
-    """
-    Check if the article is technology-related using Gemini AI.
-    Returns True if tech-related, False otherwise.
-    """
-    global current_model_name, model
-    
-    # Use AI to determine tech relevance
-    for attempt in range(max_retries):
-        try:
-            # Wait for rate limit before making request
-            model_type = get_model_type()
-            wait_for_rate_limit(model_type)
-            
-            # Construct the prompt for tech relevance check
-            prompt = f"""
-Determine if this article is technology-related. Consider ALL of the following:
-
-**New Technologies & Tools:**
+# Shared by the standalone tech check and the combined classification prompt
+TECH_RELEVANCE_CRITERIA = """**New Technologies & Tools:**
 - New software, apps, platforms, or digital tools
 - New hardware, devices, gadgets, or equipment
 - Emerging technologies (AI, ML, blockchain, IoT, VR/AR, quantum computing, etc.)
@@ -477,18 +463,37 @@ Determine if this article is technology-related. Consider ALL of the following:
 - Tech stock market news, financial performance, or earnings
 - Tech economic impact, job market, or employment trends
 - Tech trade, import/export, or international tech relations
-- Tech taxation, subsidies, or government tech policies
+- Tech taxation, subsidies, or government tech policies"""
+
+
+def is_tech_related_article(title, text, max_retries=3):
+    """
+    Check if the article is technology-related using Gemini AI.
+    Returns True if tech-related, False otherwise.
+    """
+    global current_model_name, model
+    
+    # Use AI to determine tech relevance
+    for attempt in range(max_retries):
+        try:
+            # Pick the model for this attempt
+            model_type = get_model_type()
+            
+            # Construct the prompt for tech relevance check
+            prompt = f"""
+Determine if this article is technology-related. Consider ALL of the following:
+
+{TECH_RELEVANCE_CRITERIA}
 
 Article Title: {title}
-Article Content: {text[:1000]}
+Article Content: {trim_to_token_budget(text, CLASSIFY_CONTENT_TOKENS)}
 
 Respond with only "YES" if tech-related or "NO" if not tech-related.
 Response:"""
 
-            # Record the request for rate limiting
-            rate_limiter.record_request(model_type)
-            
-            response = model.generate_content(prompt)
+            # Cached, or rate limited and recorded, inside generate_content
+            response = generate_on_available_model(prompt, 'classification', use_cache=attempt == 0)
+            model_type = get_model_type()
             result = response.text.strip().upper()
             
             is_tech = result in ['YES', 'Y', 'TRUE', 'TECH', 'TECHNOLOGY']
@@ -500,10 +505,15 @@ Response:"""
             
             return is_tech
 
+        except QuotaExhausted:
+            raise
         except Exception as e:
             print(f"[🔥 Error] Tech relevance check attempt {attempt + 1}/{max_retries} failed: {e}")
             
             if is_rate_limit_error(e):
+                if attempt == max_retries - 1:
+                    # Every model kept refusing; park the work instead of sleeping
+                    raise rate_limiter.mark_quota_exhausted(reason=str(e))
                 print(f"[⏳] Rate limit detected during tech check, switching model...")
                 switch_model()
                 time.sleep(5)
@@ -521,3 +531,118 @@ Response:"""
     
     return False
 
+
+def _parse_json_response(text):
+    """Parse a JSON object from a model response, tolerating ``` fences and surrounding prose"""
+    text = text.strip()
+    text = re.sub(r'^```(?:json)?\s*|\s*```$', '', text)
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        match = re.search(r'\{.*\}', text, re.DOTALL)
+        if match:
+            return json.loads(match.group(0))
+        raise
+
+
+def classify_article(title, text, categories_data, max_retries=3):
+    """
+    Decide tech relevance and pick categories with a single Gemini request.
+    Returns {'is_tech': bool, 'categories': [...]} with the same fallbacks as
+    is_tech_related_article (False on failure) and assign_category_with_gemini ([]).
+    Results that come from those fallbacks carry 'fallback': True.
+    """
+    global current_model_name, model
+
+    formatted_categories = "\n".join(f"- {cat}" for cat in categories_data)
+    # Match the model's answer to our categories regardless of case
+    categories_by_lower = {cat.lower(): cat for cat in categories_data}
+    is_tech = False
+
+    for attempt in range(max_retries):
+        try:
+            # Pick the model for this attempt
+            model_type = get_model_type()
+
+            prompt = f"""
+Classify this article. First decide if it is technology-related. Consider ALL of the following:
+
+{TECH_RELEVANCE_CRITERIA}
+
+If it is technology-related, also choose the most relevant categories from this list (use the names exactly as written):
+{formatted_categories}
+
+Article Title: {title}
+Article Content: {trim_to_token_budget(text, CLASSIFY_CONTENT_TOKENS)}
+
+Respond with only a JSON object of the form:
+{{"is_tech": true or false, "categories": ["Category", ...]}}
+Use an empty categories list when is_tech is false.
+JSON:"""
+
+            # Cached, or rate limited and recorded, inside generate_content
+            response = generate_on_available_model(prompt, 'classification',
+                                                   generation_config={'response_mime_type': 'application/json'},
+                                                   use_cache=attempt == 0)
+            model_type = get_model_type()
+            data = _parse_json_response(response.text)
+
+            is_tech = data.get('is_tech')
+            if isinstance(is_tech, str):
+                is_tech = is_tech.strip().upper() in ['YES', 'Y', 'TRUE', 'TECH', 'TECHNOLOGY']
+            is_tech = bool(is_tech)
+
+            if not is_tech:
+                print(f"[❌] AI confirmed NOT tech-related: {title[:100]}...")
+                return {'is_tech': False, 'categories': []}
+
+            predicted_categories = data.get('categories') or []
+            if isinstance(predicted_categories, str):
+                predicted_categories = predicted_categories.split(',')
+
+            valid_categories = []
+            invalid_categories = []
+            for cat in predicted_categories:
+                cat = str(cat).strip().strip('"\'')
+                match = categories_by_lower.get(cat.lower())
+                if match and match not in valid_categories:
+                    valid_categories.append(match)
+                elif not match:
+                    invalid_categories.append(cat)
+
+            if invalid_categories:
+                print(f"[⚠️] Model responded with unexpected categories: {invalid_categories}")
+
+            if valid_categories:
+                print(f"[✅] AI confirmed tech-related, categorized with {model_type} model: {title[:100]}...")
+                return {'is_tech': True, 'categories': valid_categories}
+
+            print(f"[❌] No valid categories found, retrying...")
+            continue
+
+        except QuotaExhausted:
+            raise
+        except Exception as e:
+            print(f"[🔥 Error] Classification attempt {attempt + 1}/{max_retries} failed: {e}")
+
+            if is_rate_limit_error(e):
+                if attempt == max_retries - 1:
+                    # Every model kept refusing; park the work instead of sleeping
+                    raise rate_limiter.mark_quota_exhausted(reason=str(e))
+                print(f"[⏳] Rate limit detected during classification, switching model...")
+                switch_model()
+                time.sleep(5)
+                continue
+            else:
+                if attempt < max_retries - 1:
+                    print(f"[🔄] Non-rate-limit error during classification, trying with different model...")
+                    switch_model()
+                    time.sleep(2)
+                    continue
+                else:
+                    print(f"[❌] Classification failed after {max_retries} attempts")
+                    break
+
+    # A tech article whose categories never validated keeps is_tech so it is retried next cycle
+    return {'is_tech': is_tech, 'categories': [], 'fallback': True}
+
@@ -0,0 +1,309 @@
+"""Cheap local tech-relevance pre-filter that runs before the Gemini tech check.
+
+Two signals are blended:
+  - keyword scoring over the title and the start of the article text
+  - an optional hashed logistic-regression model trained on Gemini's past
+    decisions in tbl_urls (NOT_TECH_RELATED vs. any category), using URL slug
+    words and the source host as features
+
+The pre-filter runs in shadow mode by default: it scores every article and the
+score is stored next to Gemini's decision, but Gemini still decides. Once
+`evaluate` shows the blended decision agrees with Gemini, TECH_PREFILTER_MODE=on
+lets confident articles skip the LLM tech check.
+
+    python tech_classifier.py train      # fit the URL model from tbl_urls
+    python tech_classifier.py evaluate   # agreement with historical LLM labels
+"""
+import argparse
+import json
+import math
+import os
+import random
+import re
+import threading
+import zlib
+from urllib.parse import urlparse
+
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# off     - always ask Gemini
+# shadow  - compute and log the pre-filter decision, but still ask Gemini
+# on      - confident decisions skip the Gemini tech check
+TECH_PREFILTER_MODE = os.getenv('TECH_PREFILTER_MODE', 'shadow').lower()
+# Probability needed to trust the pre-filter (and 1 - this for "not tech")
+TECH_PREFILTER_THRESHOLD = float(os.getenv('TECH_PREFILTER_THRESHOLD', '0.9'))
+TECH_MODEL_PATH = os.getenv(
+    'TECH_MODEL_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tech_classifier_model.json')
+)
+# Only the start of the article is scored; the lede says what the story is about
+KEYWORD_TEXT_CHARS = 2000
+
+TECH_KEYWORDS = [
+    'ai', 'artificial intelligence', 'machine learning', 'startup', 'startups', 'fintech', 'software',
+    'app', 'apps', 'platform', 'digital', 'internet', 'broadband', 'mobile money', 'smartphone',
+    'telecom', 'telco', '5g', '4g', 'data centre', 'data center', 'cloud', 'cybersecurity', 'cyber',
+    'blockchain', 'crypto', 'bitcoin', 'e-commerce', 'ecommerce', 'edtech', 'healthtech', 'agritech',
+    'insurtech', 'proptech', 'saas', 'api', 'developer', 'developers', 'tech', 'technology',
+    'innovation', 'venture capital', 'seed round', 'series a', 'series b', 'funding round',
+    'accelerator', 'incubator', 'payments', 'payment', 'electric vehicle', 'ev', 'satellite', 'robotics',
+    'semiconductor', 'chip', 'gadget', 'device', 'online', 'automation', 'algorithm', 'chatbot',
+]
+
+NON_TECH_KEYWORDS = [
+    'football', 'soccer', 'premier league', 'afcon', 'striker', 'athletics',
+    'election', 'campaign rally', 'senator', 'parliament', 'coup', 'protest', 'celebrity', 'actress',
+    'actor', 'music', 'album', 'concert', 'nollywood', 'fashion', 'recipe', 'wedding', 'horoscope',
+    'church', 'religion', 'murder', 'robbery', 'kidnapping', 'court case', 'obituary', 'tourism',
+    'safari', 'rainfall',
+]
+
+STOP_WORDS = {
+    'the', 'and', 'for', 'with', 'from', 'that', 'this', 'into', 'over', 'after', 'about', 'its',
+    'are', 'was', 'has', 'have', 'how', 'why', 'what', 'who', 'new', 'will', 'amp', 'html', 'php',
+    'www', 'com', 'news', 'category', 'tag', 'article', 'articles', 'post', 'posts',
+}
+
+TOKEN_PATTERN = re.compile(r'[a-z][a-z0-9]+')
+
+
+def _keyword_regex(keywords):
+    # Longest first so "machine learning" wins over shorter overlapping words
+    alternation = '|'.join(re.escape(k) for k in sorted(set(keywords), key=len, reverse=True))
+    return re.compile(r'\b(?:' + alternation + r')\b', re.IGNORECASE)
+
+
+TECH_KEYWORD_PATTERN = _keyword_regex(TECH_KEYWORDS)
+NON_TECH_KEYWORD_PATTERN = _keyword_regex(NON_TECH_KEYWORDS)
+
+
+def keyword_probability(title, text):
+    """Tech probability from distinct keyword hits in the title and lede"""
+    sample = f"{title or ''}\n{(text or '')[:KEYWORD_TEXT_CHARS]}"
+    tech_hits = len({m.lower() for m in TECH_KEYWORD_PATTERN.findall(sample)})
+    non_tech_hits = len({m.lower() for m in NON_TECH_KEYWORD_PATTERN.findall(sample)})
+    # Title words count twice: headlines rarely mention a topic by accident
+    tech_hits += len({m.lower() for m in TECH_KEYWORD_PATTERN.findall(title or '')})
+    non_tech_hits += len({m.lower() for m in NON_TECH_KEYWORD_PATTERN.findall(title or '')})
+    score = 0.6 * tech_hits - 0.9 * non_tech_hits
+    return 1 / (1 + math.exp(-score))
+
+
+def url_features(url):
+    """Source host plus slug words of the article URL"""
+    parsed = urlparse(url or '')
+    host = parsed.netloc.lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    features = [f'host:{host}'] if host else []
+    for token in TOKEN_PATTERN.findall(parsed.path.lower()):
+        if token not in STOP_WORDS:
+            features.append(token)
+    return features
+
+
+class HashedLinearModel:
+    """Logistic regression over hashed sparse features, trained with plain SGD"""
+
+    def __init__(self, n_buckets=2 ** 18, weights=None, bias=0.0):
+        self.n_buckets = n_buckets
+        self.weights = weights or {}
+        self.bias = bias
+
+    def _buckets(self, features):
+        # crc32 instead of hash(): stable across processes, so the saved model stays valid
+        return [zlib.crc32(f.encode('utf-8')) % self.n_buckets for f in set(features)]
+
+    def logit(self, features):
+        weights = self.weights
+        return self.bias + sum(weights.get(b, 0.0) for b in self._buckets(features))
+
+    def predict_proba(self, features):
+        z = max(-30.0, min(30.0, self.logit(features)))
+        return 1 / (1 + math.exp(-z))
+
+    def train(self, samples, epochs=8, learning_rate=0.2, l2=1e-5, seed=13):
+        """samples: list of (features, label) with label 1 for tech, 0 for not tech"""
+        rows = [(self._buckets(features), label) for features, label in samples]
+        rng = random.Random(seed)
+        weights = self.weights
+        for epoch in range(epochs):
+            rng.shuffle(rows)
+            rate = learning_rate / (1 + epoch)
+            for buckets, label in rows:
+                z = self.bias + sum(weights.get(b, 0.0) for b in buckets)
+                z = max(-30.0, min(30.0, z))
+                error = 1 / (1 + math.exp(-z)) - label
+                self.bias -= rate * error
+                for b in buckets:
+                    w = weights.get(b, 0.0)
+                    weights[b] = w - rate * (error + l2 * w)
+        return self
+
+    def save(self, path):
+        with open(path, 'w') as f:
+            json.dump({'n_buckets': self.n_buckets, 'bias': self.bias,
+                       'weights': {str(b): round(w, 6) for b, w in self.weights.items() if abs(w) > 1e-6}}, f)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'r') as f:
+            data = json.load(f)
+        return cls(n_buckets=data['n_buckets'], bias=data['bias'],
+                   weights={int(b): w for b, w in data['weights'].items()})
+
+
+class TechPrefilter:
+    """Blends keyword and URL-model probabilities and decides tech / not_tech / uncertain"""
+
+    def __init__(self, model=None, threshold=TECH_PREFILTER_THRESHOLD):
+        self.model = model
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self.stats = {'tech': 0, 'not_tech': 0, 'uncertain': 0}
+
+    def probability(self, url, title, text):
+        p_keywords = keyword_probability(title, text)
+        if self.model is None:
+            return p_keywords
+        return (p_keywords + self.model.predict_proba(url_features(url))) / 2
+
+    def decide(self, url, title, text):
+        """Returns ('tech' | 'not_tech' | 'uncertain', tech probability)"""
+        probability = self.probability(url, title, text)
+        if probability >= self.threshold:
+            decision = 'tech'
+        elif probability <= 1 - self.threshold:
+            decision = 'not_tech'
+        else:
+            decision = 'uncertain'
+        with self._lock:
+            self.stats[decision] += 1
+        return decision, probability
+
+
+_prefilter = None
+_prefilter_lock = threading.Lock()
+
+
+def get_prefilter():
+    global _prefilter
+    if _prefilter is None:
+        with _prefilter_lock:
+            if _prefilter is None:
+                model = None
+                if os.path.exists(TECH_MODEL_PATH):
+                    try:
+                        model = HashedLinearModel.load(TECH_MODEL_PATH)
+                        print(f"[TechPrefilter] Loaded URL model from {TECH_MODEL_PATH}")
+                    except (OSError, ValueError, KeyError) as e:
+                        print(f"[TechPrefilter] Could not load {TECH_MODEL_PATH}, using keywords only: {e}")
+                _prefilter = TechPrefilter(model)
+    return _prefilter
+
+
+def prefilter_decision(url, title, text):
+    """
+    (decision, tech probability) honouring TECH_PREFILTER_MODE; 'uncertain' means ask Gemini.
+    The probability is None when the pre-filter is off.
+    """
+    if TECH_PREFILTER_MODE == 'off':
+        return 'uncertain', None
+    decision, probability = get_prefilter().decide(url, title, text)
+    print(f"[TechPrefilter] {decision} (p={probability:.2f}) for {url}")
+    if TECH_PREFILTER_MODE == 'shadow':
+        return 'uncertain', probability
+    return decision, probability
+
+
+def get_prefilter_stats():
+    if TECH_PREFILTER_MODE == 'off':
+        return {'mode': TECH_PREFILTER_MODE}
+    prefilter = get_prefilter()
+    return dict(prefilter.stats, mode=TECH_PREFILTER_MODE, threshold=prefilter.threshold,
+                url_model=prefilter.model is not None)
+
+
+def _labeled_rows():
+    """(url, label, stored pre-filter probability) for every URL Gemini labeled"""
+    from dbOperations import get_labeled_urls
+    return [(url, 0 if category == 'NOT_TECH_RELATED' else 1, probability)
+            for url, category, probability in get_labeled_urls()]
+
+
+def _labeled_samples(rows=None):
+    return [(url_features(url), label) for url, label, _ in (rows if rows is not None else _labeled_rows())]
+
+
+def _holdout(samples, holdout_percent=20):
+    """Deterministic split on the features so reruns evaluate the same URLs"""
+    train, test = [], []
+    for features, label in samples:
+        bucket = zlib.crc32(' '.join(features).encode('utf-8')) % 100
+        (test if bucket < holdout_percent else train).append((features, label))
+    return train, test
+
+
+def train_model(path=TECH_MODEL_PATH):
+    samples = _labeled_samples()
+    if not samples:
+        print("[TechPrefilter] No labeled URLs in tbl_urls yet")
+        return None
+    model = HashedLinearModel().train(samples)
+    model.save(path)
+    print(f"[TechPrefilter] Trained on {len(samples)} URLs, saved to {path}")
+    return model
+
+
+def _agreement_report(probabilities, thresholds):
+    """Print coverage and agreement of (tech probability, label) pairs at each threshold"""
+    agree = sum((p >= 0.5) == bool(label) for p, label in probabilities)
+    print(f"Overall agreement at 0.5: {agree / len(probabilities):.1%}")
+    print(f"{'threshold':>9} {'coverage':>9} {'agreement':>10} {'tech skip':>10} {'not-tech skip':>14}")
+    for threshold in thresholds:
+        confident = [(p, label) for p, label in probabilities if p >= threshold or p <= 1 - threshold]
+        if not confident:
+            print(f"{threshold:>9} {'0.0%':>9} {'-':>10}")
+            continue
+        agree = sum((p >= 0.5) == bool(label) for p, label in confident)
+        tech = sum(1 for p, _ in confident if p >= threshold)
+        print(f"{threshold:>9} {len(confident) / len(probabilities):>9.1%} {agree / len(confident):>10.1%} "
+              f"{tech:>10} {len(confident) - tech:>14}")
+
+
+def evaluate(thresholds=(0.8, 0.9, 0.95)):
+    """Agreement with historical Gemini labels: the blended production decision, then the URL model alone"""
+    rows = _labeled_rows()
+
+    # The blended keyword + URL-model probability is stored when an article is classified,
+    # so this is the decision TECH_PREFILTER_MODE=on would have made
+    blended = [(probability, label) for _, label, probability in rows if probability is not None]
+    print(f"Blended pre-filter decision vs. Gemini ({len(blended)} URLs scored in shadow mode):")
+    if blended:
+        _agreement_report(blended, thresholds)
+    else:
+        print("  No scored URLs yet; run with TECH_PREFILTER_MODE=shadow first.")
+
+    samples = _labeled_samples(rows)
+    train, test = _holdout(samples)
+    if not train or not test:
+        print(f"[TechPrefilter] Not enough labeled URLs to evaluate the URL model ({len(samples)})")
+        return
+    model = HashedLinearModel().train(train)
+    positives = sum(label for _, label in test)
+    print(f"\nURL model alone. Train: {len(train)} URLs, test: {len(test)} URLs "
+          f"({positives} tech, {len(test) - positives} not tech)")
+    _agreement_report([(model.predict_proba(features), label) for features, label in test], thresholds)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train or evaluate the local tech pre-filter")
+    parser.add_argument('command', choices=['train', 'evaluate'])
+    args = parser.parse_args()
+    if args.command == 'train':
+        train_model()
+    else:
+        evaluate()
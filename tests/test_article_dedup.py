@@ -0,0 +1,78 @@
+"""Near-duplicate detection for copies fetched in the same cycle as their original.
+
+find_lsh_candidates is replaced by an in-memory index that applies the same candidate
+rule as the SQL query: published, or in flight (not written, parked or rejected).
+
+Run from the repository root:
+    python -m pytest tests
+"""
+import os
+import sys
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import article_dedup  # noqa: E402
+
+ARTICLE = (
+    "The company announced on Tuesday that its new processor line will ship to laptop makers "
+    "next quarter, promising longer battery life and faster on device inference for local "
+    "language models. Analysts expect the chips to compete directly with rival designs that "
+    "launched earlier this year, while the firm said early benchmarks show double digit gains "
+    "in both single threaded and multi threaded workloads across a range of common tasks."
+)
+# The same press release as syndicated by another site, with a different closing line
+COPY = ARTICLE.replace("across a range of common tasks.", "across many everyday workloads, it said.")
+
+
+class FakeFingerprintIndex:
+    def __init__(self):
+        self.rows = {}
+
+    def save(self, fetched_url, minhash, band_keys, created_at):
+        self.rows[fetched_url] = {'minhash': minhash, 'keys': set(band_keys), 'created_at': created_at,
+                                  'published': False, 'written': False, 'parked': False, 'category': None}
+
+    def candidates(self, band_keys, since, exclude_url):
+        band_keys = set(band_keys)
+        return [
+            (url, row['minhash']) for url, row in self.rows.items()
+            if url != exclude_url and row['created_at'] > since and row['keys'] & band_keys
+            and (row['published'] or (not row['written'] and not row['parked']
+                                      and row['category'] != 'NOT_TECH_RELATED'))
+        ]
+
+
+class SameCycleDuplicateTest(unittest.TestCase):
+    def setUp(self):
+        self.index = FakeFingerprintIndex()
+        patches = [
+            mock.patch.object(article_dedup, 'DEDUP_ENABLED', True),
+            mock.patch.object(article_dedup, 'find_lsh_candidates', self.index.candidates),
+            mock.patch.object(article_dedup, 'save_article_fingerprint', self.index.save),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def test_copy_of_unpublished_original_in_same_cycle_is_duplicate(self):
+        self.assertEqual(article_dedup.find_duplicate('https://a.example/chips', ARTICLE)[0], None)
+        original, score = article_dedup.find_duplicate('https://b.example/chips', COPY)
+        self.assertEqual(original, 'https://a.example/chips')
+        self.assertGreaterEqual(score, article_dedup.DEDUP_THRESHOLD)
+        self.assertNotIn('https://b.example/chips', self.index.rows)
+
+    def test_rejected_original_does_not_drop_copy(self):
+        article_dedup.find_duplicate('https://a.example/chips', ARTICLE)
+        self.index.rows['https://a.example/chips'].update(written=True, category='NOT_TECH_RELATED')
+        self.assertEqual(article_dedup.find_duplicate('https://b.example/chips', COPY)[0], None)
+
+    def test_parked_original_does_not_drop_copy(self):
+        article_dedup.find_duplicate('https://a.example/chips', ARTICLE)
+        self.index.rows['https://a.example/chips']['parked'] = True
+        self.assertEqual(article_dedup.find_duplicate('https://b.example/chips', COPY)[0], None)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,158 @@
+import json
+import os
+import re
+import threading
+
+# Per-source link filter rules. "default" applies to every source; entries under
+# "sources" override individual keys for one source URL:
+#   min_length              - links shorter than this are dropped (0 disables the check)
+#   prefer_date_paths       - put /YYYY/MM/ links ahead of the rest
+#   require_http            - drop relative links, mailto:, javascript: etc.
+#   exclude_urls            - exact links to drop (the source URL itself is always dropped)
+#   exclude_patterns        - substrings that drop a link; replaces the default list
+#   extra_exclude_patterns  - substrings added on top of the inherited list
+URL_FILTER_RULES_PATH = os.getenv(
+    'URL_FILTER_RULES_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'url_filter_rules.json')
+)
+
+DATE_PATH_PATTERN = re.compile(r'/\d{4}/\d{2}/')
+
+_rules = None
+_rules_mtime = None
+_filters = {}
+_lock = threading.Lock()
+
+
+def _trie_to_regex(node):
+    # A pattern ending here already matches; longer patterns below it are redundant
+    if '' in node:
+        return ''
+    alternatives = [re.escape(char) + _trie_to_regex(child) for char, child in sorted(node.items())]
+    if len(alternatives) == 1:
+        return alternatives[0]
+    return '(?:' + '|'.join(alternatives) + ')'
+
+
+def compile_patterns(patterns):
+    """Compile substring patterns into one prefix-trie regex.
+
+    A flat "a|b|c" alternation makes the regex engine retry every pattern at every
+    position; sharing prefixes ('https://', '/', 'www.') lets it reject most
+    positions after a character or two, so a link is scanned once.
+    """
+    trie = {}
+    for pattern in patterns:
+        node = trie
+        for char in pattern:
+            node = node.setdefault(char, {})
+        node[''] = True
+    return re.compile(_trie_to_regex(trie))
+
+
+class UrlFilter:
+    """All exclusion rules for one source compiled into a single matcher"""
+
+    def __init__(self, source_url, min_length=65, prefer_date_paths=True, require_http=True,
+                 exclude_urls=(), exclude_patterns=()):
+        self.source_url = source_url
+        self.min_length = min_length or 0
+        self.prefer_date_paths = prefer_date_paths
+        self.require_http = require_http
+        self.exclude_urls = frozenset(exclude_urls) | {source_url, source_url.rstrip('/')}
+
+        patterns = set(p for p in exclude_patterns if p)
+        self.pattern_count = len(patterns)
+        self._excluded = compile_patterns(patterns).search if patterns else None
+
+    def accepts(self, link):
+        if not link or len(link) <= 1 or link == '/':
+            return False
+        if len(link) < self.min_length:
+            return False
+        if self.require_http and not link.startswith('http'):
+            return False
+        if link in self.exclude_urls:
+            return False
+        if self._excluded is not None and self._excluded(link):
+            return False
+        return True
+
+    def filter(self, links):
+        """Yield the links that pass every rule"""
+        accepts = self.accepts
+        for link in links:
+            if accepts(link):
+                yield link
+
+    def order(self, links):
+        """Date-path links first (if preferred), each group longest first"""
+        if not self.prefer_date_paths:
+            return sorted(links, key=len, reverse=True)
+        date_formatted_links = []
+        other_links = []
+        for link in links:
+            if DATE_PATH_PATTERN.search(link):
+                date_formatted_links.append(link)
+            else:
+                other_links.append(link)
+        date_formatted_links.sort(key=len, reverse=True)
+        other_links.sort(key=len, reverse=True)
+        return date_formatted_links + other_links
+
+
+def load_rules(path=URL_FILTER_RULES_PATH):
+    with open(path, 'r') as f:
+        rules = json.load(f)
+    rules.setdefault('default', {})
+    rules.setdefault('sources', {})
+    return rules
+
+
+def resolve_source_rules(rules, source_url):
+    """Merge the default rules with the overrides for one source"""
+    merged = dict(rules['default'])
+    overrides = rules['sources'].get(source_url) or rules['sources'].get(source_url.rstrip('/')) or {}
+    merged.update({k: v for k, v in overrides.items() if k != 'extra_exclude_patterns'})
+    merged['exclude_patterns'] = list(merged.get('exclude_patterns', [])) + list(overrides.get('extra_exclude_patterns', []))
+    merged.pop('extra_exclude_patterns', None)
+    return merged
+
+
+def _refresh_rules_locked(path):
+    global _rules, _rules_mtime
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        mtime = None
+    if _rules is None or mtime != _rules_mtime:
+        _rules = load_rules(path)
+        _rules_mtime = mtime
+        _filters.clear()
+
+
+def get_url_filter(source_url, path=URL_FILTER_RULES_PATH):
+    """Return the cached compiled filter for a source, rebuilding it if the rules file changed"""
+    with _lock:
+        _refresh_rules_locked(path)
+        url_filter = _filters.get(source_url)
+        if url_filter is None:
+            source_rules = resolve_source_rules(_rules, source_url)
+            url_filter = UrlFilter(
+                source_url,
+                min_length=source_rules.get('min_length', 65),
+                prefer_date_paths=source_rules.get('prefer_date_paths', True),
+                require_http=source_rules.get('require_http', True),
+                exclude_urls=source_rules.get('exclude_urls', []),
+                exclude_patterns=source_rules.get('exclude_patterns', [])
+            )
+            _filters[source_url] = url_filter
+        return url_filter
+
+
+def clear_filter_cache():
+    global _rules, _rules_mtime
+    with _lock:
+        _rules = None
+        _rules_mtime = None
+        _filters.clear()